@@ -13,7 +13,7 @@ from app.core.config import get_settings
 from app.core.database import Base
 
 # Import all models to ensure they're registered with Base
-from app.models import document, file, form, ocr, template, user
+from app.models import document, file, form, ocr, ocr_cache, template, user
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,28 @@
+"""add_ocr_config_to_forms
+
+Revision ID: 3c1f7a9e2b64
+Revises: 4dd5b86a2349
+Create Date: 2026-10-17 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3c1f7a9e2b64"
+down_revision: Union[str, Sequence[str], None] = "4dd5b86a2349"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - add ocr_config column to forms table."""
+    op.add_column("forms", sa.Column("ocr_config", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema - remove ocr_config column from forms table."""
+    op.drop_column("forms", "ocr_config")
@@ -0,0 +1,47 @@
+"""add_job_queue_columns_to_ocr_jobs
+
+Revision ID: 5e0b7c2d9a41
+Revises: a8d2e5f19c37
+Create Date: 2026-10-17 15:12:48.204517
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5e0b7c2d9a41"
+down_revision: Union[str, Sequence[str], None] = "a8d2e5f19c37"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - store job input, attempts and worker leases on ocr_jobs."""
+    op.add_column("ocr_jobs", sa.Column("payload", sa.JSON(), nullable=True))
+    op.add_column("ocr_jobs", sa.Column("owner", sa.String(length=255), nullable=True))
+    op.add_column("ocr_jobs", sa.Column("attempts", sa.Integer(), server_default="0", nullable=False))
+    op.add_column("ocr_jobs", sa.Column("max_attempts", sa.Integer(), server_default="3", nullable=False))
+    op.add_column(
+        "ocr_jobs",
+        sa.Column("available_at", sa.DateTime(), server_default=sa.text("CURRENT_TIMESTAMP"), nullable=False),
+    )
+    op.add_column("ocr_jobs", sa.Column("locked_by", sa.String(length=255), nullable=True))
+    op.add_column("ocr_jobs", sa.Column("locked_until", sa.DateTime(), nullable=True))
+    op.add_column("ocr_jobs", sa.Column("heartbeat_at", sa.DateTime(), nullable=True))
+    op.create_index("ix_ocr_jobs_status_available_at", "ocr_jobs", ["status", "available_at"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema - remove the job queue columns from ocr_jobs."""
+    op.drop_index("ix_ocr_jobs_status_available_at", table_name="ocr_jobs")
+    op.drop_column("ocr_jobs", "heartbeat_at")
+    op.drop_column("ocr_jobs", "locked_until")
+    op.drop_column("ocr_jobs", "locked_by")
+    op.drop_column("ocr_jobs", "available_at")
+    op.drop_column("ocr_jobs", "max_attempts")
+    op.drop_column("ocr_jobs", "attempts")
+    op.drop_column("ocr_jobs", "owner")
+    op.drop_column("ocr_jobs", "payload")
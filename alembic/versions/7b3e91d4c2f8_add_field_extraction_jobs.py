@@ -0,0 +1,42 @@
+"""add_field_extraction_jobs
+
+Revision ID: 7b3e91d4c2f8
+Revises: c41f8e2a7b90
+Create Date: 2026-10-17 17:55:03.418260
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7b3e91d4c2f8"
+down_revision: Union[str, Sequence[str], None] = "c41f8e2a7b90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+job_kind = sa.Enum("SCAN", "EXTRACT_FIELDS", name="jobkind")
+
+
+def upgrade() -> None:
+    """Upgrade schema - job kind and per-page field extraction progress on ocr_jobs."""
+    job_kind.create(op.get_bind(), checkfirst=True)
+    op.add_column("ocr_jobs", sa.Column("kind", job_kind, server_default="SCAN", nullable=False))
+    op.add_column("ocr_jobs", sa.Column("pages_total", sa.Integer(), nullable=True))
+    op.add_column("ocr_jobs", sa.Column("pages_done", sa.Integer(), nullable=True))
+    op.add_column("ocr_jobs", sa.Column("page_results", sa.JSON(), nullable=True))
+    op.add_column("ocr_jobs", sa.Column("result_fields", sa.JSON(), nullable=True))
+    op.add_column("ocr_jobs", sa.Column("field_sources", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema - remove field extraction jobs from ocr_jobs."""
+    op.drop_column("ocr_jobs", "field_sources")
+    op.drop_column("ocr_jobs", "result_fields")
+    op.drop_column("ocr_jobs", "page_results")
+    op.drop_column("ocr_jobs", "pages_done")
+    op.drop_column("ocr_jobs", "pages_total")
+    op.drop_column("ocr_jobs", "kind")
+    job_kind.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,34 @@
+"""add_scan_deduplication_to_ocr_jobs
+
+Revision ID: 9d4c27e1f6a3
+Revises: e2a6f0b83d15
+Create Date: 2026-10-17 20:21:37.540918
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9d4c27e1f6a3"
+down_revision: Union[str, Sequence[str], None] = "e2a6f0b83d15"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - content hash and idempotency key of scan jobs, each unique."""
+    op.add_column("ocr_jobs", sa.Column("content_hash", sa.String(length=64), nullable=True))
+    op.add_column("ocr_jobs", sa.Column("idempotency_key", sa.String(length=255), nullable=True))
+    op.create_index(op.f("ix_ocr_jobs_content_hash"), "ocr_jobs", ["content_hash"], unique=True)
+    op.create_index(op.f("ix_ocr_jobs_idempotency_key"), "ocr_jobs", ["idempotency_key"], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema - remove scan deduplication from ocr_jobs."""
+    op.drop_index(op.f("ix_ocr_jobs_idempotency_key"), table_name="ocr_jobs")
+    op.drop_index(op.f("ix_ocr_jobs_content_hash"), table_name="ocr_jobs")
+    op.drop_column("ocr_jobs", "idempotency_key")
+    op.drop_column("ocr_jobs", "content_hash")
@@ -0,0 +1,34 @@
+"""add_ocr_cache_entries_table
+
+Revision ID: a8d2e5f19c37
+Revises: 3c1f7a9e2b64
+Create Date: 2026-10-17 11:40:02.530114
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a8d2e5f19c37"
+down_revision: Union[str, Sequence[str], None] = "3c1f7a9e2b64"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - create the persistent OCR result cache table."""
+    op.create_table(
+        "ocr_cache_entries",
+        sa.Column("key", sa.String(length=64), nullable=False),
+        sa.Column("text", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.text("CURRENT_TIMESTAMP"), nullable=False),
+        sa.PrimaryKeyConstraint("key"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema - drop the OCR result cache table."""
+    op.drop_table("ocr_cache_entries")
@@ -0,0 +1,26 @@
+"""index_ocr_cache_entries_created_at
+
+Revision ID: c3a7f2d8e915
+Revises: 9d4c27e1f6a3
+Create Date: 2026-10-18 10:05:31.784120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c3a7f2d8e915"
+down_revision: Union[str, Sequence[str], None] = "9d4c27e1f6a3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - index OCR cache entries by age, for their expiry."""
+    op.create_index(op.f("ix_ocr_cache_entries_created_at"), "ocr_cache_entries", ["created_at"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema - drop the OCR cache entry age index."""
+    op.drop_index(op.f("ix_ocr_cache_entries_created_at"), table_name="ocr_cache_entries")
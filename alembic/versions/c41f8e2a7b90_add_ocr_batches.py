@@ -0,0 +1,60 @@
+"""add_ocr_batches
+
+Revision ID: c41f8e2a7b90
+Revises: 5e0b7c2d9a41
+Create Date: 2026-10-17 16:40:21.913072
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c41f8e2a7b90"
+down_revision: Union[str, Sequence[str], None] = "5e0b7c2d9a41"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - add ocr_batches and link scan jobs to their batch."""
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE jobstatus ADD VALUE IF NOT EXISTS 'CANCELLED'")
+
+    op.create_table(
+        "ocr_batches",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("batch_id", sa.String(length=255), nullable=False),
+        sa.Column("owner", sa.String(length=255), nullable=True),
+        sa.Column("total", sa.Integer(), nullable=False),
+        sa.Column("cancelled_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.text("CURRENT_TIMESTAMP"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.text("CURRENT_TIMESTAMP"), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_ocr_batches_batch_id"), "ocr_batches", ["batch_id"], unique=True)
+    op.create_index(op.f("ix_ocr_batches_id"), "ocr_batches", ["id"], unique=False)
+
+    with op.batch_alter_table("ocr_jobs") as batch_op:
+        batch_op.add_column(sa.Column("batch_id", sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column("position", sa.Integer(), nullable=True))
+        batch_op.create_foreign_key(
+            "fk_ocr_jobs_batch_id_ocr_batches", "ocr_batches", ["batch_id"], ["id"], ondelete="CASCADE"
+        )
+        batch_op.create_index(op.f("ix_ocr_jobs_batch_id"), ["batch_id"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema - remove ocr_batches (the CANCELLED job status value is kept)."""
+    with op.batch_alter_table("ocr_jobs") as batch_op:
+        batch_op.drop_index(op.f("ix_ocr_jobs_batch_id"))
+        batch_op.drop_constraint("fk_ocr_jobs_batch_id_ocr_batches", type_="foreignkey")
+        batch_op.drop_column("position")
+        batch_op.drop_column("batch_id")
+
+    op.drop_index(op.f("ix_ocr_batches_id"), table_name="ocr_batches")
+    op.drop_index(op.f("ix_ocr_batches_batch_id"), table_name="ocr_batches")
+    op.drop_table("ocr_batches")
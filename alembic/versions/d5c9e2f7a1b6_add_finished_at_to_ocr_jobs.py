@@ -0,0 +1,28 @@
+"""add_finished_at_to_ocr_jobs
+
+Revision ID: d5c9e2f7a1b6
+Revises: f1d6a3b9c458
+Create Date: 2026-10-18 14:03:17.482913
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d5c9e2f7a1b6"
+down_revision: Union[str, Sequence[str], None] = "f1d6a3b9c458"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - end time of OCR job attempts, for the measured service time."""
+    op.add_column("ocr_jobs", sa.Column("finished_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema - remove finished_at from ocr_jobs."""
+    op.drop_column("ocr_jobs", "finished_at")
@@ -0,0 +1,30 @@
+"""add_ocr_job_retention_indexes
+
+Revision ID: e2a6f0b83d15
+Revises: 7b3e91d4c2f8
+Create Date: 2026-10-17 19:08:44.726391
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e2a6f0b83d15"
+down_revision: Union[str, Sequence[str], None] = "7b3e91d4c2f8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - indexes for expired leases, listing by status and retention."""
+    op.create_index("ix_ocr_jobs_status_locked_until", "ocr_jobs", ["status", "locked_until"], unique=False)
+    op.create_index("ix_ocr_jobs_status_id", "ocr_jobs", ["status", "id"], unique=False)
+    op.create_index("ix_ocr_jobs_status_updated_at", "ocr_jobs", ["status", "updated_at"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema - remove the ocr_jobs status indexes."""
+    op.drop_index("ix_ocr_jobs_status_updated_at", table_name="ocr_jobs")
+    op.drop_index("ix_ocr_jobs_status_id", table_name="ocr_jobs")
+    op.drop_index("ix_ocr_jobs_status_locked_until", table_name="ocr_jobs")
@@ -0,0 +1,29 @@
+"""add_request_hash_to_ocr_jobs
+
+Revision ID: e8b4c1a6d273
+Revises: c3a7f2d8e915
+Create Date: 2026-10-18 10:41:12.093857
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e8b4c1a6d273"
+down_revision: Union[str, Sequence[str], None] = "c3a7f2d8e915"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - request hash of scan jobs, kept when their content hash is released."""
+    op.add_column("ocr_jobs", sa.Column("request_hash", sa.String(length=64), nullable=True))
+    op.execute("UPDATE ocr_jobs SET request_hash = content_hash")
+
+
+def downgrade() -> None:
+    """Downgrade schema - remove request_hash from ocr_jobs."""
+    op.drop_column("ocr_jobs", "request_hash")
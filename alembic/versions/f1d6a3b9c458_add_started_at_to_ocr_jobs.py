@@ -0,0 +1,28 @@
+"""add_started_at_to_ocr_jobs
+
+Revision ID: f1d6a3b9c458
+Revises: e8b4c1a6d273
+Create Date: 2026-10-18 11:26:50.618342
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f1d6a3b9c458"
+down_revision: Union[str, Sequence[str], None] = "e8b4c1a6d273"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - claim time of OCR jobs, for the measured service time."""
+    op.add_column("ocr_jobs", sa.Column("started_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema - remove started_at from ocr_jobs."""
+    op.drop_column("ocr_jobs", "started_at")
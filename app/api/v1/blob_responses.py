@@ -0,0 +1,156 @@
+"""HTTP responses of blob store content: ETags, byte ranges, cache headers and renditions."""
+from typing import Dict, Optional, Tuple
+
+from fastapi import BackgroundTasks, HTTPException, Request, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.services.image_processing.renditions import RENDITION_CONTENT_TYPE, RENDITIONS, RenditionService, can_render
+from app.services.storage.blob_store import BlobStore
+
+# A page under a hash-pinned URL never changes
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+# Other page URLs change when the document is uploaded again; caches revalidate by ETag
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+# Seconds after which to ask again for a rendition that is being generated
+RENDITION_RETRY_AFTER = 2
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header matches an ETag (weak comparison)."""
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def byte_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Start and end (exclusive) of a single ``bytes=`` range.
+
+    Other units, multiple ranges and malformed headers are ignored (None),
+    which means sending the whole content.
+
+    Raises:
+        HTTPException: 416 if the range starts beyond the content
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = spec.strip().partition("-")
+    if not dash:
+        return None
+    try:
+        if first:
+            start = int(first)
+            end = int(last) + 1 if last else size
+            if last and end <= start:
+                return None
+        else:
+            suffix = int(last)
+            start, end = (max(0, size - suffix), size) if suffix > 0 else (size, size)
+    except ValueError:
+        return None
+    if start >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, min(end, size)
+
+
+def cache_headers(etag: str, pinned: bool) -> Dict[str, str]:
+    """Validator and caching headers; ``pinned`` URLs name the content hash and never change."""
+    return {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL if pinned else REVALIDATE_CACHE_CONTROL}
+
+
+def not_modified(request: Request, etag: str) -> bool:
+    """Whether the client's cached copy (If-None-Match) is current."""
+    if_none_match = request.headers.get("if-none-match")
+    return bool(if_none_match) and etag_matches(if_none_match, etag)
+
+
+def blob_response(
+    request: Request, store: BlobStore, digest: str, size: int, content_type: str, pinned: bool
+) -> Response:
+    """
+    A blob, streamed from the store.
+
+    The ETag is the content hash: If-None-Match is answered with 304, and a
+    single byte range (Range, optionally with If-Range) with 206.
+    """
+    etag = f'"{digest}"'
+    headers = {**cache_headers(etag, pinned), "Accept-Ranges": "bytes"}
+    if not_modified(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    range_header = request.headers.get("range")
+    # If-Range with another validator asks for the whole (changed) content
+    if range_header and request.headers.get("if-range", etag) == etag:
+        requested = byte_range(range_header, size)
+    else:
+        requested = None
+
+    if requested is None:
+        return StreamingResponse(
+            store.stream(digest), media_type=content_type, headers={**headers, "Content-Length": str(size)}
+        )
+
+    start, end = requested
+    return StreamingResponse(
+        store.stream(digest, start=start, end=end),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=content_type,
+        headers={**headers, "Content-Length": str(end - start), "Content-Range": f"bytes {start}-{end - 1}/{size}"},
+    )
+
+
+async def rendition_response(
+    request: Request,
+    store: BlobStore,
+    background_tasks: BackgroundTasks,
+    digest: str,
+    content_type: str,
+    name: str,
+    pinned: bool,
+) -> Response:
+    """
+    A preview rendition of a page in the blob store.
+
+    Renditions are made after upload; one that does not exist yet (pages
+    stored before renditions, or generation still running) is scheduled and
+    answered with 404 and Retry-After.
+    """
+    if name not in RENDITIONS:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown rendition")
+    if not can_render(content_type):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No preview for this page type")
+
+    etag = f'"{digest}-{name}"'
+    headers = cache_headers(etag, pinned)
+    if not_modified(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    size = await store.size(digest, variant=name)
+    if size is None:
+        background_tasks.add_task(
+            RenditionService(store).generate_in_background, [{"hash": digest, "content_type": content_type}]
+        )
+        # Returned rather than raised, so the background task runs
+        return JSONResponse(
+            {"detail": "Rendition is being generated"},
+            status_code=status.HTTP_404_NOT_FOUND,
+            headers={"Retry-After": str(RENDITION_RETRY_AFTER)},
+        )
+
+    return StreamingResponse(
+        store.stream(digest, variant=name),
+        media_type=RENDITION_CONTENT_TYPE,
+        headers={**headers, "Content-Length": str(size)},
+    )
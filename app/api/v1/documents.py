@@ -1,28 +1,63 @@
 """Document API endpoints."""
-import base64
-from typing import Dict, List
+import logging
+import tempfile
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.v1.blob_responses import blob_response, rendition_response
+from app.core.config import get_settings
 from app.core.database import get_db
 from app.middleware.auth import verify_token
 from app.models.document import Document
 from app.repositories.document_repository import DocumentRepository
 from app.repositories.file_repository import FileRepository
 from app.repositories.form_repository import FormRepository
-from app.schemas.document import DocumentCreate, DocumentResponse
+from app.schemas.document import DocumentPageInfo, DocumentResponse, DocumentSummary
+from app.services.image_processing.renditions import RenditionService
+from app.services.storage.blob_store import BlobStore, LocalBlobStore, get_blob_store, get_originals_store
+from app.services.storage.ingest import PageIngest
+from app.services.storage.pages import decode_page_text, is_page_ref, page_infos
+from app.services.storage.uploads import DocumentUploadParser, MalformedUploadError, UploadTooLargeError
 
+logger = logging.getLogger(__name__)
 router = APIRouter(tags=["Documents"])
+settings = get_settings()
 
 
-@router.get("/files/{file_id}/documents", response_model=List[DocumentResponse])
+def _document_summary(document: Document) -> DocumentSummary:
+    """Listing entry of a document, built from its page references."""
+    pages = [DocumentPageInfo(**info) for info in page_infos(document.original_file)]
+    return DocumentSummary(
+        id=document.id,
+        file_id=document.file_id,
+        form_id=document.form_id,
+        form_name=document.form.name if document.form else None,
+        name=document.name,
+        page_count=len(pages),
+        total_size=sum(page.size or 0 for page in pages),
+        bytes_saved=sum(page.original_size - page.size for page in pages if page.original_size and page.size),
+        pages=pages,
+        params=document.params,
+        created_at=document.created_at,
+        updated_at=document.updated_at,
+    )
+
+
+@router.get("/files/{file_id}/documents", response_model=List[DocumentSummary])
 async def get_documents(
     file_id: int,
     db: AsyncSession = Depends(get_db),
     # token: dict = Depends(verify_token),  # Temporarily disabled
 ):
-    """Get all documents for a file."""
+    """
+    Get all documents for a file.
+
+    Documents are listed with page metadata only; get a page itself from
+    /files/{file_id}/documents/{document_id}/pages/{page}.
+    """
     # Verify file exists
     file_repo = FileRepository(db)
     file = await file_repo.get_by_id(file_id)
@@ -31,7 +66,24 @@ async def get_documents(
 
     repo = DocumentRepository(db)
     documents = await repo.get_by_file_id(file_id)
-    return documents
+    return [_document_summary(document) for document in documents]
+
+
+@router.get("/files/{file_id}/documents/{document_id}", response_model=DocumentResponse)
+async def get_document(
+    file_id: int,
+    document_id: int,
+    db: AsyncSession = Depends(get_db),
+    # token: dict = Depends(verify_token),  # Temporarily disabled
+):
+    """Get one document with its page references."""
+    repo = DocumentRepository(db)
+    document = await repo.get_by_id(document_id)
+
+    if not document or document.file_id != file_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
+
+    return document
 
 
 @router.post(
@@ -43,7 +95,10 @@ async def upload_document(
     file_id: int,
     form_id: int,
     request: Request,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
+    store: BlobStore = Depends(get_blob_store),
+    originals_store: Optional[BlobStore] = Depends(get_originals_store),
     # token: dict = Depends(verify_token),  # Temporarily disabled
 ):
     """
@@ -52,6 +107,18 @@ async def upload_document(
     The request should be multipart/form-data with:
     - page_count: Number of pages in the document
     - 1, 2, 3, etc.: File uploads for each page (keys are page numbers)
+
+    Pages are kept in the blob store; the document records each page's hash,
+    size and content type. Get the page itself from
+    /files/{file_id}/documents/{document_id}/pages/{page}.
+
+    Page images are normalised (downscaled, rotated per EXIF, re-encoded; see
+    app/services/storage/ingest.py) before they are stored.
+
+    Page files are written to storage as they are received. Pages over
+    DOCUMENT_MAX_PAGE_BYTES and requests over DOCUMENT_MAX_UPLOAD_BYTES are
+    rejected with 413. Preview renditions of the pages are generated after
+    the response is sent.
     """
     # Verify file exists
     file_repo = FileRepository(db)
@@ -65,41 +132,52 @@ async def upload_document(
     if not form:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Form not found")
 
-    # Parse multipart form data
-    form_data = await request.form()
-
-    # Get page_count
-    page_count_str = form_data.get("page_count")
-    if not page_count_str:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="page_count is required")
+    ingest = PageIngest(store, originals_store)
+    with tempfile.TemporaryDirectory(prefix="inuka-upload-") if ingest.stages else nullcontext() as staging_dir:
+        # Stream the body; pages go to the staging store (or straight to the blob store) as they arrive
+        staging = LocalBlobStore(staging_dir) if staging_dir else store
+        parser = DocumentUploadParser(
+            staging,
+            request.headers,
+            max_page_bytes=settings.DOCUMENT_MAX_PAGE_BYTES,
+            max_upload_bytes=settings.DOCUMENT_MAX_UPLOAD_BYTES,
+        )
+        try:
+            upload = await parser.parse(request.stream())
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+        except MalformedUploadError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-    try:
-        page_count = int(page_count_str)
-    except ValueError:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="page_count must be a valid integer")
+        # Get page_count
+        page_count_str = upload.fields.get("page_count")
+        if not page_count_str:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="page_count is required")
 
-    if page_count < 1:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="page_count must be at least 1")
+        try:
+            page_count = int(page_count_str)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="page_count must be a valid integer")
 
-    # Collect page files
-    original_file: Dict[str, str] = {}
+        if page_count < 1:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="page_count must be at least 1")
 
-    for page_num in range(1, page_count + 1):
-        page_key = str(page_num)
-        page_file = form_data.get(page_key)
+        original_file: Dict[str, Dict[str, Any]] = {}
+        for page_num in range(1, page_count + 1):
+            page_key = str(page_num)
+            if page_key not in upload.pages:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Page {page_num} file is missing")
+            page = upload.pages[page_key]
+            original_file[page_key] = await ingest.ingest(staging, page) if ingest.stages else page
 
-        if not page_file:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Page {page_num} file is missing")
+    if ingest.stages:
+        report = ingest.report
+        logger.info(
+            f"Ingested {report.pages} pages for file {file_id}, form {form_id}: "
+            f"{report.bytes_in} -> {report.bytes_out} bytes ({report.bytes_saved} saved)"
+        )
 
-        # Read and encode the page file
-        if hasattr(page_file, "read"):
-            # It's a file upload
-            page_bytes = await page_file.read()
-            page_base64 = base64.b64encode(page_bytes).decode("utf-8")
-            original_file[page_key] = page_base64
-        else:
-            # It's text data (could be base64 or other format)
-            original_file[page_key] = str(page_file)
+    background_tasks.add_task(RenditionService(store).generate_in_background, list(original_file.values()))
 
     # Check if document already exists
     doc_repo = DocumentRepository(db)
@@ -134,3 +212,85 @@ async def delete_document(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
 
     await repo.delete(document_id)
+
+
+@router.get("/files/{file_id}/documents/{document_id}/pages/{page}")
+async def get_document_page(
+    file_id: int,
+    document_id: int,
+    page: str,
+    request: Request,
+    content_hash: Optional[str] = Query(None, alias="hash", description="Expected page hash, for a cacheable URL"),
+    db: AsyncSession = Depends(get_db),
+    store: BlobStore = Depends(get_blob_store),
+    # token: dict = Depends(verify_token),  # Temporarily disabled
+):
+    """
+    Get one uploaded page of a document, streamed from the blob store.
+
+    The ETag is the page's content hash: If-None-Match is answered with 304,
+    and a single byte range (Range, optionally with If-Range) with 206.
+    Passing the page's hash from the document listing as ``hash`` makes the
+    URL immutable, and it is served to be cached for a year; a hash that is no
+    longer the page's gets 404. Without it, caches revalidate on every use.
+    """
+    repo = DocumentRepository(db)
+    document = await repo.get_by_id(document_id)
+
+    if not document or document.file_id != file_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
+
+    ref = (document.original_file or {}).get(page)
+    if ref is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Page not found")
+
+    if not is_page_ref(ref):
+        # Not migrated to the blob store yet
+        page_bytes, content_type = decode_page_text(ref)
+        return Response(content=page_bytes, media_type=content_type)
+
+    if content_hash is not None and content_hash != ref["hash"]:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Page has changed")
+
+    if not await store.exists(ref["hash"]):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Page content not found")
+
+    return blob_response(request, store, ref["hash"], ref["size"], ref["content_type"], pinned=content_hash is not None)
+
+
+@router.get("/files/{file_id}/documents/{document_id}/pages/{page}/renditions/{name}")
+async def get_document_page_rendition(
+    file_id: int,
+    document_id: int,
+    page: str,
+    name: str,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    content_hash: Optional[str] = Query(None, alias="hash", description="Expected page hash, for a cacheable URL"),
+    db: AsyncSession = Depends(get_db),
+    store: BlobStore = Depends(get_blob_store),
+    # token: dict = Depends(verify_token),  # Temporarily disabled
+):
+    """
+    Get a downscaled JPEG preview of a page: ``thumb``, ``small`` or ``large``.
+
+    Caching works as for the page itself (ETag, ``hash`` for an immutable
+    URL). A rendition still being generated gets 404 with Retry-After.
+    """
+    repo = DocumentRepository(db)
+    document = await repo.get_by_id(document_id)
+
+    if not document or document.file_id != file_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
+
+    ref = (document.original_file or {}).get(page)
+    if ref is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Page not found")
+    if not is_page_ref(ref):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Page is not in the blob store yet")
+    if content_hash is not None and content_hash != ref["hash"]:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Page has changed")
+
+    return await rendition_response(
+        request, store, background_tasks, ref["hash"], ref["content_type"], name, pinned=content_hash is not None
+    )
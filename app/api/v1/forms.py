@@ -1,15 +1,21 @@
 """Form API endpoints."""
-from typing import List
+import base64
+import binascii
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.v1.blob_responses import blob_response, rendition_response
 from app.core.database import get_db
 from app.middleware.auth import verify_token
 from app.models.form import Form as FormModel
 from app.repositories.form_repository import FormRepository
 from app.repositories.template_repository import TemplateRepository
 from app.schemas.form import FormCreate, FormResponse, FormUpdate
+from app.services.image_processing.renditions import RenditionService
+from app.services.storage.blob_store import BlobStore, get_blob_store
+from app.services.storage.pages import store_template_image, store_template_images, template_page
 
 router = APIRouter(tags=["Forms"])
 
@@ -40,7 +46,9 @@ async def get_forms(
 async def create_form(
     template_id: int,
     form_data: FormCreate,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
+    store: BlobStore = Depends(get_blob_store),
     # token: dict = Depends(verify_token),  # Temporarily disabled
 ):
     """Create a form with template data and parameters.
@@ -79,8 +87,16 @@ async def create_form(
                     "page": 1
                 }
             ]
+        },
+        "ocrConfig": {
+            "mode": "page"
         }
     }
+
+    Page images are put into the blob store: each ``template.data`` entry
+    keeps the ``hash`` of its image instead of ``binary``, and the image is
+    served by ``/pages/{page}/image``. Preview renditions of them are
+    generated after the response is sent.
     """
     # Verify template exists
     template_repo = TemplateRepository(db)
@@ -88,6 +104,9 @@ async def create_form(
     if not template:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Template not found")
 
+    form_template, images = await store_template_images(store, form_data.template)
+    background_tasks.add_task(RenditionService(store).generate_in_background, images)
+
     # Create form with template structure and page params
     repo = FormRepository(db)
     form = FormModel(
@@ -95,8 +114,9 @@ async def create_form(
         name=form_data.name,
         form_type=form_data.form_type.value,
         description=form_data.description,
-        template=form_data.template,
+        template=form_template,
         all_page_params=form_data.all_page_params,
+        ocr_config=form_data.ocr_config,
     )
     form = await repo.create(form)
     return form
@@ -124,7 +144,9 @@ async def update_form(
     template_id: int,
     form_id: int,
     form_data: FormUpdate,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
+    store: BlobStore = Depends(get_blob_store),
     # token: dict = Depends(verify_token),  # Temporarily disabled
 ):
     """Update a form."""
@@ -139,6 +161,10 @@ async def update_form(
     if "form_type" in update_data and update_data["form_type"] is not None:
         update_data["form_type"] = update_data["form_type"].value
 
+    if "template" in update_data:
+        update_data["template"], images = await store_template_images(store, update_data["template"])
+        background_tasks.add_task(RenditionService(store).generate_in_background, images)
+
     form = await repo.update(form_id, **update_data)
     return form
 
@@ -158,3 +184,99 @@ async def delete_form(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Form not found")
 
     await repo.delete(form_id)
+
+
+async def _form_page(db: AsyncSession, template_id: int, form_id: int, page: int) -> Dict[str, Any]:
+    """The ``template.data`` entry of a form page; 404 if the form or page does not exist."""
+    repo = FormRepository(db)
+    form = await repo.get_by_id(form_id)
+
+    if not form or form.template_id != template_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Form not found")
+
+    entry = template_page(form.template, page)
+    if entry is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Page not found")
+    return entry
+
+
+@router.get("/templates/{template_id}/forms/{form_id}/pages/{page}/image")
+async def get_form_page_image(
+    template_id: int,
+    form_id: int,
+    page: int,
+    request: Request,
+    content_hash: Optional[str] = Query(None, alias="hash", description="Expected image hash, for a cacheable URL"),
+    db: AsyncSession = Depends(get_db),
+    store: BlobStore = Depends(get_blob_store),
+    # token: dict = Depends(verify_token),  # Temporarily disabled
+):
+    """
+    Get the image of a form template page, streamed from the blob store.
+
+    Caching works as for document pages (ETag, Range, ``hash`` from
+    ``template.data`` for an immutable URL).
+    """
+    entry = await _form_page(db, template_id, form_id, page)
+
+    if not entry.get("hash"):
+        # Forms saved before page images went to the blob store keep them inline
+        try:
+            data = base64.b64decode(entry.get("binary") or "", validate=True)
+        except (binascii.Error, ValueError):
+            data = b""
+        if not data:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Page has no image")
+        return Response(content=data, media_type=entry.get("type") or "application/octet-stream")
+
+    if content_hash is not None and content_hash != entry["hash"]:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Page has changed")
+
+    size = await store.size(entry["hash"])
+    if size is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Page image not found")
+
+    return blob_response(
+        request,
+        store,
+        entry["hash"],
+        size,
+        entry.get("type") or "application/octet-stream",
+        pinned=content_hash is not None,
+    )
+
+
+@router.get("/templates/{template_id}/forms/{form_id}/pages/{page}/renditions/{name}")
+async def get_form_page_rendition(
+    template_id: int,
+    form_id: int,
+    page: int,
+    name: str,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    content_hash: Optional[str] = Query(None, alias="hash", description="Expected image hash, for a cacheable URL"),
+    db: AsyncSession = Depends(get_db),
+    store: BlobStore = Depends(get_blob_store),
+    # token: dict = Depends(verify_token),  # Temporarily disabled
+):
+    """
+    Get a downscaled JPEG preview of a form template page image: ``thumb``, ``small`` or ``large``.
+
+    Pass the page's ``hash`` (from ``template.data``) for an immutable,
+    cacheable URL. A rendition still being generated gets 404 with Retry-After.
+    """
+    entry = await _form_page(db, template_id, form_id, page)
+
+    if entry.get("hash") and entry.get("type"):
+        image = {"hash": entry["hash"], "content_type": entry["type"]}
+    else:
+        # Forms saved before page images went to the blob store carry no hash
+        image = await store_template_image(store, dict(entry))
+    if image is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Page has no image")
+    if content_hash is not None and content_hash != image["hash"]:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Page has changed")
+
+    return await rendition_response(
+        request, store, background_tasks, image["hash"], image["content_type"], name, pinned=content_hash is not None
+    )
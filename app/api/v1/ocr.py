@@ -1,73 +1,214 @@
 """OCR API endpoints."""
 import asyncio
 import base64
+import json
 import logging
 import uuid
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, Form, Header, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import AsyncSessionLocal, get_db
+from app.core.config import get_settings
+from app.core.database import get_db
 from app.middleware.auth import verify_token
-from app.models.ocr import JobStatus, OCRJob
+from app.models.ocr import ExtractionMode, JobKind, JobStatus, OCRBatch, OCRJob
 from app.repositories.document_repository import DocumentRepository
 from app.repositories.form_repository import FormRepository
-from app.repositories.ocr_repository import OCRRepository
-from app.schemas.ocr import OCRExtractFieldsRequest, OCRExtractFieldsResponse, OCRJobResponse, OCRScanRequest
+from app.repositories.ocr_batch_repository import OCRBatchRepository
+from app.repositories.ocr_repository import FINISHED_STATUSES, OCRRepository, utcnow
+from app.schemas.ocr import (
+    OCRBatchRequest,
+    OCRBatchResponse,
+    OCRExtractFieldsRequest,
+    OCRExtractFieldsResponse,
+    OCRJobListResponse,
+    OCRJobResponse,
+    OCRJobSummary,
+    OCRScanRequest,
+    OCRStatsResponse,
+)
+from app.services.ocr.admission import AdmissionTicket, QueueFullError
+from app.services.ocr.cache import content_digest
+from app.services.ocr.cancellation import ClientDisconnectedError, cancel_on_disconnect
+from app.services.ocr.events import TERMINAL_STATUSES
+from app.services.ocr.events import broker as job_events
+from app.services.ocr.events import job_event, notify_job_event
+from app.services.ocr.profiles import validate_profile_overrides
+from app.services.ocr.scheduler import Lane, work_context
 from app.services.ocr.service import OCRService
 
 router = APIRouter(prefix="/ocr", tags=["OCR"])
 ocr_service = OCRService()
 logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Largest page of GET /jobs
+MAX_JOB_LIST_LIMIT = 200
+
+# Bytes read from an uploaded file at a time
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+# Non-standard status (nginx) logged for requests whose client went away before the response
+HTTP_499_CLIENT_CLOSED_REQUEST = 499
+
+
+def _queue_full(error: QueueFullError) -> HTTPException:
+    """503 telling the client when to retry."""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+
+def _client_owner(http_request: Request) -> str:
+    """Fair-share owner for requests that are not tied to a form."""
+    return f"client:{http_request.client.host if http_request.client else 'unknown'}"
+
+
+def _reserve_ocr_slot() -> AdmissionTicket:
+    """Take a place in the shared OCR queue, or reject the request with 503 if it is full."""
+    try:
+        return ocr_service.admission.reserve()
+    except QueueFullError as e:
+        logger.warning(f"Rejecting OCR request: {str(e)}")
+        raise _queue_full(e)
+
+
+async def _check_job_capacity(repo: OCRRepository, incoming: int) -> None:
+    """Refuse new jobs with 503 while the workers are too far behind."""
+    load = await repo.queue_load()
+    try:
+        ocr_service.admission.admit_jobs(
+            incoming, load.pending, load.running, load.service_seconds, settings.OCR_JOB_MAX_PENDING
+        )
+    except QueueFullError as e:
+        logger.warning(f"Rejecting {incoming} OCR jobs: {str(e)}")
+        raise _queue_full(e)
+
+
+def _new_job(image_base64: Optional[str], language: Optional[str], owner: str) -> OCRJob:
+    """A pending scan job for the workers."""
+    return OCRJob(
+        job_id=str(uuid.uuid4()),
+        status=JobStatus.PENDING,
+        payload={"image_base64": image_base64, "language": language},
+        owner=owner,
+        max_attempts=settings.OCR_JOB_MAX_ATTEMPTS,
+        available_at=utcnow(),
+    )
+
+
+def _scan_content_hash(request: OCRScanRequest) -> Optional[str]:
+    """Hash of the decoded image and language; None if there is no decodable image to dedupe on."""
+    if not request.image_base64:
+        return None
+    try:
+        image_data = base64.b64decode(request.image_base64)
+    except ValueError:
+        return None  # Left to the worker, which fails the job
+    return content_digest(image_data, request.language or settings.OCR_LANGUAGES)
+
+
+async def _find_scan_duplicate(
+    repo: OCRRepository, idempotency_key: Optional[str], content_hash: Optional[str]
+) -> Optional[OCRJob]:
+    """The job a scan submission repeats, if any."""
+    if idempotency_key:
+        job = await repo.get_by_idempotency_key(idempotency_key)
+        if job is not None:
+            if job.request_hash != content_hash:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Idempotency-Key was already used for a different request",
+                )
+            return job
+    if content_hash:
+        job = await repo.get_by_content_hash(content_hash)
+        if job is not None:
+            if job.status in (JobStatus.FAILED, JobStatus.CANCELLED):
+                # Run it again rather than hand back the failure
+                await repo.release_content_hash(job)
+                return None
+            return job
+    return None
 
 
 @router.post("/scan", response_model=OCRJobResponse)
 async def process_image(
     request: OCRScanRequest,
-    background_tasks: BackgroundTasks,
+    http_request: Request,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     db: AsyncSession = Depends(get_db),
     # token: dict = Depends(verify_token),  # Temporarily disabled
 ):
-    """Submit an image for OCR processing."""
+    """
+    Submit an image for OCR processing.
+
+    The job is queued in the database and run by an OCR worker process
+    (``python -m app.worker``); poll /jobs/{job_id} for the result.
+
+    Submissions are deduplicated: a request with the Idempotency-Key of an earlier
+    one, or with the same image and language as a pending, running or completed
+    job, returns that job instead of queueing another.
+    """
     repo = OCRRepository(db)
+    content_hash = _scan_content_hash(request)
+    job = await _find_scan_duplicate(repo, idempotency_key, content_hash)
+    if job is not None:
+        logger.info(f"Scan request matches OCR job {job.job_id}")
+        return job
 
-    # Create OCR job
-    job_id = str(uuid.uuid4())
-    job = OCRJob(job_id=job_id, status=JobStatus.PENDING)
-    job = await repo.create(job)
+    await _check_job_capacity(repo, 1)
 
-    # Add OCR processing to background tasks
-    background_tasks.add_task(process_ocr_task, job_id, request)
+    job = _new_job(request.image_base64, request.language, _client_owner(http_request))
+    job.content_hash = content_hash
+    job.request_hash = content_hash
+    job.idempotency_key = idempotency_key
+    created = await repo.create_unique(job)
+    if created is None:
+        # An identical request was queued concurrently
+        created = await _find_scan_duplicate(repo, idempotency_key, content_hash)
+        if created is None:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A matching request is being submitted")
+        return created
+    logger.info(f"Queued OCR job {created.job_id}")
 
-    return job
+    return created
 
 
-async def process_ocr_task(job_id: str, request: OCRScanRequest):
-    """Background task to process OCR."""
-    # Create a new database session for this background task
-    async with AsyncSessionLocal() as db:
-        repo = OCRRepository(db)
+def _encode_cursor(job: OCRJob) -> str:
+    return base64.urlsafe_b64encode(str(job.id).encode()).decode("ascii")
 
-        try:
-            logger.info(f"Starting OCR processing for job {job_id}")
 
-            # Update status to processing
-            await repo.update_status(job_id, JobStatus.PROCESSING)
+def _decode_cursor(cursor: str) -> int:
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
 
-            # Extract text
-            if request.image_base64:
-                result_text = await ocr_service.extract_text_from_base64(request.image_base64, request.language)
-            else:
-                raise ValueError("Either image_base64 or image_url required")
 
-            # Update job with result
-            await repo.update_status(job_id, JobStatus.COMPLETED, result_text=result_text)
-            logger.info(f"OCR processing completed for job {job_id}")
+@router.get("/jobs", response_model=OCRJobListResponse)
+async def list_ocr_jobs(
+    status_filter: Optional[JobStatus] = Query(None, alias="status"),
+    limit: int = Query(50, ge=1, le=MAX_JOB_LIST_LIMIT),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    # token: dict = Depends(verify_token),  # Temporarily disabled
+):
+    """
+    List OCR jobs newest first, optionally only those with a given status.
 
-        except Exception as e:
-            logger.error(f"OCR processing failed for job {job_id}: {str(e)}")
-            # Update job with error
-            await repo.update_status(job_id, JobStatus.FAILED, error_message=str(e))
+    Results are paged: pass the returned next_cursor as cursor to get the next
+    page. Items carry the job's state only; get /jobs/{job_id} for its results.
+    """
+    repo = OCRRepository(db)
+    before = _decode_cursor(cursor) if cursor else None
+    jobs = await repo.list_jobs(status_filter, limit, before)
+    next_cursor = _encode_cursor(jobs[-1]) if len(jobs) == limit else None
+    return OCRJobListResponse(jobs=[OCRJobSummary.model_validate(job) for job in jobs], next_cursor=next_cursor)
 
 
 @router.get("/jobs/{job_id}", response_model=OCRJobResponse)
@@ -86,28 +227,246 @@ async def get_ocr_job_status(
     return job
 
 
-@router.post("/extract-fields", response_model=OCRExtractFieldsResponse)
-async def extract_fields(
-    request: OCRExtractFieldsRequest,
+def _sse_message(data: dict) -> str:
+    return f"event: status\ndata: {json.dumps(data)}\n\n"
+
+
+async def _job_event_stream(db: AsyncSession, job: OCRJob) -> AsyncIterator[str]:
+    """Current state of the job, then every change until it completes or fails."""
+    with job_events.subscribe(job.job_id) as queue:
+        # Re-read after subscribing so no change between the two is missed
+        await db.refresh(job)
+        # End the read transaction so the stream does not hold a connection while it waits
+        await db.commit()
+        event = job_event(job)
+        while event["status"] not in TERMINAL_STATUSES:
+            yield _sse_message(event)
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=settings.OCR_EVENTS_KEEPALIVE_SECONDS)
+                    break
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+
+    # Events carry no result; read the finished job once
+    await db.refresh(job)
+    await db.commit()
+    yield _sse_message(OCRJobResponse.model_validate(job).model_dump(mode="json"))
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_ocr_job_status(
+    job_id: str,
     db: AsyncSession = Depends(get_db),
     # token: dict = Depends(verify_token),  # Temporarily disabled
 ):
     """
-    Extract text from specific regions of an image/PDF based on field definitions.
+    Stream OCR job status as Server-Sent Events.
 
-    The field definitions can be provided directly via page_params/all_page_params,
-    or loaded from a form by providing form_id.
+    Sends the current state, then each change (pending, processing, retries) as it
+    happens, and finally the completed or failed job with its result; the stream then
+    ends. Use this instead of polling /jobs/{job_id}.
+    """
+    repo = OCRRepository(db)
+    job = await repo.get_by_job_id(job_id)
 
-    Each field definition should include:
-    - id: The field identifier (maps to XML export field)
-    - x1, y1, x2, y2: Bounding box coordinates
-    - type: Optional field type (string, date, etc.)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
 
-    If document_id is provided, the extracted fields will be saved to that document's params.
+    return StreamingResponse(
+        _job_event_stream(db, job),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _batch_status(batch: OCRBatch, counts: Dict[str, int]) -> str:
+    """Overall status of a batch from the statuses of its jobs."""
+    if batch.cancelled_at is not None:
+        return JobStatus.CANCELLED.value
+    finished = sum(counts.get(job_status.value, 0) for job_status in FINISHED_STATUSES)
+    if finished == batch.total:
+        return JobStatus.FAILED.value if counts.get(JobStatus.FAILED.value) else JobStatus.COMPLETED.value
+    if counts.get(JobStatus.PENDING.value, 0) == batch.total:
+        return JobStatus.PENDING.value
+    return JobStatus.PROCESSING.value
+
+
+async def _batch_response(repo: OCRBatchRepository, batch: OCRBatch, include_results: bool) -> OCRBatchResponse:
+    """Aggregate progress of a batch, optionally with every job and the combined text."""
+    counts = await repo.status_counts(batch)
+    finished = sum(counts.get(job_status.value, 0) for job_status in FINISHED_STATUSES)
+    response = OCRBatchResponse(
+        batch_id=batch.batch_id,
+        status=_batch_status(batch, counts),
+        total=batch.total,
+        counts=counts,
+        progress=round(finished / batch.total, 4) if batch.total else 1.0,
+        created_at=batch.created_at,
+        cancelled_at=batch.cancelled_at,
+    )
+    if include_results:
+        jobs = await repo.get_jobs(batch)
+        response.jobs = [OCRJobResponse.model_validate(job) for job in jobs]
+        response.combined_text = "\n\n".join(
+            f"--- Image {job.position + 1} ---\n{job.result_text.strip()}"
+            for job in jobs
+            if job.status == JobStatus.COMPLETED and job.result_text and job.result_text.strip()
+        )
+    return response
+
+
+async def _create_batch(
+    db: AsyncSession, images_base64: List[str], language: Optional[str], owner: str
+) -> OCRBatchResponse:
+    """Queue one job per image under a new batch."""
+    if not images_base64:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No images provided")
+    if len(images_base64) > settings.OCR_BATCH_MAX_IMAGES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch takes at most {settings.OCR_BATCH_MAX_IMAGES} images",
+        )
+    await _check_job_capacity(OCRRepository(db), len(images_base64))
+
+    repo = OCRBatchRepository(db)
+    batch = OCRBatch(batch_id=str(uuid.uuid4()), owner=owner, total=len(images_base64))
+    batch = await repo.create_with_jobs(batch, [_new_job(image, language, owner) for image in images_base64])
+    logger.info(f"Queued OCR batch {batch.batch_id} with {batch.total} jobs")
+    return await _batch_response(repo, batch, include_results=False)
+
+
+@router.post("/batches", response_model=OCRBatchResponse, status_code=status.HTTP_201_CREATED)
+async def create_ocr_batch(
+    request: OCRBatchRequest,
+    http_request: Request,
+    db: AsyncSession = Depends(get_db),
+    # token: dict = Depends(verify_token),  # Temporarily disabled
+):
+    """
+    Submit several base64 images for OCR as one batch.
+
+    Each image becomes a job of the batch; the OCR workers run them concurrently.
+    """
+    return await _create_batch(db, request.images, request.language, _client_owner(http_request))
+
+
+async def _read_batch_images(files: List[UploadFile]) -> List[str]:
+    """Base64 of uploaded image files, read chunk by chunk; 413 once a file or the upload is too large."""
+    images = []
+    total = 0
+    for upload in files:
+        data = bytearray()
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            data += chunk
+            total += len(chunk)
+            if len(data) > settings.OCR_BATCH_MAX_IMAGE_BYTES:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"File {upload.filename} is larger than {settings.OCR_BATCH_MAX_IMAGE_BYTES} bytes",
+                )
+            if total > settings.OCR_BATCH_MAX_UPLOAD_BYTES:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Upload is larger than {settings.OCR_BATCH_MAX_UPLOAD_BYTES} bytes",
+                )
+        images.append(base64.b64encode(data).decode("ascii"))
+    return images
+
+
+@router.post("/batches/upload", response_model=OCRBatchResponse, status_code=status.HTTP_201_CREATED)
+async def upload_ocr_batch(
+    http_request: Request,
+    files: List[UploadFile] = File(...),
+    language: Optional[str] = Form(None),
+    db: AsyncSession = Depends(get_db),
+    # token: dict = Depends(verify_token),  # Temporarily disabled
+):
     """
+    Submit several image files (multipart/form-data, field "files") for OCR as one batch.
+
+    Files over OCR_BATCH_MAX_IMAGE_BYTES, or together over OCR_BATCH_MAX_UPLOAD_BYTES,
+    are rejected with 413.
+    """
+    images = await _read_batch_images(files)
+    return await _create_batch(db, images, language, _client_owner(http_request))
+
+
+@router.get("/batches/{batch_id}", response_model=OCRBatchResponse)
+async def get_ocr_batch(
+    batch_id: str,
+    include_results: bool = False,
+    db: AsyncSession = Depends(get_db),
+    # token: dict = Depends(verify_token),  # Temporarily disabled
+):
+    """Get the progress of a batch; with include_results, also its jobs and their combined text."""
+    repo = OCRBatchRepository(db)
+    batch = await repo.get_by_batch_id(batch_id)
+
+    if not batch:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Batch not found")
+
+    return await _batch_response(repo, batch, include_results)
+
+
+@router.post("/batches/{batch_id}/cancel", response_model=OCRBatchResponse)
+async def cancel_ocr_batch(
+    batch_id: str,
+    db: AsyncSession = Depends(get_db),
+    # token: dict = Depends(verify_token),  # Temporarily disabled
+):
+    """
+    Cancel a batch.
+
+    Queued jobs are not run; jobs already running are stopped by their workers at
+    the next heartbeat. Finished jobs keep their results.
+    """
+    repo = OCRBatchRepository(db)
+    batch = await repo.get_by_batch_id(batch_id)
+
+    if not batch:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Batch not found")
+
+    if batch.cancelled_at is None:
+        cancelled = await repo.cancel(batch)
+        for job in cancelled:
+            await notify_job_event(db, job)
+        logger.info(f"Cancelled OCR batch {batch_id} ({len(cancelled)} jobs)")
+
+    return await _batch_response(repo, batch, include_results=False)
+
+
+@router.get("/stats", response_model=OCRStatsResponse)
+async def get_ocr_stats(
+    # token: dict = Depends(verify_token),  # Temporarily disabled
+):
+    """Get OCR result cache counters, admission queue depth/wait times and per-lane latencies."""
+    return OCRStatsResponse(
+        cache=ocr_service.cache_stats(),
+        queue=ocr_service.admission.stats(),
+        lanes=ocr_service.scheduler.stats(),
+    )
+
+
+class _FieldExtractionPlan(NamedTuple):
+    """What a field extraction request runs: PDF pages or a single image, and how."""
+
+    page_params: Optional[List[dict]]  # Fields of a single image
+    all_page_params: Optional[Dict[str, List[dict]]]  # Fields per page of a PDF
+    mode: ExtractionMode
+    profiles: Optional[Dict[str, Any]]
+
+
+async def _plan_field_extraction(request: OCRExtractFieldsRequest, db: AsyncSession) -> _FieldExtractionPlan:
+    """Resolve the field params, mode and profiles of an extraction request, raising 4xx if it cannot run."""
     # Get page params from request or load from form
     page_params = None
     all_page_params = None
+    mode = request.mode
+    profiles = None
 
     if request.form_id:
         # Load params from form
@@ -121,6 +480,25 @@ async def extract_fields(
         elif form.params:
             # Legacy: params might be a flat list
             page_params = form.params
+
+        if mode is None and form.ocr_config and form.ocr_config.get("mode"):
+            try:
+                mode = ExtractionMode(form.ocr_config["mode"])
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Invalid extraction mode in form ocr_config: {form.ocr_config['mode']}",
+                )
+
+        if form.ocr_config and form.ocr_config.get("profiles") is not None:
+            profiles = form.ocr_config["profiles"]
+            try:
+                validate_profile_overrides(profiles)
+            except ValueError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Invalid recognition profiles in form ocr_config: {str(e)}",
+                )
     else:
         # Use params from request
         if request.all_page_params:
@@ -136,6 +514,8 @@ async def extract_fields(
             detail="No field parameters provided. Supply page_params, all_page_params, or form_id.",
         )
 
+    mode = mode or ExtractionMode(settings.OCR_EXTRACTION_MODE)
+
     # Detect if input is PDF or image
     try:
         image_data = base64.b64decode(request.image_base64)
@@ -143,53 +523,154 @@ async def extract_fields(
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid base64 data: {str(e)}")
 
-    # Extract fields
     if is_pdf and all_page_params:
-        # Multi-page PDF extraction
-        fields = await ocr_service.extract_fields_from_pdf_base64(
-            request.image_base64,
-            all_page_params,
-            request.language,
-        )
-    elif page_params:
-        # Single image extraction
-        fields = await ocr_service.extract_fields_from_base64(
-            request.image_base64,
-            page_params,
-            request.language,
-        )
-    elif all_page_params:
-        # Single image but params organized by page - use page 1
-        page_1_params = all_page_params.get("1", [])
-        if not page_1_params:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No params found for page 1",
-            )
-        fields = await ocr_service.extract_fields_from_base64(
-            request.image_base64,
-            page_1_params,
-            request.language,
-        )
-    else:
+        return _FieldExtractionPlan(None, all_page_params, mode, profiles)
+    if page_params:
+        return _FieldExtractionPlan(page_params, None, mode, profiles)
+    # Single image but params organized by page - use page 1
+    page_1_params = all_page_params.get("1", [])
+    if not page_1_params:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Unable to determine extraction method",
+            detail="No params found for page 1",
         )
+    return _FieldExtractionPlan(page_1_params, None, mode, profiles)
+
+
+@router.post("/extract-fields", response_model=OCRExtractFieldsResponse)
+async def extract_fields(
+    request: OCRExtractFieldsRequest,
+    http_request: Request,
+    db: AsyncSession = Depends(get_db),
+    # token: dict = Depends(verify_token),  # Temporarily disabled
+):
+    """
+    Extract text from specific regions of an image/PDF based on field definitions.
+
+    The field definitions can be provided directly via page_params/all_page_params,
+    or loaded from a form by providing form_id.
+
+    Each field definition should include:
+    - id: The field identifier (maps to XML export field)
+    - x1, y1, x2, y2: Bounding box coordinates
+    - type: Optional field type (string, date, etc.)
+    - isMultiline: Whether line breaks inside the region are kept
+
+    The extraction mode is taken from the request, then the form's ocr_config, then
+    OCR_EXTRACTION_MODE. "region" runs OCR per field; "page" runs OCR once per page
+    and assigns the recognised words to the field rectangles. PDF fields covered by an
+    embedded text layer are read from it without OCR; "sources" reports the path per field.
+
+    Region OCR uses a recognition profile per field (segmentation mode, engine mode and
+    character whitelist) chosen from the field type; a form can override profiles per
+    type or field id in ocr_config["profiles"].
+
+    If document_id is provided, the extracted fields will be saved to that document's params.
+    """
+    plan = await _plan_field_extraction(request, db)
+
+    # Extract fields
+    sources: dict = {}
+    owner = f"form:{request.form_id}" if request.form_id else _client_owner(http_request)
+    ticket = _reserve_ocr_slot()
+
+    async def run_extraction() -> dict:
+        async with ticket:
+            with work_context(Lane.INTERACTIVE, owner):
+                if plan.all_page_params is not None:
+                    # Multi-page PDF extraction
+                    return await ocr_service.extract_fields_from_pdf_base64(
+                        request.image_base64,
+                        plan.all_page_params,
+                        request.language,
+                        plan.mode,
+                        sources,
+                        plan.profiles,
+                    )
+                # Single image extraction
+                return await ocr_service.extract_fields_from_base64(
+                    request.image_base64,
+                    plan.page_params,
+                    request.language,
+                    plan.mode,
+                    sources,
+                    plan.profiles,
+                )
+
+    try:
+        # Stop queued and running OCR as soon as the client goes away
+        fields = await cancel_on_disconnect(
+            run_extraction(), http_request.is_disconnected, settings.OCR_DISCONNECT_POLL_SECONDS
+        )
+    except QueueFullError as e:
+        raise _queue_full(e)
+    except ClientDisconnectedError:
+        ticket.cancel()
+        logger.info("Client disconnected, cancelled field extraction")
+        return Response(status_code=HTTP_499_CLIENT_CLOSED_REQUEST)
 
     # Optionally save to document
     document_id = None
     if request.document_id:
-        doc_repo = DocumentRepository(db)
-        document = await doc_repo.get_by_id(request.document_id)
-        if document:
-            # Merge with existing params
-            existing_params = document.params or {}
-            existing_params.update(fields)
-            await doc_repo.update(request.document_id, params=existing_params)
+        if await DocumentRepository(db).merge_params(request.document_id, fields):
+            await db.commit()
             document_id = request.document_id
             logger.info(f"Saved extracted fields to document {document_id}")
         else:
             logger.warning(f"Document {request.document_id} not found, fields not saved")
 
-    return OCRExtractFieldsResponse(fields=fields, document_id=document_id)
+    return OCRExtractFieldsResponse(fields=fields, sources=sources, document_id=document_id)
+
+
+@router.post("/extract-fields/jobs", response_model=OCRJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_extract_fields_job(
+    request: OCRExtractFieldsRequest,
+    http_request: Request,
+    db: AsyncSession = Depends(get_db),
+    # token: dict = Depends(verify_token),  # Temporarily disabled
+):
+    """
+    Queue a field extraction and return its job at once.
+
+    Takes the same request as /extract-fields; the OCR workers run it. The job's
+    pages_done, result_fields and field_sources are updated as each page finishes,
+    so /jobs/{job_id} (or its event stream) shows progress and partial results. A
+    retried attempt only runs the pages not finished yet.
+
+    If document_id is provided, the final fields are merged into that document's
+    params in the same transaction that marks the job completed.
+    """
+    plan = await _plan_field_extraction(request, db)
+    if request.document_id and not await DocumentRepository(db).get_by_id(request.document_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
+
+    repo = OCRRepository(db)
+    await _check_job_capacity(repo, 1)
+
+    if plan.all_page_params is not None:
+        pages_total = sum(1 for params in plan.all_page_params.values() if params)
+    else:
+        pages_total = 1
+    job = OCRJob(
+        job_id=str(uuid.uuid4()),
+        status=JobStatus.PENDING,
+        kind=JobKind.EXTRACT_FIELDS,
+        payload={
+            "image_base64": request.image_base64,
+            "language": request.language,
+            "mode": plan.mode.value,
+            "profiles": plan.profiles,
+            "page_params": plan.page_params,
+            "all_page_params": plan.all_page_params,
+            "document_id": request.document_id,
+        },
+        owner=f"form:{request.form_id}" if request.form_id else _client_owner(http_request),
+        max_attempts=settings.OCR_JOB_MAX_ATTEMPTS,
+        available_at=utcnow(),
+        pages_total=pages_total,
+        pages_done=0,
+    )
+    job = await repo.create(job)
+    logger.info(f"Queued field extraction job {job.job_id} ({pages_total} pages)")
+
+    return job
@@ -29,6 +29,19 @@ class Settings(BaseSettings):
     # Database - SQLite
     SQLITE_DB_PATH: str = "./sqlite.db"
 
+    # Blob storage (document pages)
+    BLOB_STORE_BACKEND: str = "local"  # local: files under BLOB_STORE_PATH
+    BLOB_STORE_PATH: str = "./data/blobs"
+    BLOB_STORE_ORIGINALS_PATH: str = ""  # Keep uploaded page originals here (cold storage), empty = not kept
+    DOCUMENT_MAX_PAGE_BYTES: int = 25 * 1024**2  # Per uploaded page
+    DOCUMENT_MAX_UPLOAD_BYTES: int = 200 * 1024**2  # Per document upload request
+    DOCUMENT_NORMALIZE_PAGES: bool = True  # Downscale and re-encode uploaded page images
+    DOCUMENT_PAGE_MAX_DPI: int = 300  # Long edge capped at that of an A4 page at this DPI
+    # png-gray: lossless grayscale, larger files. jpeg (DOCUMENT_PAGE_JPEG_QUALITY): smaller, but lossy, and the
+    # uploaded page is only kept if BLOB_STORE_ORIGINALS_PATH is set
+    DOCUMENT_PAGE_ENCODING: str = "png-gray"
+    DOCUMENT_PAGE_JPEG_QUALITY: int = 90
+
     # JWT
     JWT_SECRET: str = "change-this-secret-in-production-environment"
     JWT_ALGORITHM: str = "HS256"
@@ -38,9 +51,55 @@ class Settings(BaseSettings):
     TESSERACT_PATH: Optional[str] = None
     TESSDATA_PATH: Optional[str] = None
     OCR_LANGUAGES: str = "eng"
+    OCR_ENGINE: str = "auto"  # auto, tesserocr or pytesseract
+    OCR_ENGINE_POOL_SIZE: int = 0  # Engines per language, 0 = one per CPU core
+    OCR_EXTRACTION_MODE: str = "region"  # region or page, default for extract-fields
+    OCR_PDF_DPI: int = 300
+    OCR_PDF_GRAYSCALE: bool = True  # Render PDF pages as 8-bit grayscale (a third of the memory of RGB)
+    OCR_PDF_PAGES_IN_FLIGHT: int = 4  # Pages rendered/OCR'd concurrently per request
+    OCR_PDF_TEXT_LAYER: bool = True  # Read fields from the PDF's embedded text before falling back to OCR
+    OCR_PDF_RENDER_MODE: str = "page"  # page: whole page at OCR_PDF_DPI, region: only field areas
+    OCR_REGION_TARGET_HEIGHT: int = 60  # Pixel height a single-line field is rendered at in region mode
+    OCR_REGION_MIN_DPI: int = 150
+    OCR_REGION_MAX_DPI: int = 600
+    OCR_REGION_MAX_PAGE_SHARE: float = 0.5  # Render the whole page when regions would cost more than this share of it
+    OCR_CACHE_ENABLED: bool = True
+    OCR_CACHE_MAX_ENTRIES: int = 50000  # In-memory LRU size (field results)
+    OCR_CACHE_PERSISTENT: bool = False  # Also keep results in the ocr_cache_entries table
+    OCR_CACHE_TTL_DAYS: float = 90  # Persistent entries are deleted this long after they were stored; 0 keeps them
+    OCR_PAGE_CACHE_ENABLED: bool = True
+    OCR_PAGE_CACHE_DIR: Optional[str] = None  # Rendered PDF pages, defaults to <tmp>/inuka-page-cache
+    OCR_PAGE_CACHE_MAX_BYTES: int = 2 * 1024**3
 
     # Worker Pool
     WORKER_POOL_SIZE: int = 20
+    OCR_MAX_RUNNING_REQUESTS: int = 4  # Field extractions processed at once per API process
+    OCR_QUEUE_MAX_DEPTH: int = 32  # Requests allowed to wait for a slot before new ones get 503
+    OCR_QUEUE_TIMEOUT_SECONDS: float = 30  # Requests waiting longer are dropped with 503
+    OCR_DISCONNECT_POLL_SECONDS: float = 0.5  # How often extract-fields checks for a disconnected client
+
+    # OCR Job Queue (scan jobs, run by `python -m app.worker`)
+    OCR_JOB_MAX_PENDING: int = 1000  # Queued scan jobs before /ocr/scan answers 503
+    OCR_JOB_MAX_ATTEMPTS: int = 3  # Attempts per job before it is marked failed
+    OCR_JOB_LEASE_SECONDS: float = 60  # A job whose worker stops renewing its lease this long is run again
+    OCR_JOB_HEARTBEAT_SECONDS: float = 15  # How often a worker renews the leases of its running jobs
+    OCR_JOB_RETRY_BACKOFF_SECONDS: float = 10  # Delay before the first retry, doubled for each further one
+    OCR_JOB_RETRY_BACKOFF_MAX_SECONDS: float = 600
+    OCR_BATCH_MAX_IMAGES: int = 200  # Images accepted per /ocr/batches submission
+    OCR_BATCH_MAX_IMAGE_BYTES: int = 25 * 1024**2  # Per image file of /ocr/batches/upload
+    OCR_BATCH_MAX_UPLOAD_BYTES: int = 200 * 1024**2  # All image files of one /ocr/batches/upload
+    OCR_WORKER_CONCURRENCY: int = 4  # Jobs run at once per worker process
+    OCR_WORKER_POLL_SECONDS: float = 1.0  # How often an idle worker looks for new jobs
+    OCR_EVENTS_PG_NOTIFY: bool = True  # On PostgreSQL, push job status changes with LISTEN/NOTIFY
+    OCR_EVENTS_POLL_SECONDS: float = 1.0  # Otherwise, how often the status of streamed jobs is read
+    OCR_EVENTS_KEEPALIVE_SECONDS: float = 15  # Comment sent on idle job status streams
+
+    # OCR Job Retention (run by the workers)
+    OCR_JOB_RETENTION_DAYS: float = 30  # Finished jobs are deleted this long after their last update; 0 keeps them
+    OCR_JOB_COMPACT_AFTER_HOURS: float = 24  # Input images of finished jobs are dropped after this long; 0 keeps them
+    OCR_JOB_ARCHIVE_DIR: str = ""  # If set, purged jobs are written here as gzipped JSON lines first
+    OCR_JOB_PURGE_BATCH_SIZE: int = 500  # Jobs deleted or compacted per transaction
+    OCR_JOB_RETENTION_INTERVAL_SECONDS: float = 3600  # How often a worker runs retention
 
     @property
     def database_url(self) -> str:
@@ -1,4 +1,5 @@
 """Main application entry point."""
+import asyncio
 import logging
 import os
 from contextlib import asynccontextmanager
@@ -11,7 +12,8 @@ from fastapi.staticfiles import StaticFiles
 
 from app.api.v1 import documents, files, forms, ocr, templates
 from app.core.config import get_settings
-from app.core.database import Base, engine
+from app.core.database import AsyncSessionLocal, Base, engine
+from app.services.ocr.events import job_event_source
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -20,6 +22,13 @@ settings = get_settings()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup and shutdown events."""
+    if settings.DOCUMENT_NORMALIZE_PAGES and settings.DOCUMENT_PAGE_ENCODING == "jpeg":
+        if not settings.BLOB_STORE_ORIGINALS_PATH:
+            logger.warning(
+                "Uploaded page images are re-encoded as lossy JPEG and their originals are not kept; "
+                "set BLOB_STORE_ORIGINALS_PATH to keep them, or DOCUMENT_PAGE_ENCODING=png-gray"
+            )
+
     # Startup: Create database tables
     logger.info("Connecting to database and creating tables...")
     try:
@@ -30,9 +39,14 @@ async def lifespan(app: FastAPI):
         logger.error(f"Failed to connect to database: {e}")
         raise
 
+    # Feed the job status streams with changes made by the OCR workers
+    job_event_feed = asyncio.create_task(job_event_source(engine, AsyncSessionLocal).run())
+
     yield
 
-    # Shutdown: Dispose engine
+    # Shutdown: Stop the job event feed, release OCR workers and dispose engine
+    job_event_feed.cancel()
+    ocr.ocr_service.close()
     logger.info("Closing database connection...")
     await engine.dispose()
     logger.info("Database connection closed")
@@ -2,7 +2,8 @@
 from app.models.document import Document
 from app.models.file import File
 from app.models.form import Form
-from app.models.ocr import OCRJob
+from app.models.ocr import OCRBatch, OCRJob
+from app.models.ocr_cache import OCRCacheEntry
 from app.models.template import Template
 from app.models.user import User
 
@@ -12,5 +13,7 @@ __all__ = [
     "Form",
     "Document",
     "OCRJob",
+    "OCRBatch",
+    "OCRCacheEntry",
     "User",
 ]
@@ -15,8 +15,8 @@ class Document(Base):
     file_id = Column(Integer, ForeignKey("files.id", ondelete="CASCADE"), nullable=False, index=True)
     form_id = Column(Integer, ForeignKey("forms.id", ondelete="CASCADE"), nullable=False, index=True)
     name = Column(Text, nullable=True)
-    original_file = Column(JSON, nullable=True)  # Map of original file data
-    processing_file = Column(JSON, nullable=True)  # Map of matched pages (bytes)
+    original_file = Column(JSON, nullable=True)  # Map of page -> blob reference (hash, size, content_type)
+    processing_file = Column(JSON, nullable=True)  # Map of matched page -> blob reference
     params = Column(JSON, nullable=True)  # Map of DeclarationParams
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
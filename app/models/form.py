@@ -32,6 +32,7 @@ class Form(Base):
     template = Column(JSON, nullable=True)  # CapturedTemplate JSON structure
     all_page_params = Column(JSON, nullable=True)  # Map of page params
     params = Column(JSON, nullable=True)  # List of parameters
+    ocr_config = Column(JSON, nullable=True)  # Field extraction settings (mode, ...)
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
 
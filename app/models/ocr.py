@@ -1,9 +1,10 @@
 """OCR Job model."""
 from enum import Enum
 
-from sqlalchemy import Column, DateTime
+from sqlalchemy import JSON, Column, DateTime
 from sqlalchemy import Enum as SQLEnum
-from sqlalchemy import Integer, String, Text
+from sqlalchemy import ForeignKey, Index, Integer, String, Text
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from app.core.database import Base
@@ -16,18 +17,97 @@ class JobStatus(str, Enum):
     PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class JobKind(str, Enum):
+    """What a queued OCR job does."""
+
+    SCAN = "scan"  # Full-text OCR of one image
+    EXTRACT_FIELDS = "extract_fields"  # Field extraction, recorded page by page
+
+
+class ExtractionMode(str, Enum):
+    """Field extraction strategy.
+
+    REGION runs OCR once per field rectangle; PAGE runs OCR once per page with
+    word boxes and assigns the words to the field rectangles.
+    """
+
+    REGION = "region"
+    PAGE = "page"
 
 
 class OCRJob(Base):
-    """OCR Job model for tracking OCR processing jobs."""
+    """OCR Job model for tracking OCR processing jobs.
+
+    The table doubles as the durable job queue: a worker claims a pending job
+    by taking a lease on it (locked_by/locked_until), renews the lease while it
+    works, and either completes the job or puts it back with a later
+    available_at. A job whose lease runs out is claimed again by another worker.
+    """
 
     __tablename__ = "ocr_jobs"
+    __table_args__ = (
+        # Claiming: due pending jobs, and processing jobs whose lease ran out
+        Index("ix_ocr_jobs_status_available_at", "status", "available_at"),
+        Index("ix_ocr_jobs_status_locked_until", "status", "locked_until"),
+        # Listing by status, newest first
+        Index("ix_ocr_jobs_status_id", "status", "id"),
+        # Retention: finished jobs by age
+        Index("ix_ocr_jobs_status_updated_at", "status", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     job_id = Column(String(255), unique=True, nullable=False, index=True)
     status = Column(SQLEnum(JobStatus), default=JobStatus.PENDING, nullable=False)
+    kind = Column(SQLEnum(JobKind), default=JobKind.SCAN, server_default=JobKind.SCAN.name, nullable=False)
     image_path = Column(Text, nullable=True)
     result_text = Column(Text, nullable=True)
     error_message = Column(Text, nullable=True)
+    payload = Column(JSON, nullable=True)  # Job input: image_base64, language (+ field params for extraction)
+    owner = Column(String(255), nullable=True)  # Fair-share owner of the job's OCR work
+    # Scan deduplication: SHA-256 of the decoded image and language. A failed or cancelled job
+    # keeps content_hash until a later submission of the same content releases it;
+    # request_hash keeps it for good, to tell retries of an Idempotency-Key from misuses.
+    content_hash = Column(String(64), unique=True, nullable=True, index=True)
+    request_hash = Column(String(64), nullable=True)
+    idempotency_key = Column(String(255), unique=True, nullable=True, index=True)
+    attempts = Column(Integer, default=0, server_default="0", nullable=False)
+    max_attempts = Column(Integer, default=3, server_default="3", nullable=False)
+    available_at = Column(DateTime, server_default=func.now(), nullable=False)
+    locked_by = Column(String(255), nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    started_at = Column(DateTime, nullable=True)  # When the current (or last) attempt was claimed
+    finished_at = Column(DateTime, nullable=True)  # When the last attempt completed or failed
+    batch_id = Column(Integer, ForeignKey("ocr_batches.id", ondelete="CASCADE"), nullable=True, index=True)
+    position = Column(Integer, nullable=True)  # Order of the image within its batch
+    # Field extraction progress: results are stored as each page finishes
+    pages_total = Column(Integer, nullable=True)
+    pages_done = Column(Integer, nullable=True)
+    page_results = Column(JSON, nullable=True)  # Map of page -> {"fields": ..., "sources": ...}
+    result_fields = Column(JSON, nullable=True)  # Fields of the finished pages, merged in page order
+    field_sources = Column(JSON, nullable=True)  # Map of field_id -> "text_layer", "ocr" or "cache"
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    # Relationships
+    batch = relationship("OCRBatch", back_populates="jobs")
+
+
+class OCRBatch(Base):
+    """A set of scan jobs submitted together, tracked and cancelled as one."""
+
+    __tablename__ = "ocr_batches"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    batch_id = Column(String(255), unique=True, nullable=False, index=True)
+    owner = Column(String(255), nullable=True)
+    total = Column(Integer, nullable=False)
+    cancelled_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    # Relationships
+    jobs = relationship("OCRJob", back_populates="batch", cascade="all, delete-orphan", order_by="OCRJob.position")
@@ -0,0 +1,15 @@
+"""OCR cache entry model."""
+from sqlalchemy import Column, DateTime, String, Text
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class OCRCacheEntry(Base):
+    """Persistent tier of the OCR result cache, keyed by content hash."""
+
+    __tablename__ = "ocr_cache_entries"
+
+    key = Column(String(64), primary_key=True)
+    text = Column(Text, nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False, index=True)
@@ -1,11 +1,12 @@
 """Document repository."""
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import defer, selectinload
 
 from app.models.document import Document
+from app.models.form import Form
 from app.repositories.base import BaseRepository
 
 
@@ -16,9 +17,22 @@ class DocumentRepository(BaseRepository[Document]):
         super().__init__(Document, session)
 
     async def get_by_file_id(self, file_id: int) -> List[Document]:
-        """Get all documents for a file with form relationship loaded."""
+        """
+        Get all documents for a file with form names loaded, for listing.
+
+        Only metadata is loaded: ``original_file`` holds page references, which
+        are the page metadata, while ``processing_file`` is deferred and raises
+        if accessed; of the form only its id and name are loaded, not the page
+        images of its template.
+        """
         result = await self.session.execute(
-            select(Document).where(Document.file_id == file_id).options(selectinload(Document.form))
+            select(Document)
+            .where(Document.file_id == file_id)
+            .options(
+                selectinload(Document.form).load_only(Form.id, Form.name),
+                defer(Document.processing_file, raiseload=True),
+            )
+            .order_by(Document.id)
         )
         return list(result.scalars().all())
 
@@ -28,3 +42,25 @@ class DocumentRepository(BaseRepository[Document]):
             select(Document).where(Document.file_id == file_id, Document.form_id == form_id)
         )
         return result.scalar_one_or_none()
+
+    async def merge_params(self, document_id: int, values: Dict[str, Any]) -> bool:
+        """
+        Merge values into a document's params without committing.
+
+        The document row is locked (FOR UPDATE on PostgreSQL) until the caller
+        commits, so concurrent merges do not overwrite each other's keys.
+
+        Returns:
+            False if the document does not exist
+        """
+        result = await self.session.execute(
+            select(Document)
+            .where(Document.id == document_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        document = result.scalar_one_or_none()
+        if document is None:
+            return False
+        document.params = {**(document.params or {}), **values}
+        return True
@@ -0,0 +1,81 @@
+"""OCR batch repository."""
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, exists, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.ocr import JobStatus, OCRBatch, OCRJob
+from app.repositories.base import BaseRepository
+from app.repositories.ocr_repository import utcnow
+
+
+class OCRBatchRepository(BaseRepository[OCRBatch]):
+    """Repository for OCR batches and their jobs."""
+
+    def __init__(self, session: AsyncSession):
+        super().__init__(OCRBatch, session)
+
+    async def create_with_jobs(self, batch: OCRBatch, jobs: List[OCRJob]) -> OCRBatch:
+        """Create a batch and its jobs in one transaction, numbering the jobs in order."""
+        self.session.add(batch)
+        await self.session.flush()
+        for position, job in enumerate(jobs):
+            job.batch_id = batch.id
+            job.position = position
+        self.session.add_all(jobs)
+        await self.session.commit()
+        await self.session.refresh(batch)
+        return batch
+
+    async def get_by_batch_id(self, batch_id: str) -> Optional[OCRBatch]:
+        """Get OCR batch by batch_id."""
+        result = await self.session.execute(select(OCRBatch).where(OCRBatch.batch_id == batch_id))
+        return result.scalar_one_or_none()
+
+    async def status_counts(self, batch: OCRBatch) -> Dict[str, int]:
+        """Number of the batch's jobs in each status."""
+        result = await self.session.execute(
+            select(OCRJob.status, func.count()).where(OCRJob.batch_id == batch.id).group_by(OCRJob.status)
+        )
+        return {status.value: count for status, count in result.all()}
+
+    async def get_jobs(self, batch: OCRBatch) -> List[OCRJob]:
+        """The batch's jobs in submission order."""
+        result = await self.session.execute(select(OCRJob).where(OCRJob.batch_id == batch.id).order_by(OCRJob.position))
+        return list(result.scalars().all())
+
+    async def cancel(self, batch: OCRBatch) -> List[OCRJob]:
+        """
+        Cancel every job of the batch that has not finished.
+
+        Pending jobs are never claimed afterwards. Workers running a job lose
+        their lease with it and stop at their next heartbeat.
+
+        Returns:
+            The jobs that were cancelled
+        """
+        batch.cancelled_at = utcnow()
+        result = await self.session.execute(
+            update(OCRJob)
+            .where(
+                OCRJob.batch_id == batch.id,
+                OCRJob.status.in_([JobStatus.PENDING, JobStatus.PROCESSING]),
+            )
+            .values(status=JobStatus.CANCELLED, locked_by=None, locked_until=None)
+            .returning(OCRJob)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        cancelled = list(result.scalars().all())
+        await self.session.commit()
+        return cancelled
+
+    async def delete_empty(self, cutoff: datetime) -> int:
+        """Delete batches created before ``cutoff`` whose jobs have all been purged."""
+        result = await self.session.execute(
+            delete(OCRBatch)
+            .where(OCRBatch.created_at < cutoff, ~exists().where(OCRJob.batch_id == OCRBatch.id))
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.commit()
+        return result.rowcount
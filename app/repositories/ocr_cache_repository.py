@@ -0,0 +1,45 @@
+"""OCR cache repository."""
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.ocr_cache import OCRCacheEntry
+
+
+class OCRCacheRepository:
+    """Repository for persistent OCR cache entries."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_many(self, keys: List[str]) -> Dict[str, str]:
+        """Get cached text for the given keys."""
+        result = await self.session.execute(
+            select(OCRCacheEntry.key, OCRCacheEntry.text).where(OCRCacheEntry.key.in_(keys))
+        )
+        return {key: text for key, text in result.all()}
+
+    async def put_many(self, items: Dict[str, str]) -> None:
+        """Insert entries, leaving existing keys untouched."""
+        insert = pg_insert if self.session.get_bind().dialect.name == "postgresql" else sqlite_insert
+        stmt = insert(OCRCacheEntry).values([{"key": key, "text": text} for key, text in items.items()])
+        await self.session.execute(stmt.on_conflict_do_nothing(index_elements=["key"]))
+        await self.session.commit()
+
+    async def delete_before(self, cutoff: datetime, limit: int) -> int:
+        """Delete up to ``limit`` entries created before ``cutoff``, oldest first; returns the number deleted."""
+        candidates = (
+            select(OCRCacheEntry.key)
+            .where(OCRCacheEntry.created_at < cutoff)
+            .order_by(OCRCacheEntry.created_at)
+            .limit(limit)
+        )
+        result = await self.session.execute(
+            delete(OCRCacheEntry).where(OCRCacheEntry.key.in_(candidates)).execution_options(synchronize_session=False)
+        )
+        await self.session.commit()
+        return result.rowcount
@@ -1,12 +1,34 @@
 """OCR repository."""
-from typing import Optional
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, NamedTuple, Optional
 
-from sqlalchemy import select
+from sqlalchemy import and_, delete, func, null, or_, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 
-from app.models.ocr import OCRJob
+from app.models.ocr import JobStatus, OCRJob
 from app.repositories.base import BaseRepository
 
+# Jobs that will not change any more
+FINISHED_STATUSES = (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+# Completed jobs the service time per job is measured over
+SERVICE_TIME_SAMPLE = 50
+
+
+def utcnow() -> datetime:
+    """Current UTC time as a naive datetime, the way job timestamps are stored."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class JobQueueLoad(NamedTuple):
+    """Jobs waiting and running, and the time the workers took per job recently (None if unknown)."""
+
+    pending: int
+    running: int
+    service_seconds: Optional[float]
+
 
 class OCRRepository(BaseRepository[OCRJob]):
     """Repository for OCR jobs."""
@@ -19,6 +41,29 @@ class OCRRepository(BaseRepository[OCRJob]):
         result = await self.session.execute(select(OCRJob).where(OCRJob.job_id == job_id))
         return result.scalar_one_or_none()
 
+    async def get_by_idempotency_key(self, idempotency_key: str) -> Optional[OCRJob]:
+        """Get the job submitted with an Idempotency-Key."""
+        result = await self.session.execute(select(OCRJob).where(OCRJob.idempotency_key == idempotency_key))
+        return result.scalar_one_or_none()
+
+    async def get_by_content_hash(self, content_hash: str) -> Optional[OCRJob]:
+        """Get the job holding a scan content hash."""
+        result = await self.session.execute(select(OCRJob).where(OCRJob.content_hash == content_hash))
+        return result.scalar_one_or_none()
+
+    async def create_unique(self, job: OCRJob) -> Optional[OCRJob]:
+        """Create a job; None if a concurrent submission took its content hash or idempotency key first."""
+        try:
+            return await self.create(job)
+        except IntegrityError:
+            await self.session.rollback()
+            return None
+
+    async def release_content_hash(self, job: OCRJob) -> None:
+        """Let a new job take the content hash of a failed or cancelled one."""
+        job.content_hash = None
+        await self.session.commit()
+
     async def update_status(self, job_id: str, status: str, **kwargs) -> Optional[OCRJob]:
         """Update OCR job status."""
         job = await self.get_by_job_id(job_id)
@@ -29,3 +74,260 @@ class OCRRepository(BaseRepository[OCRJob]):
             await self.session.commit()
             await self.session.refresh(job)
         return job
+
+    async def queue_load(self) -> JobQueueLoad:
+        """
+        Jobs waiting for and held by workers, and the mean run time of the latest completed jobs.
+
+        Run times are measured between ``started_at`` and ``finished_at``, both
+        taken from the worker's clock, so they do not depend on the database
+        clock agreeing with it.
+        """
+        result = await self.session.execute(
+            select(OCRJob.status, func.count())
+            .where(OCRJob.status.in_((JobStatus.PENDING, JobStatus.PROCESSING)))
+            .group_by(OCRJob.status)
+        )
+        counts = dict(result.all())
+        result = await self.session.execute(
+            select(OCRJob.started_at, OCRJob.finished_at)
+            .where(OCRJob.status == JobStatus.COMPLETED, OCRJob.started_at.isnot(None), OCRJob.finished_at.isnot(None))
+            .order_by(OCRJob.id.desc())
+            .limit(SERVICE_TIME_SAMPLE)
+        )
+        durations = [(finished_at - started_at).total_seconds() for started_at, finished_at in result.all()]
+        return JobQueueLoad(
+            pending=counts.get(JobStatus.PENDING, 0),
+            running=counts.get(JobStatus.PROCESSING, 0),
+            service_seconds=sum(durations) / len(durations) if durations else None,
+        )
+
+    async def claim_next(self, worker_id: str, lease_seconds: float) -> Optional[OCRJob]:
+        """
+        Atomically lease the next runnable job to ``worker_id``.
+
+        A job is runnable when it is pending and due, or when the worker
+        processing it stopped renewing its lease. The candidate row is picked
+        with ``FOR UPDATE SKIP LOCKED`` on PostgreSQL, so concurrent workers
+        pass over rows another worker is claiming instead of queueing behind
+        it. SQLite has no row locks (the clause is not rendered); there the
+        single UPDATE statement runs under the database write lock, which
+        serialises claims between processes.
+
+        Returns:
+            The claimed job with its attempt counter incremented, or None if no job is runnable
+        """
+        now = utcnow()
+        runnable = or_(
+            and_(OCRJob.status == JobStatus.PENDING, OCRJob.available_at <= now),
+            and_(OCRJob.status == JobStatus.PROCESSING, OCRJob.locked_until < now),
+        )
+        candidate = (
+            select(OCRJob.id)
+            .where(runnable)
+            .order_by(OCRJob.available_at, OCRJob.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        stmt = (
+            update(OCRJob)
+            # Re-check runnable so a row claimed concurrently is not taken twice
+            .where(OCRJob.id == candidate, runnable)
+            .values(
+                status=JobStatus.PROCESSING,
+                attempts=OCRJob.attempts + 1,
+                locked_by=worker_id,
+                locked_until=now + timedelta(seconds=lease_seconds),
+                heartbeat_at=now,
+                started_at=now,
+            )
+            .returning(OCRJob)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        result = await self.session.execute(stmt)
+        job = result.scalar_one_or_none()
+        await self.session.commit()
+        return job
+
+    async def _update_leased(self, job_id: str, worker_id: str, commit: bool = True, **values) -> bool:
+        """Update a job only while ``worker_id`` still holds its lease (committing unless ``commit`` is False)."""
+        stmt = (
+            update(OCRJob)
+            .where(
+                OCRJob.job_id == job_id,
+                OCRJob.status == JobStatus.PROCESSING,
+                OCRJob.locked_by == worker_id,
+            )
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(stmt)
+        if commit:
+            await self.session.commit()
+        return result.rowcount > 0
+
+    async def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        """Extend the lease on a job; False if the worker has lost it."""
+        now = utcnow()
+        return await self._update_leased(
+            job_id, worker_id, locked_until=now + timedelta(seconds=lease_seconds), heartbeat_at=now
+        )
+
+    async def complete(self, job_id: str, worker_id: str, result_text: str) -> bool:
+        """Store the result of a leased job and release it."""
+        return await self._update_leased(
+            job_id,
+            worker_id,
+            status=JobStatus.COMPLETED,
+            result_text=result_text,
+            error_message=None,
+            locked_by=None,
+            locked_until=None,
+            finished_at=utcnow(),
+        )
+
+    async def record_pages(
+        self,
+        job_id: str,
+        worker_id: str,
+        page_results: Dict[str, Any],
+        fields: Dict[str, str],
+        sources: Dict[str, str],
+    ) -> bool:
+        """Store the finished pages of a leased field extraction job and its fields so far."""
+        return await self._update_leased(
+            job_id,
+            worker_id,
+            page_results=page_results,
+            pages_done=len(page_results),
+            result_fields=fields,
+            field_sources=sources,
+        )
+
+    async def complete_fields(
+        self, job_id: str, worker_id: str, fields: Dict[str, str], sources: Dict[str, str], commit: bool = True
+    ) -> bool:
+        """
+        Store the fields of a leased field extraction job and release it.
+
+        Args:
+            job_id: Job identifier
+            worker_id: Worker holding the lease
+            fields: Extracted fields
+            sources: How each field was read
+            commit: False to leave the transaction open for writes that must land with the result
+        """
+        return await self._update_leased(
+            job_id,
+            worker_id,
+            commit=commit,
+            status=JobStatus.COMPLETED,
+            result_fields=fields,
+            field_sources=sources,
+            error_message=None,
+            locked_by=None,
+            locked_until=None,
+            finished_at=utcnow(),
+        )
+
+    async def fail(self, job_id: str, worker_id: str, error: str, retry_at: Optional[datetime] = None) -> bool:
+        """
+        Record a failed attempt of a leased job and release it.
+
+        Args:
+            job_id: Job identifier
+            worker_id: Worker holding the lease
+            error: Error of this attempt
+            retry_at: When to run the job again; None fails the job for good
+        """
+        values = {"error_message": error, "locked_by": None, "locked_until": None, "finished_at": utcnow()}
+        if retry_at is not None:
+            values.update(status=JobStatus.PENDING, available_at=retry_at)
+        else:
+            values.update(status=JobStatus.FAILED)
+        return await self._update_leased(job_id, worker_id, **values)
+
+    async def list_jobs(
+        self,
+        status: Optional[JobStatus] = None,
+        limit: int = 50,
+        before: Optional[int] = None,
+    ) -> List[OCRJob]:
+        """
+        Jobs newest first, without their input and results.
+
+        Pages by keyset rather than offset, so deep pages cost the same as the
+        first: pass the id of the last job of a page as ``before`` to get the
+        next one. Ids follow submission order.
+        """
+        stmt = select(OCRJob).options(
+            load_only(
+                OCRJob.job_id,
+                OCRJob.status,
+                OCRJob.kind,
+                OCRJob.owner,
+                OCRJob.attempts,
+                OCRJob.batch_id,
+                OCRJob.position,
+                OCRJob.pages_total,
+                OCRJob.pages_done,
+                OCRJob.created_at,
+                OCRJob.updated_at,
+            )
+        )
+        if status is not None:
+            stmt = stmt.where(OCRJob.status == status)
+        if before is not None:
+            stmt = stmt.where(OCRJob.id < before)
+        stmt = stmt.order_by(OCRJob.id.desc()).limit(limit)
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def finished_before(self, cutoff: datetime, limit: int) -> List[OCRJob]:
+        """Up to ``limit`` finished jobs last updated before ``cutoff``, oldest first."""
+        result = await self.session.execute(
+            select(OCRJob)
+            .where(OCRJob.status.in_(FINISHED_STATUSES), OCRJob.updated_at < cutoff)
+            .order_by(OCRJob.updated_at, OCRJob.id)
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+
+    async def delete_ids(self, ids: List[int]) -> int:
+        """Delete jobs by primary key; returns the number deleted."""
+        result = await self.session.execute(
+            delete(OCRJob).where(OCRJob.id.in_(ids)).execution_options(synchronize_session=False)
+        )
+        await self.session.commit()
+        return result.rowcount
+
+    async def compact_finished(self, cutoff: datetime, limit: int) -> int:
+        """
+        Drop the input of up to ``limit`` finished jobs last updated before ``cutoff``.
+
+        The input images (and per-page progress) are only needed while a job
+        runs; results are kept. ``updated_at`` is left as it was so compaction
+        does not postpone the job's purge.
+
+        Returns:
+            Number of jobs compacted
+        """
+        candidates = (
+            select(OCRJob.id)
+            .where(
+                OCRJob.status.in_(FINISHED_STATUSES),
+                OCRJob.updated_at < cutoff,
+                or_(OCRJob.payload.isnot(None), OCRJob.page_results.isnot(None)),
+            )
+            .limit(limit)
+        )
+        result = await self.session.execute(
+            update(OCRJob)
+            .where(OCRJob.id.in_(candidates))
+            # null() rather than None, which JSON columns would store as a JSON null
+            .values(payload=null(), page_results=null(), updated_at=OCRJob.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.commit()
+        return result.rowcount
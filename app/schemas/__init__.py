@@ -1,5 +1,5 @@
 """Schemas package for request/response models."""
-from app.schemas.document import DocumentCreate, DocumentResponse
+from app.schemas.document import DocumentCreate, DocumentPageInfo, DocumentResponse, DocumentSummary
 from app.schemas.file import FileCreate, FileResponse, FileUpdate
 from app.schemas.form import FormCreate, FormResponse, FormType, FormUpdate
 from app.schemas.ocr import OCRJobResponse, OCRScanRequest
@@ -10,6 +10,8 @@ __all__ = [
     # Document
     "DocumentCreate",
     "DocumentResponse",
+    "DocumentSummary",
+    "DocumentPageInfo",
     # File
     "FileCreate",
     "FileUpdate",
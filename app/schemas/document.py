@@ -1,6 +1,6 @@
 """Document schemas for request/response."""
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel
 
@@ -27,3 +27,30 @@ class DocumentResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class DocumentPageInfo(BaseModel):
+    """Metadata of one page; the page itself is at .../documents/{document_id}/pages/{page}."""
+
+    page: str
+    hash: Optional[str] = None  # None for pages not yet moved to the blob store
+    size: Optional[int] = None
+    content_type: Optional[str] = None
+    original_size: Optional[int] = None  # Uploaded size, for pages normalised on upload
+
+
+class DocumentSummary(BaseModel):
+    """Document in a listing: metadata only, no page contents."""
+
+    id: int
+    file_id: int
+    form_id: int
+    form_name: Optional[str] = None
+    name: Optional[str] = None
+    page_count: int
+    total_size: int  # Bytes of the pages in the blob store
+    bytes_saved: int = 0  # Uploaded minus stored bytes of pages normalised on upload
+    pages: List[DocumentPageInfo]
+    params: Optional[Dict[str, Any]] = None
+    created_at: datetime
+    updated_at: datetime
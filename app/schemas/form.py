@@ -24,6 +24,7 @@ class FormBase(BaseModel):
     description: str | None = None
     template: dict[str, Any] | None = None
     all_page_params: dict[str, Any] | None = Field(None, alias="allPageParams")
+    ocr_config: dict[str, Any] | None = Field(None, alias="ocrConfig")
 
     model_config = ConfigDict(populate_by_name=True)
 
@@ -4,7 +4,7 @@ from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel
 
-from app.models.ocr import JobStatus
+from app.models.ocr import ExtractionMode, JobKind, JobStatus
 
 
 class OCRScanRequest(BaseModel):
@@ -15,6 +15,13 @@ class OCRScanRequest(BaseModel):
     language: Optional[str] = None
 
 
+class OCRBatchRequest(BaseModel):
+    """Request schema for submitting several images for OCR at once."""
+
+    images: List[str]  # Base64 encoded images, processed as one job each
+    language: Optional[str] = None
+
+
 class OCRFieldParam(BaseModel):
     """Field parameter for region-based OCR extraction."""
 
@@ -37,25 +44,117 @@ class OCRExtractFieldsRequest(BaseModel):
     form_id: Optional[int] = None  # Optionally load params from a form
     document_id: Optional[int] = None  # Optionally save results to a document
     language: Optional[str] = None
+    mode: Optional[ExtractionMode] = None  # Overrides the form's ocr_config mode
 
 
 class OCRExtractFieldsResponse(BaseModel):
     """Response schema for field extraction."""
 
     fields: Dict[str, str]  # Map of field_id -> extracted text
+    sources: Dict[str, str] = {}  # Map of field_id -> "text_layer", "ocr" or "cache"
     document_id: Optional[int] = None  # If results were saved to a document
 
 
+class OCRCacheStats(BaseModel):
+    """Counters of the OCR result cache."""
+
+    hits: int
+    memory_hits: int
+    persistent_hits: int
+    misses: int
+    entries: int
+
+
+class OCRQueueStats(BaseModel):
+    """Admission queue depth, limits and timings."""
+
+    running: int
+    queued: int
+    max_running: int
+    max_queued: int
+    admitted: int
+    rejected: int
+    timed_out: int
+    avg_wait_seconds: float
+    avg_service_seconds: float
+
+
+class OCRLaneStats(BaseModel):
+    """Worker pool scheduling statistics of one lane."""
+
+    queued: int
+    running: int
+    completed: int
+    cancelled: int
+    wait_p50_seconds: float
+    wait_p95_seconds: float
+    latency_p50_seconds: float
+    latency_p95_seconds: float
+
+
+class OCRStatsResponse(BaseModel):
+    """Response schema for OCR service statistics."""
+
+    cache: OCRCacheStats
+    queue: OCRQueueStats
+    lanes: Dict[str, OCRLaneStats]
+
+
 class OCRJobResponse(BaseModel):
     """Response schema for OCR job."""
 
     id: int
     job_id: str
     status: JobStatus
+    kind: JobKind = JobKind.SCAN
     result_text: Optional[str] = None
     error_message: Optional[str] = None
+    attempts: int = 0
+    position: Optional[int] = None  # Index of the image within its batch
+    pages_total: Optional[int] = None  # Field extraction: pages with fields
+    pages_done: Optional[int] = None  # Field extraction: pages whose fields are stored
+    result_fields: Optional[Dict[str, str]] = None  # Field extraction: fields of the finished pages
+    field_sources: Optional[Dict[str, str]] = None  # Field extraction: map of field_id -> how it was read
     created_at: datetime
     updated_at: datetime
 
     class Config:
         from_attributes = True
+
+
+class OCRJobSummary(BaseModel):
+    """A job in a listing, without its input and results."""
+
+    job_id: str
+    status: JobStatus
+    kind: JobKind = JobKind.SCAN
+    attempts: int = 0
+    position: Optional[int] = None
+    pages_total: Optional[int] = None
+    pages_done: Optional[int] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class OCRJobListResponse(BaseModel):
+    """A page of jobs, newest first."""
+
+    jobs: List[OCRJobSummary]
+    next_cursor: Optional[str] = None  # Pass as cursor for the next page; None on the last page
+
+
+class OCRBatchResponse(BaseModel):
+    """Response schema for an OCR batch with aggregate progress."""
+
+    batch_id: str
+    status: str  # pending, processing, completed, failed (finished with failed jobs) or cancelled
+    total: int
+    counts: Dict[str, int]  # Jobs per status
+    progress: float  # Share of jobs that have finished, 0 to 1
+    created_at: datetime
+    cancelled_at: Optional[datetime] = None
+    jobs: Optional[List[OCRJobResponse]] = None
+    combined_text: Optional[str] = None  # Text of all completed jobs in submission order
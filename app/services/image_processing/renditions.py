@@ -0,0 +1,91 @@
+"""Preview renditions of page images.
+
+Every uploaded document page and form template page gets downscaled JPEG
+renditions in the fixed sizes of ``RENDITIONS``, stored as variants next to
+the page in the blob store. They are generated after the upload response has
+been sent (FastAPI background tasks), on a small thread pool of their own so
+that thumbnailing never competes with request handling for the default
+executor. Source images are decoded at reduced resolution where the format
+allows it (see ``ImageProcessingService.decode_reduced``); PDF pages are
+rendered from their first page at a low DPI.
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.services.image_processing.service import ImageProcessingService
+from app.services.ocr.rasterizer import PDFRasterizer
+from app.services.storage.blob_store import BlobStore
+
+logger = logging.getLogger(__name__)
+
+# Rendition name -> long edge in pixels
+RENDITIONS: Dict[str, int] = {"thumb": 200, "small": 640, "large": 1280}
+
+RENDITION_CONTENT_TYPE = "image/jpeg"
+
+# Enough for the large rendition of an A4 page
+PDF_PREVIEW_DPI = 120
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="renditions")
+
+
+def can_render(content_type: str) -> bool:
+    """Whether pages of a content type get renditions."""
+    return content_type.startswith("image/") or content_type == "application/pdf"
+
+
+class RenditionService:
+    """Generates and stores the renditions of pages in a blob store."""
+
+    def __init__(self, store: BlobStore, image_service: Optional[ImageProcessingService] = None):
+        self.store = store
+        self.image_service = image_service or ImageProcessingService()
+
+    def render(self, data: bytes, content_type: str, names: List[str]) -> Dict[str, bytes]:
+        """
+        Renditions of a page as JPEG bytes.
+
+        The page is decoded once, at the resolution the largest rendition
+        needs, and the smaller ones are scaled down from that.
+        """
+        largest = max(RENDITIONS[name] for name in names)
+        if content_type == "application/pdf":
+            with PDFRasterizer(data, dpi=PDF_PREVIEW_DPI) as rasterizer:
+                image = rasterizer.render(1)
+            if image is None:
+                raise ValueError("PDF has no pages")
+            image = np.ascontiguousarray(image)
+        else:
+            image = self.image_service.decode_reduced(data, largest)
+        return {name: self.image_service.thumbnail(image, RENDITIONS[name]) for name in names}
+
+    async def generate(self, digest: str, content_type: str) -> List[str]:
+        """
+        Store the renditions of a page that are missing.
+
+        Returns:
+            Names of the renditions generated
+        """
+        missing = [name for name in RENDITIONS if not await self.store.exists(digest, variant=name)]
+        if not missing or not can_render(content_type):
+            return []
+        data = await self.store.read(digest)
+        renditions = await asyncio.get_running_loop().run_in_executor(
+            _executor, self.render, data, content_type, missing
+        )
+        for name, rendition in renditions.items():
+            await self.store.put_variant(digest, name, rendition)
+        logger.debug(f"Generated renditions {missing} of {digest}")
+        return missing
+
+    async def generate_in_background(self, pages: List[Dict[str, str]]) -> None:
+        """Generate renditions of pages given as ``{"hash", "content_type"}``; failures are logged, not raised."""
+        for page in pages:
+            try:
+                await self.generate(page["hash"], page["content_type"])
+            except Exception as e:
+                logger.warning(f"Could not generate renditions of {page['hash']}: {str(e)}")
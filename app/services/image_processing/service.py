@@ -1,19 +1,103 @@
-"""Image processing service using OpenCV."""
-from typing import Optional, Tuple
+"""Image processing service using OpenCV.
+
+Images are passed around either as encoded bytes or as decoded NumPy arrays in
+OpenCV layout (HxW grayscale or HxWx3 BGR, uint8). Arrays let callers chain
+operations without re-encoding in between; crops of an array are views.
+"""
+import io
+from typing import Optional, Tuple, Union
 
 import cv2
 import numpy as np
+from PIL import Image, ImageOps
+
+ImageInput = Union[bytes, np.ndarray]
+
+# OpenCV decode flags for JPEG scaling in the DCT, largest reduction first
+_REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
 
 
 class ImageProcessingService:
     """Service for image processing operations."""
 
-    def match_and_rescale(self, image_data: bytes, template_data: bytes) -> bytes:
+    def decode(self, image: ImageInput, grayscale: bool = False) -> np.ndarray:
+        """Decode image bytes to an array; arrays are returned as-is (converted if grayscale)."""
+        if isinstance(image, np.ndarray):
+            if grayscale and image.ndim == 3:
+                return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            return image
+        flags = cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR
+        decoded = cv2.imdecode(np.frombuffer(image, np.uint8), flags)
+        if decoded is not None:
+            return decoded
+
+        # Formats OpenCV cannot read (e.g. GIF) go through Pillow, which needs
+        # to be told to apply the EXIF orientation as OpenCV does
+        try:
+            with Image.open(io.BytesIO(image)) as pil_image:
+                pixels = np.asarray(ImageOps.exif_transpose(pil_image).convert("L" if grayscale else "RGB"))
+        except Exception:
+            raise ValueError("Unsupported or corrupt image data")
+        return pixels if grayscale else cv2.cvtColor(pixels, cv2.COLOR_RGB2BGR)
+
+    def decode_reduced(self, image: bytes, min_size: int) -> np.ndarray:
+        """
+        Decode image bytes (BGR) at the smallest scale of 1/2, 1/4 or 1/8 whose long edge is still min_size.
+
+        JPEGs are scaled while decoding, so e.g. a 12 MP photo decoded at 1/8
+        never exists at full size in memory. Only the header is read to choose
+        the scale.
+        """
+        try:
+            with Image.open(io.BytesIO(image)) as pil_image:
+                long_edge = max(pil_image.size)
+        except Exception:
+            return self.decode(image)
+        for factor, flags in _REDUCED_DECODE_FLAGS:
+            if long_edge // factor >= min_size:
+                decoded = cv2.imdecode(np.frombuffer(image, np.uint8), flags)
+                if decoded is not None:
+                    return decoded
+                break
+        return self.decode(image)
+
+    def encode(self, image: np.ndarray, ext: str = ".jpg", quality: Optional[int] = None) -> bytes:
+        """Encode an array to image bytes in the format given by ``ext`` (``quality`` for JPEG)."""
+        params = [cv2.IMWRITE_JPEG_QUALITY, quality] if quality is not None else []
+        ok, buffer = cv2.imencode(ext, image, params)
+        if not ok:
+            raise ValueError(f"Could not encode image as {ext}")
+        return buffer.tobytes()
+
+    def downscale(self, image: np.ndarray, max_size: int) -> np.ndarray:
+        """Shrink an array to fit ``max_size`` pixels on its long edge; smaller arrays are returned as-is."""
+        height, width = image.shape[:2]
+        scale = max_size / max(height, width)
+        if scale >= 1:
+            return image
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+    def thumbnail(self, image_data: ImageInput, max_size: int, quality: int = 80) -> bytes:
+        """Downscale an image to fit ``max_size`` pixels on its long edge, as JPEG; never upscales."""
+        try:
+            img = self.decode_reduced(image_data, max_size) if isinstance(image_data, bytes) else image_data
+            return self.encode(self.downscale(img, max_size), ".jpg", quality)
+        except Exception as e:
+            raise Exception(f"Thumbnail failed: {str(e)}")
+
+    def match_and_rescale(
+        self, image_data: ImageInput, template_data: ImageInput, as_array: bool = False
+    ) -> Union[bytes, np.ndarray]:
         """Match and rescale image using SIFT and homography."""
         try:
             # Decode images
-            img = cv2.imdecode(np.frombuffer(image_data, np.uint8), cv2.IMREAD_COLOR)
-            template_img = cv2.imdecode(np.frombuffer(template_data, np.uint8), cv2.IMREAD_COLOR)
+            img = self.decode(image_data)
+            template_img = self.decode(template_data)
 
             # Convert to grayscale
             img_gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
@@ -49,27 +133,28 @@ class ImageProcessingService:
             rescaled = cv2.warpPerspective(img, M, (w, h))
 
             # Encode to JPEG
-            _, buffer = cv2.imencode(".jpg", rescaled)
-            return buffer.tobytes()
+            return rescaled if as_array else self.encode(rescaled)
         except Exception as e:
             raise Exception(f"Image processing failed: {str(e)}")
 
-    def extract_section(self, image_data: bytes, x: int, y: int, width: int, height: int) -> bytes:
-        """Extract a section from an image."""
+    def extract_section(
+        self, image_data: ImageInput, x: int, y: int, width: int, height: int, as_array: bool = False
+    ) -> Union[bytes, np.ndarray]:
+        """Extract a section from an image (a view of the source when as_array is set)."""
         try:
-            img = cv2.imdecode(np.frombuffer(image_data, np.uint8), cv2.IMREAD_COLOR)
+            img = self.decode(image_data)
             section = img[y : y + height, x : x + width]
-            _, buffer = cv2.imencode(".jpg", section)
-            return buffer.tobytes()
+            return section if as_array else self.encode(section)
         except Exception as e:
             raise Exception(f"Section extraction failed: {str(e)}")
 
-    def resize_image(self, image_data: bytes, width: int, height: int) -> bytes:
+    def resize_image(
+        self, image_data: ImageInput, width: int, height: int, as_array: bool = False
+    ) -> Union[bytes, np.ndarray]:
         """Resize an image."""
         try:
-            img = cv2.imdecode(np.frombuffer(image_data, np.uint8), cv2.IMREAD_COLOR)
+            img = self.decode(image_data)
             resized = cv2.resize(img, (width, height))
-            _, buffer = cv2.imencode(".jpg", resized)
-            return buffer.tobytes()
+            return resized if as_array else self.encode(resized)
         except Exception as e:
             raise Exception(f"Image resize failed: {str(e)}")
@@ -0,0 +1,166 @@
+"""Admission control for OCR requests.
+
+The worker pool itself has an unbounded queue, so without a limit a burst of
+requests is accepted, queued, and processed long after the clients have given
+up. The controller bounds the number of OCR requests that run at once and the
+number allowed to wait for a slot. Anything beyond that is rejected straight
+away with a retry hint derived from the measured service time, and requests
+that wait longer than the queue timeout are dropped instead of being served
+late.
+
+``/ocr/extract-fields`` reserves its tickets from the controller of the API
+process. Scan jobs are queued in the database and run by the OCR workers;
+the controller admits them against OCR_JOB_MAX_PENDING pending jobs (see
+``admit_jobs``), counting their rejections with its own and estimating
+their retry hint the same way: the work ahead times the measured service
+time, over the units running at once.
+"""
+import asyncio
+import logging
+import math
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Weight of the newest sample in the moving averages
+EWMA_ALPHA = 0.2
+
+
+class QueueFullError(Exception):
+    """Raised when an OCR request cannot be admitted."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionTicket:
+    """A reserved place in the OCR queue; entering it waits for a slot and runs the work."""
+
+    def __init__(self, controller: "AdmissionController"):
+        self.controller = controller
+        self.enqueued_at = time.monotonic()
+        self._state = "queued"
+        self._started_at: Optional[float] = None
+
+    async def __aenter__(self) -> "AdmissionTicket":
+        try:
+            await self.controller._start(self)
+        except BaseException:
+            self._state = "done"
+            raise
+        self._state = "running"
+        self._started_at = time.monotonic()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.controller._finish(self, time.monotonic() - self._started_at)
+        self._state = "done"
+
+    def cancel(self) -> None:
+        """Give the reservation back without running (only valid before entering)."""
+        if self._state == "queued":
+            self.controller._leave_queue()
+            self._state = "done"
+
+
+class AdmissionController:
+    """Bounded concurrency plus a bounded wait queue, with service and wait time statistics."""
+
+    def __init__(self, max_running: int, max_queued: int, queue_timeout: float):
+        self.max_running = max(1, max_running)
+        self.max_queued = max(0, max_queued)
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(self.max_running)
+        self.running = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.avg_wait_seconds = 0.0
+        self.avg_service_seconds: Optional[float] = None
+
+    @staticmethod
+    def estimate_retry_after(ahead: int, service_seconds: Optional[float], parallelism: int) -> int:
+        """Seconds until ``ahead`` units have been served, ``parallelism`` at a time."""
+        service = service_seconds or 1.0
+        return max(1, math.ceil(service * ahead / max(1, parallelism)))
+
+    def retry_after(self) -> int:
+        """Seconds until a new request could be expected to start."""
+        return self.estimate_retry_after(self.queued + 1, self.avg_service_seconds, self.max_running)
+
+    def reserve(self) -> AdmissionTicket:
+        """
+        Take a place in the queue.
+
+        Raises:
+            QueueFullError: If the requests running and waiting already fill the queue
+        """
+        if self.running + self.queued >= self.max_running + self.max_queued:
+            self.rejected += 1
+            raise QueueFullError("OCR queue is full", self.retry_after())
+        self.queued += 1
+        return AdmissionTicket(self)
+
+    def admit_jobs(
+        self, incoming: int, pending: int, running: int, service_seconds: Optional[float], max_pending: int
+    ) -> None:
+        """
+        Admit ``incoming`` jobs to the job queue of the OCR workers.
+
+        Args:
+            incoming: Jobs to be queued
+            pending: Jobs already waiting for a worker
+            running: Jobs the workers are running
+            service_seconds: Measured run time of a job, None if not known yet
+            max_pending: Most jobs allowed to wait
+
+        Raises:
+            QueueFullError: If the jobs would not fit in the queue
+        """
+        if pending + incoming > max_pending:
+            self.rejected += 1
+            raise QueueFullError(
+                "OCR job queue is full", self.estimate_retry_after(pending + 1, service_seconds, running)
+            )
+
+    async def _start(self, ticket: AdmissionTicket) -> None:
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise QueueFullError("Timed out waiting for an OCR slot", self.retry_after())
+        finally:
+            self.queued -= 1
+
+        self.running += 1
+        self.admitted += 1
+        wait = time.monotonic() - ticket.enqueued_at
+        self.avg_wait_seconds += EWMA_ALPHA * (wait - self.avg_wait_seconds)
+
+    def _finish(self, ticket: AdmissionTicket, service_seconds: float) -> None:
+        self.running -= 1
+        self._slots.release()
+        if self.avg_service_seconds is None:
+            self.avg_service_seconds = service_seconds
+        else:
+            self.avg_service_seconds += EWMA_ALPHA * (service_seconds - self.avg_service_seconds)
+
+    def _leave_queue(self) -> None:
+        self.queued -= 1
+
+    def stats(self) -> Dict[str, float]:
+        """Current queue depth, limits, counters and average wait/service times."""
+        return {
+            "running": self.running,
+            "queued": self.queued,
+            "max_running": self.max_running,
+            "max_queued": self.max_queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_wait_seconds": round(self.avg_wait_seconds, 3),
+            "avg_service_seconds": round(self.avg_service_seconds or 0.0, 3),
+        }
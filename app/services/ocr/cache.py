@@ -0,0 +1,104 @@
+"""Content-addressed cache for recognised field text.
+
+Entries are keyed by a hash of the page content, the field rectangle, the
+language and the engine settings, so a re-submitted scan with unchanged
+fields is answered without running OCR. Lookups go to a bounded in-process
+LRU first and, when enabled, to the ``ocr_cache_entries`` table, which
+survives restarts and is shared by all app instances. Entries of the table
+expire after OCR_CACHE_TTL_DAYS (see ``app/services/ocr/retention.py``).
+"""
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.repositories.ocr_cache_repository import OCRCacheRepository
+
+logger = logging.getLogger(__name__)
+
+
+def content_digest(*parts: object) -> str:
+    """SHA-256 over the given parts; bytes are hashed as-is, everything else as text."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class OCRResultCache:
+    """Two-tier (memory LRU + optional database) cache of region text."""
+
+    def __init__(self, max_entries: int, session_factory: Optional[async_sessionmaker] = None):
+        self.max_entries = max_entries
+        self.session_factory = session_factory
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.persistent_hits
+
+    def _remember(self, key: str, text: str) -> None:
+        with self._lock:
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """Return the cached text for every key that is present in either tier."""
+        found: Dict[str, str] = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    found[key] = self._entries[key]
+                else:
+                    missing.append(key)
+            self.memory_hits += len(found)
+
+        stored: Dict[str, str] = {}
+        if missing and self.session_factory is not None:
+            try:
+                async with self.session_factory() as session:
+                    stored = await OCRCacheRepository(session).get_many(missing)
+            except Exception as e:
+                logger.warning(f"OCR cache lookup failed: {str(e)}")
+            for key, text in stored.items():
+                self._remember(key, text)
+            found.update(stored)
+            self.persistent_hits += len(stored)
+
+        self.misses += len(missing) - len(stored)
+        return found
+
+    async def set_many(self, items: Dict[str, str]) -> None:
+        """Store recognised text in both tiers."""
+        if not items:
+            return
+        for key, text in items.items():
+            self._remember(key, text)
+        if self.session_factory is not None:
+            try:
+                async with self.session_factory() as session:
+                    await OCRCacheRepository(session).put_many(items)
+            except Exception as e:
+                logger.warning(f"OCR cache write failed: {str(e)}")
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size of the memory tier."""
+        return {
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+        }
@@ -0,0 +1,164 @@
+"""Cancellation of OCR work that is already running.
+
+Cancelling an asyncio task only stops the coroutine: a unit of OCR that has
+been handed to the worker pool keeps its thread, and the ``tesseract``,
+``pdftoppm`` or ``pdftotext`` process that thread is waiting on keeps
+running to the end. The scheduler therefore runs every unit with a
+``CancelToken`` in its context. Subprocesses started through
+``run_cancellable`` register with the token of the unit they belong to and
+are killed when that unit is cancelled, and loops over fields call
+``raise_if_cancelled`` so a cancelled unit stops at the next field.
+
+``cancel_on_disconnect`` ties the work of a request to the client: it runs
+the request's extraction and cancels it as soon as the client goes away.
+"""
+import asyncio
+import contextvars
+import logging
+import subprocess
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Any, Awaitable, Callable, Iterator, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class OCRCancelledError(Exception):
+    """Raised in a worker thread when the unit of work it is running was cancelled."""
+
+
+class ClientDisconnectedError(Exception):
+    """Raised when the client of a request went away before its OCR finished."""
+
+
+class CancelToken:
+    """Cancellation flag of one unit of work, plus the subprocesses it is waiting on."""
+
+    def __init__(self):
+        self._cancelled = threading.Event()
+        self._processes: Set[subprocess.Popen] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        """Mark the unit cancelled and kill the subprocesses it has running."""
+        with self._lock:
+            self._cancelled.set()
+            processes = list(self._processes)
+        for process in processes:
+            _kill(process)
+
+    @contextmanager
+    def track(self, process: subprocess.Popen) -> Iterator[None]:
+        """Kill ``process`` if the unit is cancelled while the block runs."""
+        with self._lock:
+            self._processes.add(process)
+            cancelled = self.cancelled
+        if cancelled:
+            _kill(process)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._processes.discard(process)
+
+
+def _kill(process: subprocess.Popen) -> None:
+    try:
+        process.kill()
+    except OSError:  # already exited
+        pass
+
+
+_current_token: contextvars.ContextVar[Optional[CancelToken]] = contextvars.ContextVar("ocr_cancel_token", default=None)
+
+
+def bind_token(token: CancelToken, fn: Callable[..., Any], *args: Any) -> Callable[[], Any]:
+    """``fn(*args)`` as a callable that runs with ``token`` as the current token, e.g. in a pool thread."""
+    context = contextvars.copy_context()
+    context.run(_current_token.set, token)
+    return lambda: context.run(fn, *args)
+
+
+def raise_if_cancelled() -> None:
+    """Stop the current unit of work if it has been cancelled."""
+    token = _current_token.get()
+    if token is not None and token.cancelled:
+        raise OCRCancelledError("OCR work was cancelled")
+
+
+def run_cancellable(
+    command: Sequence[str], input: Optional[bytes] = None, timeout: Optional[float] = None
+) -> Tuple[int, bytes, bytes]:
+    """
+    Run a command to completion, killing it if the current unit of work is cancelled.
+
+    Args:
+        command: Program and arguments
+        input: Bytes written to the program's stdin
+        timeout: Seconds after which the program is killed
+
+    Returns:
+        Return code, stdout and stderr of the program
+
+    Raises:
+        OCRCancelledError: If the unit of work was cancelled
+        subprocess.TimeoutExpired: If the program ran longer than ``timeout``
+    """
+    raise_if_cancelled()
+    token = _current_token.get()
+    process = subprocess.Popen(
+        command,
+        stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    with token.track(process) if token is not None else nullcontext():
+        try:
+            stdout, stderr = process.communicate(input, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            raise
+        except (BrokenPipeError, ValueError):
+            # Killed while its stdin was being written
+            process.wait()
+            stdout, stderr = b"", b""
+    raise_if_cancelled()
+    return process.returncode, stdout, stderr
+
+
+async def cancel_on_disconnect(
+    work: Awaitable[Any], is_disconnected: Callable[[], Awaitable[bool]], poll_interval: float
+) -> Any:
+    """
+    Await ``work``, cancelling it if the client disconnects first.
+
+    Args:
+        work: The request's OCR
+        is_disconnected: Check for the client having gone away, e.g. ``Request.is_disconnected``
+        poll_interval: Seconds between checks
+
+    Returns:
+        Result of ``work``
+
+    Raises:
+        ClientDisconnectedError: If the client went away and the work was cancelled
+    """
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await is_disconnected():
+                break
+    finally:
+        if not task.done():
+            task.cancel()
+            # Wait for the page and field tasks to unwind so nothing is left queued
+            await asyncio.gather(task, return_exceptions=True)
+    raise ClientDisconnectedError("Client disconnected before OCR finished")
@@ -0,0 +1,228 @@
+"""Tesseract engine backends used by the OCR service.
+
+``pytesseract`` shells out to the ``tesseract`` binary for every call, which
+means a process spawn and a traineddata load per region.
+``tesserocr`` binds libtesseract directly, so an initialised engine can be kept
+around and fed raw pixels straight from memory.  The pool below keeps a fixed
+number of such engines per language and hands them out to worker threads.
+
+Images are NumPy arrays in OpenCV layout (HxW grayscale or HxWx3 BGR), as
+produced by ImageProcessingService and the PDF rasterizer. ``image_to_string``
+takes an optional RecognitionProfile (segmentation mode, engine mode and
+character whitelist) for the field being read.
+"""
+import io
+import logging
+import os
+import queue
+import shlex
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pytesseract
+from PIL import Image
+
+from app.services.ocr.cancellation import run_cancellable
+from app.services.ocr.layout import OCRWord, parse_tsv
+from app.services.ocr.profiles import OEM_DEFAULT, PSM_AUTO, RecognitionProfile
+
+try:
+    import tesserocr
+except ImportError:  # pragma: no cover - depends on the build environment
+    tesserocr = None
+
+logger = logging.getLogger(__name__)
+
+
+class OCREngine:
+    """Common interface for Tesseract backends."""
+
+    name = "base"
+
+    def image_to_string(self, image: np.ndarray, lang: str, profile: Optional[RecognitionProfile] = None) -> str:
+        """Recognise all text in ``image``, with Tesseract's defaults unless a profile is given."""
+        raise NotImplementedError
+
+    def image_to_words(self, image: np.ndarray, lang: str) -> List[OCRWord]:
+        """Recognise ``image`` once and return its words with bounding boxes."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release any resources held by the engine."""
+
+
+class PytesseractEngine(OCREngine):
+    """Backend that runs one ``tesseract`` subprocess per call.
+
+    The image is piped to the process on stdin and the result read from
+    stdout, through ``run_cancellable`` so the process is killed when the
+    unit of work it belongs to is cancelled.
+    """
+
+    name = "pytesseract"
+
+    def __init__(self, tesseract_cmd: Optional[str] = None):
+        if tesseract_cmd:
+            pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+
+    @staticmethod
+    def _to_pnm(image: np.ndarray) -> bytes:
+        """Encode pixels as uncompressed PGM/PPM, the cheapest format for tesseract to read."""
+        buffer = io.BytesIO()
+        Image.fromarray(image[..., ::-1] if image.ndim == 3 else image).save(buffer, format="PPM")
+        return buffer.getvalue()
+
+    @staticmethod
+    def _run(image: np.ndarray, lang: str, config: str = "", extension: Optional[str] = None) -> str:
+        command = [pytesseract.pytesseract.tesseract_cmd, "stdin", "stdout", "-l", lang, *shlex.split(config)]
+        if extension:
+            command.append(extension)
+        try:
+            returncode, stdout, stderr = run_cancellable(command, PytesseractEngine._to_pnm(image))
+        except FileNotFoundError:
+            raise pytesseract.TesseractNotFoundError()
+        if returncode:
+            raise pytesseract.TesseractError(returncode, stderr.decode("utf-8", "ignore").strip())
+        return stdout.decode("utf-8", "ignore")
+
+    def image_to_string(self, image: np.ndarray, lang: str, profile: Optional[RecognitionProfile] = None) -> str:
+        return self._run(image, lang, profile.tesseract_args() if profile else "")
+
+    def image_to_words(self, image: np.ndarray, lang: str) -> List[OCRWord]:
+        return parse_tsv(self._run(image, lang, extension="tsv"))
+
+
+class TesserocrEnginePool(OCREngine):
+    """Pool of long-lived libtesseract engines, up to ``size`` per language and engine mode.
+
+    Engines are created lazily on first demand and returned to the pool after
+    each call, so the traineddata for a language is loaded at most ``size``
+    times per engine mode for the lifetime of the process. The engine mode is
+    fixed when an engine is initialised; segmentation mode and whitelist are
+    set per call.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, size: int, tessdata_path: Optional[str] = None):
+        if tesserocr is None:
+            raise RuntimeError("tesserocr is not installed")
+        self.size = max(1, size)
+        self.tessdata_path = tessdata_path
+        self._pools: Dict[Tuple[str, int], "queue.LifoQueue"] = {}
+        self._created: Dict[Tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+
+    def _new_api(self, lang: str, oem: int):
+        kwargs = {"lang": lang}
+        if oem != OEM_DEFAULT:
+            kwargs["oem"] = oem
+        if self.tessdata_path:
+            # libtesseract expects the trailing separator on the data path
+            kwargs["path"] = os.path.join(self.tessdata_path, "")
+        logger.info(f"Initialising tesseract engine for '{lang}' (oem {oem})")
+        return tesserocr.PyTessBaseAPI(**kwargs)
+
+    @contextmanager
+    def _acquire(self, lang: str, oem: int = OEM_DEFAULT) -> Iterator:
+        """Check an engine out of the pool for ``lang`` and ``oem``, creating one if allowed."""
+        key = (lang, oem)
+        api = None
+        with self._lock:
+            pool = self._pools.setdefault(key, queue.LifoQueue())
+            try:
+                api = pool.get_nowait()
+            except queue.Empty:
+                if self._created.get(key, 0) < self.size:
+                    self._created[key] = self._created.get(key, 0) + 1
+                    create = True
+                else:
+                    create = False
+
+        if api is None:
+            if create:
+                try:
+                    api = self._new_api(lang, oem)
+                except Exception:
+                    with self._lock:
+                        self._created[key] -= 1
+                    raise
+            else:
+                api = pool.get()
+
+        try:
+            yield api
+        finally:
+            api.Clear()
+            pool.put(api)
+
+    @staticmethod
+    def _set_image(api, image: np.ndarray) -> None:
+        """Hand raw pixels to the engine; only the (possibly strided) region is copied."""
+        if image.ndim == 3:
+            image = image[..., ::-1]  # BGR -> RGB
+        height, width = image.shape[:2]
+        bytes_per_pixel = 1 if image.ndim == 2 else image.shape[2]
+        api.SetImageBytes(image.tobytes(), width, height, bytes_per_pixel, width * bytes_per_pixel)
+
+    @staticmethod
+    def _set_profile(api, profile: Optional[RecognitionProfile]) -> None:
+        """Apply segmentation mode and whitelist; both persist on the engine, so always set them."""
+        api.SetPageSegMode(profile.psm if profile else PSM_AUTO)
+        api.SetVariable("tessedit_char_whitelist", (profile.whitelist or "") if profile else "")
+
+    def image_to_string(self, image: np.ndarray, lang: str, profile: Optional[RecognitionProfile] = None) -> str:
+        with self._acquire(lang, profile.oem if profile else OEM_DEFAULT) as api:
+            self._set_profile(api, profile)
+            self._set_image(api, image)
+            return api.GetUTF8Text()
+
+    def image_to_words(self, image: np.ndarray, lang: str) -> List[OCRWord]:
+        with self._acquire(lang) as api:
+            self._set_profile(api, None)
+            self._set_image(api, image)
+            return parse_tsv(api.GetTSVText(0))
+
+    def close(self) -> None:
+        with self._lock:
+            for pool in self._pools.values():
+                while True:
+                    try:
+                        pool.get_nowait().End()
+                    except queue.Empty:
+                        break
+            self._pools.clear()
+            self._created.clear()
+
+
+def build_engine(
+    backend: str = "auto",
+    pool_size: int = 0,
+    tesseract_cmd: Optional[str] = None,
+    tessdata_path: Optional[str] = None,
+) -> OCREngine:
+    """
+    Create the OCR engine for ``backend``.
+
+    Args:
+        backend: "tesserocr", "pytesseract" or "auto" (tesserocr when installed)
+        pool_size: Engines per language for the tesserocr pool, 0 for one per core
+        tesseract_cmd: Path to the tesseract binary for the pytesseract backend
+        tessdata_path: Directory containing the traineddata files
+
+    Returns:
+        Configured OCR engine
+    """
+    if backend not in ("auto", "tesserocr", "pytesseract"):
+        raise ValueError(f"Unknown OCR engine '{backend}'")
+
+    if backend in ("auto", "tesserocr"):
+        if tesserocr is not None:
+            return TesserocrEnginePool(size=pool_size or os.cpu_count() or 1, tessdata_path=tessdata_path)
+        if backend == "tesserocr":
+            raise RuntimeError("OCR_ENGINE is 'tesserocr' but tesserocr is not installed")
+        logger.info("tesserocr not installed, falling back to pytesseract")
+
+    return PytesseractEngine(tesseract_cmd)
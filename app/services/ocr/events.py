@@ -0,0 +1,185 @@
+"""Push notifications of OCR job state changes.
+
+``GET /ocr/jobs/{job_id}/events`` streams a job's state to the client
+instead of having it poll. Each stream subscribes to the in-process
+``JobEventBroker`` for its job. Scan jobs run in worker processes, so the
+broker of an API process is fed in one of two ways:
+
+* PostgreSQL: workers send every state change with ``pg_notify``, and each
+  API instance LISTENs on the channel (``PostgresNotifyBridge``). Every
+  instance sees every change, whichever worker made it.
+* Otherwise: a single ``JobStatusPoller`` per process reads the jobs that
+  have open streams in one batched query per interval. That is one query for
+  all watchers, rather than one per client poll.
+
+Events carry the job's state and page progress only. The result is read
+once, when a stream sees its job finish; NOTIFY payloads are limited to 8000 bytes.
+"""
+import asyncio
+import json
+import logging
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from app.core.config import get_settings
+from app.models.ocr import JobStatus, OCRJob
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+NOTIFY_CHANNEL = "ocr_job_events"
+TERMINAL_STATUSES = {JobStatus.COMPLETED.value, JobStatus.FAILED.value, JobStatus.CANCELLED.value}
+# Error messages are truncated to keep NOTIFY payloads well below the size limit
+MAX_EVENT_ERROR_LENGTH = 1000
+# Job ids per query of the poller
+POLL_BATCH_SIZE = 500
+
+
+def job_event(job: OCRJob) -> Dict[str, Any]:
+    """State of a job as pushed to subscribers."""
+    status = job.status.value if isinstance(job.status, JobStatus) else job.status
+    return {
+        "job_id": job.job_id,
+        "status": status,
+        "attempts": job.attempts or 0,
+        "pages_done": job.pages_done,
+        "pages_total": job.pages_total,
+        "error_message": (job.error_message or "")[:MAX_EVENT_ERROR_LENGTH] or None,
+        "updated_at": job.updated_at.isoformat() if job.updated_at else None,
+    }
+
+
+class JobEventBroker:
+    """In-process fan-out of job events to the streams watching each job."""
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    @contextmanager
+    def subscribe(self, job_id: str) -> Iterator[asyncio.Queue]:
+        """Queue receiving the events of ``job_id`` while the block runs."""
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            queues = self._subscribers.get(job_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[job_id]
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """Deliver an event to the subscribers of its job."""
+        for queue in self._subscribers.get(event["job_id"], ()):
+            queue.put_nowait(event)
+
+    def watched(self) -> List[str]:
+        """Ids of the jobs that currently have subscribers."""
+        return list(self._subscribers)
+
+
+broker = JobEventBroker()
+
+
+async def notify_job_event(session: AsyncSession, job: OCRJob) -> None:
+    """
+    Announce a job's new state from the process that changed it.
+
+    Subscribers in this process get it directly. On PostgreSQL (unless
+    OCR_EVENTS_PG_NOTIFY is off) it is also sent with ``pg_notify`` to the API
+    instances listening on the channel.
+    """
+    event = job_event(job)
+    broker.publish(event)
+    if settings.OCR_EVENTS_PG_NOTIFY and session.get_bind().dialect.name == "postgresql":
+        await session.execute(
+            text("SELECT pg_notify(:channel, :payload)"), {"channel": NOTIFY_CHANNEL, "payload": json.dumps(event)}
+        )
+        await session.commit()
+
+
+class JobStatusPoller:
+    """Batched polling of the watched jobs, for databases without LISTEN/NOTIFY."""
+
+    def __init__(self, events: JobEventBroker, session_factory: async_sessionmaker[AsyncSession], interval: float):
+        self.events = events
+        self.session_factory = session_factory
+        self.interval = interval
+        self._seen: Dict[str, Tuple[Any, ...]] = {}
+
+    async def poll_once(self) -> int:
+        """Publish the state of watched jobs that changed since the last poll; returns the number published."""
+        watched = self.events.watched()
+        # Forget jobs nobody watches any more
+        self._seen = {job_id: state for job_id, state in self._seen.items() if job_id in watched}
+        published = 0
+        for start in range(0, len(watched), POLL_BATCH_SIZE):
+            async with self.session_factory() as session:
+                result = await session.execute(
+                    select(OCRJob).where(OCRJob.job_id.in_(watched[start : start + POLL_BATCH_SIZE]))
+                )
+                jobs = list(result.scalars().all())
+            for job in jobs:
+                event = job_event(job)
+                state = (event["status"], event["attempts"], event["pages_done"], event["updated_at"])
+                if self._seen.get(job.job_id) != state:
+                    self._seen[job.job_id] = state
+                    self.events.publish(event)
+                    published += 1
+        return published
+
+    async def run(self) -> None:
+        """Poll until cancelled."""
+        while True:
+            try:
+                await self.poll_once()
+            except Exception as e:
+                logger.warning(f"Polling job status failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+
+class PostgresNotifyBridge:
+    """Republishes job events NOTIFYed by any process into the local broker."""
+
+    def __init__(self, events: JobEventBroker, engine: AsyncEngine, reconnect_delay: float = 5.0):
+        self.events = events
+        self.engine = engine
+        self.reconnect_delay = reconnect_delay
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            self.events.publish(json.loads(payload))
+        except (ValueError, KeyError) as e:
+            logger.warning(f"Ignoring malformed job event: {str(e)}")
+
+    async def run(self) -> None:
+        """Listen until cancelled, reconnecting if the connection drops."""
+        while True:
+            listener: Optional[Any] = None
+            try:
+                async with self.engine.connect() as conn:
+                    raw = await conn.get_raw_connection()
+                    listener = raw.driver_connection
+                    await listener.add_listener(NOTIFY_CHANNEL, self._on_notify)
+                    logger.info(f"Listening for job events on '{NOTIFY_CHANNEL}'")
+                    while not listener.is_closed():
+                        await asyncio.sleep(self.reconnect_delay)
+                    logger.warning("Job event listener connection closed, reconnecting")
+            except asyncio.CancelledError:
+                if listener is not None and not listener.is_closed():
+                    await listener.remove_listener(NOTIFY_CHANNEL, self._on_notify)
+                raise
+            except Exception as e:
+                logger.error(f"Job event listener failed: {str(e)}")
+            await asyncio.sleep(self.reconnect_delay)
+
+
+def job_event_source(engine: AsyncEngine, session_factory: async_sessionmaker[AsyncSession]):
+    """What feeds the broker of this process: the NOTIFY bridge on PostgreSQL, otherwise the poller."""
+    if settings.OCR_EVENTS_PG_NOTIFY and engine.dialect.name == "postgresql":
+        return PostgresNotifyBridge(broker, engine)
+    return JobStatusPoller(broker, session_factory, settings.OCR_EVENTS_POLL_SECONDS)
@@ -0,0 +1,88 @@
+"""Word-level OCR layout helpers.
+
+Used by the single-pass extraction mode: a page is recognised once with word
+bounding boxes, and the words are then assigned to the form field rectangles.
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+
+
+@dataclass
+class OCRWord:
+    """A recognised word and its bounding box in page pixels."""
+
+    text: str
+    left: float
+    top: float
+    right: float
+    bottom: float
+    conf: float = -1.0
+
+    @property
+    def center(self) -> Tuple[float, float]:
+        return (self.left + self.right) / 2, (self.top + self.bottom) / 2
+
+
+def parse_tsv(tsv: str) -> List[OCRWord]:
+    """
+    Parse Tesseract TSV output into words.
+
+    Both ``tesseract ... tsv`` (with header row) and libtesseract's
+    ``GetTSVText`` (without) are accepted. Only word-level rows with text are kept.
+    """
+    words = []
+    for line in tsv.splitlines():
+        columns = line.split("\t")
+        if len(columns) < 12 or columns[0] != "5":
+            continue
+        text = columns[11].strip()
+        if not text:
+            continue
+        left, top, width, height = (float(value) for value in columns[6:10])
+        words.append(OCRWord(text, left, top, left + width, top + height, float(columns[10])))
+    return words
+
+
+class WordIndex:
+    """Uniform grid over word centres for fast rectangle queries."""
+
+    def __init__(self, words: Iterable[OCRWord], cell_size: float = 256):
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], List[OCRWord]] = defaultdict(list)
+        for word in words:
+            cx, cy = word.center
+            self._cells[(int(cx // cell_size), int(cy // cell_size))].append(word)
+
+    def query(self, x1: float, y1: float, x2: float, y2: float) -> List[OCRWord]:
+        """Return the words whose centre lies inside the rectangle."""
+        found = []
+        for col in range(int(x1 // self.cell_size), int(x2 // self.cell_size) + 1):
+            for row in range(int(y1 // self.cell_size), int(y2 // self.cell_size) + 1):
+                for word in self._cells.get((col, row), ()):
+                    cx, cy = word.center
+                    if x1 <= cx <= x2 and y1 <= cy <= y2:
+                        found.append(word)
+        return found
+
+
+def group_lines(words: Iterable[OCRWord]) -> List[List[OCRWord]]:
+    """Group words into text lines, top to bottom and left to right."""
+    lines: List[List[OCRWord]] = []
+    bounds: List[Tuple[float, float]] = []
+    for word in sorted(words, key=lambda w: w.center[1]):
+        cy = word.center[1]
+        if lines and bounds[-1][0] <= cy <= bounds[-1][1]:
+            lines[-1].append(word)
+            top, bottom = bounds[-1]
+            bounds[-1] = (min(top, word.top), max(bottom, word.bottom))
+        else:
+            lines.append([word])
+            bounds.append((word.top, word.bottom))
+    return [sorted(line, key=lambda w: w.left) for line in lines]
+
+
+def words_to_text(words: Iterable[OCRWord], multiline: bool = False) -> str:
+    """Rebuild field text from its words in reading order."""
+    lines = [" ".join(word.text for word in line) for line in group_lines(words)]
+    return ("\n" if multiline else " ").join(lines)
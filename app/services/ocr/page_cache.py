@@ -0,0 +1,106 @@
+"""Disk cache of rendered PDF pages.
+
+Rendering a page with poppler usually costs more than OCR of a handful of
+fields, and the same documents are extracted again and again. Pages are
+stored as raw ``.npy`` arrays keyed by the PDF content hash, page number, DPI
+and colour mode. A cached page is opened with ``np.load(mmap_mode="r")``, so
+it is neither decoded nor read in full; cropping a field only touches the
+rows it covers.
+
+The directory is bounded by total size. When a write takes it over the limit,
+the least recently used files (by mtime, refreshed on every hit) are removed.
+Several processes may share one directory: files are written to a temp name
+and renamed into place, so readers never see a partial page.
+"""
+import logging
+import os
+import tempfile
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+
+from app.services.ocr.cache import content_digest
+
+logger = logging.getLogger(__name__)
+
+
+class RenderedPageCache:
+    """Size-bounded directory of memory-mappable page images."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._evict_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(
+        pdf_digest: str, page: int, dpi: int, grayscale: bool, region: Optional[Tuple[int, int, int, int]] = None
+    ) -> str:
+        """Cache key of one rendered page, or of a (x, y, width, height) region of it."""
+        return content_digest(pdf_digest, page, dpi, "gray" if grayscale else "bgr", region or "page")
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.npy")
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Memory-map a cached page, or return None if it is not cached."""
+        path = self._path(key)
+        try:
+            image = np.load(path, mmap_mode="r", allow_pickle=False)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable cached page {key}: {str(e)}")
+            self._remove(path)
+            return None
+        return image
+
+    def put(self, key: str, image: np.ndarray) -> None:
+        """Store a rendered page and evict old pages if the cache is over its size limit."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, image, allow_pickle=False)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning(f"Failed to cache rendered page {key}: {str(e)}")
+            self._remove(tmp_path)
+            return
+        self._evict()
+
+    def _evict(self) -> None:
+        """Remove least recently used pages until the directory fits in max_bytes."""
+        with self._evict_lock:
+            entries = []
+            total = 0
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not entry.name.endswith(".npy"):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+
+            if total <= self.max_bytes:
+                return
+
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+            logger.debug(f"Rendered page cache trimmed to {total} bytes")
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,161 @@
+"""Page-at-a-time PDF rasterization."""
+import io
+import logging
+import math
+import os
+import tempfile
+import threading
+from typing import List, Optional
+
+import numpy as np
+from pdf2image import convert_from_path, pdfinfo_from_path
+from PIL import Image
+
+from app.services.ocr.cache import content_digest
+from app.services.ocr.cancellation import run_cancellable
+from app.services.ocr.layout import OCRWord
+from app.services.ocr.page_cache import RenderedPageCache
+from app.services.ocr.text_layer import read_text_layer
+
+logger = logging.getLogger(__name__)
+
+
+def render_region(
+    path: str, page: int, dpi: int, x: int, y: int, width: int, height: int, grayscale: bool
+) -> Optional[Image.Image]:
+    """Render a pixel rectangle of one page with ``pdftoppm -x -y -W -H``; None if the page does not exist."""
+    command = ["pdftoppm", "-f", str(page), "-l", str(page), "-r", str(dpi)]
+    command += ["-x", str(x), "-y", str(y), "-W", str(width), "-H", str(height)]
+    if grayscale:
+        command.append("-gray")
+    command.append(path)
+
+    returncode, stdout, stderr = run_cancellable(command, timeout=120)
+    if returncode != 0 or not stdout:
+        stderr = stderr.decode("utf-8", "ignore")
+        if "Wrong page range" in stderr or not stderr:
+            return None
+        raise RuntimeError(f"pdftoppm failed: {stderr.strip()}")
+    image = Image.open(io.BytesIO(stdout))
+    image.load()
+    return image
+
+
+class PDFRasterizer:
+    """
+    Render individual PDF pages on demand.
+
+    The PDF is written to a temp file on first use so that every page render is
+    a single ``pdftoppm -f N -l N`` call; pages are never rendered unless asked for.
+    Pages come back as arrays in OpenCV layout (grayscale, or BGR as a view over
+    the rendered RGB pixels) so they can be cropped without copying.
+
+    With a page cache, pages rendered before (same PDF content, DPI and colour
+    mode) are memory-mapped from disk and poppler is not run at all.
+    """
+
+    def __init__(
+        self,
+        pdf_data: bytes,
+        dpi: int = 300,
+        grayscale: bool = False,
+        cache: Optional[RenderedPageCache] = None,
+    ):
+        self.dpi = dpi
+        self.grayscale = grayscale
+        self.cache = cache
+        self.digest = content_digest(pdf_data)
+        self._pdf_data = pdf_data
+        self._path: Optional[str] = None
+        self._path_lock = threading.Lock()
+
+    def __enter__(self) -> "PDFRasterizer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def path(self) -> str:
+        """Temp file holding the PDF, written on first access."""
+        with self._path_lock:
+            if self._path is None:
+                fd, path = tempfile.mkstemp(suffix=".pdf")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(self._pdf_data)
+                self._path = path
+            return self._path
+
+    def page_count(self) -> int:
+        """Number of pages in the document."""
+        return int(pdfinfo_from_path(self.path)["Pages"])
+
+    def render(self, page: int) -> Optional[np.ndarray]:
+        """Render one page (1-based), or return None if it does not exist."""
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.key(self.digest, page, self.dpi, self.grayscale)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                logger.debug(f"Rendered page {page} served from cache")
+                return cached
+
+        images = convert_from_path(
+            self.path,
+            dpi=self.dpi,
+            first_page=page,
+            last_page=page,
+            grayscale=self.grayscale,
+        )
+        if not images:
+            logger.warning(f"PDF has no page {page}")
+            return None
+        pixels = np.asarray(images[0])
+        image = pixels[..., ::-1] if pixels.ndim == 3 else pixels
+
+        if cache_key is not None:
+            self.cache.put(cache_key, image)
+        return image
+
+    def render_region(
+        self, page: int, dpi: int, left: float, top: float, right: float, bottom: float
+    ) -> Optional[np.ndarray]:
+        """
+        Render part of a page at ``dpi``.
+
+        The rectangle is given in pixels at the rasterizer's own DPI; the image
+        returned starts at ``floor(left * dpi / self.dpi)``, ``floor(top * dpi / self.dpi)``.
+        Returns None if the page does not exist.
+        """
+        scale = dpi / self.dpi
+        x, y = math.floor(left * scale), math.floor(top * scale)
+        width, height = math.ceil(right * scale) - x, math.ceil(bottom * scale) - y
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.key(self.digest, page, dpi, self.grayscale, region=(x, y, width, height))
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        region = render_region(self.path, page, dpi, x, y, width, height, self.grayscale)
+        if region is None:
+            logger.warning(f"PDF has no page {page}")
+            return None
+        pixels = np.asarray(region)
+        image = pixels[..., ::-1] if pixels.ndim == 3 else pixels
+
+        if cache_key is not None:
+            self.cache.put(cache_key, image)
+        return image
+
+    def text_words(self, page: int) -> Optional[List[OCRWord]]:
+        """Words of the page's embedded text layer in pixels at this DPI, or None if unavailable."""
+        return read_text_layer(self.path, page, self.dpi)
+
+    def close(self) -> None:
+        """Remove the temp copy of the PDF."""
+        with self._path_lock:
+            if self._path is not None and os.path.exists(self._path):
+                os.unlink(self._path)
+            self._path = None
@@ -0,0 +1,159 @@
+"""Planning of region-only PDF renders.
+
+Field rectangles are defined in pixels of a page rendered at the base DPI
+(``OCR_PDF_DPI``). Instead of rendering the whole page at that resolution,
+each field gets the DPI that brings its box to a height Tesseract reads well:
+small print is rendered sharper, large print coarser. Fields at the same DPI
+are rendered together only when they are close: two renders are merged while
+their bounding rectangle is not much larger than the two of them, so fields
+far apart never pull the page between them into a render. A sparse form
+costs a few small renders instead of a full page; when the renders would
+add up to more than a share of the page rendered at the base DPI, the whole
+page is rendered instead (the plan is None).
+"""
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+Box = Tuple[float, float, float, float]
+
+A4_INCHES = (8.27, 11.69)  # Form templates are laid out on A4 pages
+
+
+@dataclass
+class RegionRender:
+    """One render of a page region: a DPI, the region in base-DPI pixels and the fields inside it."""
+
+    dpi: int
+    left: float
+    top: float
+    right: float
+    bottom: float
+    params: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def area(self) -> float:
+        """Area of the region in base-DPI pixels."""
+        return (self.right - self.left) * (self.bottom - self.top)
+
+    def rendered_pixels(self, base_dpi: int) -> float:
+        """Pixels of the region rendered at its DPI."""
+        return self.area * (self.dpi / base_dpi) ** 2
+
+    def bounds_with(self, other: "RegionRender") -> Box:
+        """Bounding rectangle of this region and ``other``."""
+        return (
+            min(self.left, other.left),
+            min(self.top, other.top),
+            max(self.right, other.right),
+            max(self.bottom, other.bottom),
+        )
+
+    def scaled_params(self, base_dpi: int) -> List[Dict[str, Any]]:
+        """Field params translated into the pixel space of the rendered region."""
+        scale = self.dpi / base_dpi
+        origin_x = math.floor(self.left * scale)
+        origin_y = math.floor(self.top * scale)
+        scaled = []
+        for param in self.params:
+            param = dict(param)
+            param["x1"] = float(param["x1"]) * scale - origin_x
+            param["x2"] = float(param["x2"]) * scale - origin_x
+            param["y1"] = float(param["y1"]) * scale - origin_y
+            param["y2"] = float(param["y2"]) * scale - origin_y
+            scaled.append(param)
+        return scaled
+
+
+def field_dpi(
+    box_height: float,
+    base_dpi: int,
+    target_height: int,
+    min_dpi: int,
+    max_dpi: int,
+    step: int = 50,
+) -> int:
+    """
+    DPI at which a single-line box of ``box_height`` base pixels is ``target_height`` pixels tall.
+
+    The result is rounded to ``step`` so that fields of similar size share a render.
+    """
+    if box_height <= 0:
+        return base_dpi
+    dpi = base_dpi * target_height / box_height
+    dpi = int(round(dpi / step) * step)
+    return max(min_dpi, min(max_dpi, dpi))
+
+
+def _merge_nearby(renders: List[RegionRender], max_waste: float) -> List[RegionRender]:
+    """Merge renders (of one DPI) whose bounding rectangle exceeds their combined area by at most ``max_waste``."""
+    merged = True
+    while merged:
+        merged = False
+        for i, render in enumerate(renders):
+            for other in renders[i + 1 :]:
+                left, top, right, bottom = render.bounds_with(other)
+                if (right - left) * (bottom - top) <= (render.area + other.area) * (1 + max_waste):
+                    render.left, render.top, render.right, render.bottom = left, top, right, bottom
+                    render.params.extend(other.params)
+                    renders.remove(other)
+                    merged = True
+                    break
+            if merged:
+                break
+    return renders
+
+
+def a4_page_area(dpi: int) -> float:
+    """Area of an A4 page in pixels at ``dpi``."""
+    width, height = A4_INCHES
+    return (width * dpi) * (height * dpi)
+
+
+def plan_region_renders(
+    page_params: List[Dict[str, Any]],
+    base_dpi: int,
+    target_height: int,
+    min_dpi: int,
+    max_dpi: int,
+    page_area: Optional[float] = None,
+    max_page_share: float = 0.5,
+    padding: float = 8,
+    max_waste: float = 0.5,
+) -> Optional[List[RegionRender]]:
+    """
+    Group the fields of a page into region renders.
+
+    Args:
+        page_params: Field definitions with id, x1, y1, x2, y2 in base-DPI pixels
+        base_dpi: Resolution the field coordinates refer to
+        target_height: Desired pixel height of a single-line field
+        min_dpi: Lowest DPI to render at
+        max_dpi: Highest DPI to render at
+        page_area: Area of the page in base-DPI pixels, if known
+        max_page_share: Share of ``page_area`` the rendered pixels may add up to
+        padding: Margin in base-DPI pixels added around each field
+        max_waste: How much larger than two renders their merged rectangle may be
+
+    Returns:
+        Region renders in ascending DPI order, or None if rendering the whole
+        page would be cheaper. Fields with invalid coordinates are left out.
+    """
+    by_dpi: Dict[int, List[RegionRender]] = {}
+    for param in page_params:
+        try:
+            x1, y1, x2, y2 = (float(param[name]) for name in ("x1", "y1", "x2", "y2"))
+        except (KeyError, TypeError, ValueError):
+            continue
+        if x2 <= x1 or y2 <= y1:
+            continue
+
+        # A multiline box holds an unknown number of lines, so its height says nothing about the print size
+        dpi = base_dpi if param.get("isMultiline") else field_dpi(y2 - y1, base_dpi, target_height, min_dpi, max_dpi)
+        render = RegionRender(dpi, max(0.0, x1 - padding), max(0.0, y1 - padding), x2 + padding, y2 + padding, [param])
+        by_dpi.setdefault(dpi, []).append(render)
+
+    renders = [render for dpi in sorted(by_dpi) for render in _merge_nearby(by_dpi[dpi], max_waste)]
+    if page_area and sum(render.rendered_pixels(base_dpi) for render in renders) > max_page_share * page_area:
+        return None
+    return renders
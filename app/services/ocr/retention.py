@@ -0,0 +1,175 @@
+"""Retention of finished OCR jobs.
+
+Every job keeps its input image (``payload``) and its results, so
+``ocr_jobs`` would grow without bound. Retention runs in the workers
+(``app/worker.py``) every OCR_JOB_RETENTION_INTERVAL_SECONDS and:
+
+* compacts finished jobs older than OCR_JOB_COMPACT_AFTER_HOURS by dropping
+  their input, which is by far the largest part of a row;
+* purges finished jobs older than OCR_JOB_RETENTION_DAYS, optionally writing
+  them to gzipped JSON lines in OCR_JOB_ARCHIVE_DIR first, then batches left
+  without jobs;
+* expires entries of the persistent OCR result cache (``ocr_cache_entries``)
+  older than OCR_CACHE_TTL_DAYS. Hits do not extend an entry; an expired
+  field is simply recognised again.
+
+All work in batches of OCR_JOB_PURGE_BATCH_SIZE rows, one short transaction
+each, so they never hold long locks on the queue. Several workers running
+retention at once only repeat each other's work.
+"""
+import asyncio
+import gzip
+import json
+import logging
+import os
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import get_settings
+from app.models.ocr import OCRJob
+from app.repositories.ocr_batch_repository import OCRBatchRepository
+from app.repositories.ocr_cache_repository import OCRCacheRepository
+from app.repositories.ocr_repository import OCRRepository, utcnow
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Columns written to the archive; the input image is not kept
+ARCHIVED_COLUMNS = (
+    "job_id",
+    "kind",
+    "status",
+    "owner",
+    "attempts",
+    "result_text",
+    "result_fields",
+    "field_sources",
+    "error_message",
+    "created_at",
+    "updated_at",
+)
+
+
+def archive_record(job: OCRJob) -> Dict[str, Any]:
+    """A job as one archive line."""
+    record = {}
+    for column in ARCHIVED_COLUMNS:
+        value = getattr(job, column)
+        if hasattr(value, "isoformat"):
+            value = value.isoformat()
+        elif hasattr(value, "value"):
+            value = value.value
+        record[column] = value
+    return record
+
+
+def write_archive(path: str, jobs: List[OCRJob]) -> None:
+    """Append jobs to a gzipped JSON lines file, flushed to disk before returning."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    lines = "".join(json.dumps(archive_record(job), ensure_ascii=False) + "\n" for job in jobs)
+    with open(path, "ab") as f:
+        # Each append is a complete gzip member; readers see one stream
+        f.write(gzip.compress(lines.encode("utf-8")))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class JobRetention:
+    """Compacts and purges finished jobs, and expires cached OCR results, in batches."""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        retention_days: Optional[float] = None,
+        compact_after_hours: Optional[float] = None,
+        archive_dir: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        cache_ttl_days: Optional[float] = None,
+    ):
+        self.session_factory = session_factory
+        self.retention_days = settings.OCR_JOB_RETENTION_DAYS if retention_days is None else retention_days
+        self.compact_after_hours = (
+            settings.OCR_JOB_COMPACT_AFTER_HOURS if compact_after_hours is None else compact_after_hours
+        )
+        self.archive_dir = settings.OCR_JOB_ARCHIVE_DIR if archive_dir is None else archive_dir
+        self.batch_size = max(1, batch_size or settings.OCR_JOB_PURGE_BATCH_SIZE)
+        self.cache_ttl_days = settings.OCR_CACHE_TTL_DAYS if cache_ttl_days is None else cache_ttl_days
+
+    async def compact(self) -> int:
+        """Drop the input of old finished jobs; returns the number compacted."""
+        if self.compact_after_hours <= 0:
+            return 0
+        cutoff = utcnow() - timedelta(hours=self.compact_after_hours)
+        compacted = 0
+        while True:
+            async with self.session_factory() as session:
+                count = await OCRRepository(session).compact_finished(cutoff, self.batch_size)
+            compacted += count
+            if count < self.batch_size:
+                return compacted
+
+    async def purge(self) -> int:
+        """Delete (and archive) finished jobs past retention; returns the number deleted."""
+        if self.retention_days <= 0:
+            return 0
+        cutoff = utcnow() - timedelta(days=self.retention_days)
+        archive_path = None
+        if self.archive_dir:
+            archive_path = os.path.join(self.archive_dir, f"ocr_jobs_{utcnow():%Y%m%dT%H%M%S}.jsonl.gz")
+
+        purged = 0
+        while True:
+            async with self.session_factory() as session:
+                repo = OCRRepository(session)
+                jobs = await repo.finished_before(cutoff, self.batch_size)
+                if not jobs:
+                    break
+                if archive_path:
+                    # Archived before deleting: a crash in between archives a job twice, never zero times
+                    await asyncio.get_running_loop().run_in_executor(None, write_archive, archive_path, jobs)
+                purged += await repo.delete_ids([job.id for job in jobs])
+            if len(jobs) < self.batch_size:
+                break
+
+        async with self.session_factory() as session:
+            await OCRBatchRepository(session).delete_empty(cutoff)
+        return purged
+
+    async def purge_cache(self) -> int:
+        """Delete persistent OCR cache entries past their TTL; returns the number deleted."""
+        if self.cache_ttl_days <= 0:
+            return 0
+        cutoff = utcnow() - timedelta(days=self.cache_ttl_days)
+        purged = 0
+        while True:
+            async with self.session_factory() as session:
+                count = await OCRCacheRepository(session).delete_before(cutoff, self.batch_size)
+            purged += count
+            if count < self.batch_size:
+                return purged
+
+    async def run_once(self) -> Dict[str, int]:
+        """Compact, then purge jobs and cache entries."""
+        compacted = await self.compact()
+        purged = await self.purge()
+        cache_purged = await self.purge_cache()
+        if compacted or purged or cache_purged:
+            logger.info(
+                f"OCR job retention: compacted {compacted}, purged {purged}, expired {cache_purged} cache entries"
+            )
+        return {"compacted": compacted, "purged": purged, "cache_purged": cache_purged}
+
+    async def run(self, stop: asyncio.Event, interval: Optional[float] = None) -> None:
+        """Run retention every ``interval`` seconds until ``stop`` is set."""
+        interval = interval or settings.OCR_JOB_RETENTION_INTERVAL_SECONDS
+        while not stop.is_set():
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"OCR job retention failed: {str(e)}")
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,202 @@
+"""Fair-share scheduling of OCR work on the worker pool.
+
+Every blocking unit of OCR work (decoding an image, rendering a page, reading
+a field or a page) goes through the scheduler instead of straight into the
+thread pool's FIFO queue. The scheduler keeps at most ``max_in_flight`` units
+in the pool and takes waiting units round-robin per owner (a form, or the
+calling client), so a 40-page job gets one page in turn with every other
+caller instead of running all its pages first.
+
+Interactive work (``/ocr/extract-fields``) runs in the API processes and
+batch work (``/ocr/scan`` jobs) in the OCR workers, each on its own pool, so
+batch work never delays interactive work and no lane priority is needed. The
+lane of a unit is only used to report its queueing and latency.
+
+The lane and owner of the current request are carried in a context variable
+set by the API layer and the workers (see ``work_context``); tasks spawned
+for pages and fields inherit it.
+
+A unit whose caller is cancelled while it waits is dropped from the queue; a
+unit already running has its cancel token fired, which kills the subprocess it
+is waiting on (see ``cancellation``); the cancellation reaches the caller,
+and the pool slot is given back, only once its thread has finished.
+"""
+import asyncio
+import contextvars
+import logging
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Executor
+from contextlib import contextmanager
+from enum import Enum
+from typing import Any, Callable, Deque, Dict, Iterator, Optional, Tuple
+
+from app.services.ocr.cancellation import CancelToken, bind_token
+
+logger = logging.getLogger(__name__)
+
+# Completed units kept per lane for latency percentiles
+LATENCY_WINDOW = 1000
+
+
+class Lane(str, Enum):
+    """Scheduling lane of OCR work."""
+
+    INTERACTIVE = "interactive"
+    BATCH = "batch"
+
+
+_work_context: contextvars.ContextVar[Tuple[Lane, str]] = contextvars.ContextVar(
+    "ocr_work_context", default=(Lane.INTERACTIVE, "anonymous")
+)
+
+
+@contextmanager
+def work_context(lane: Lane, owner: str) -> Iterator[None]:
+    """Run the enclosed OCR calls (and the tasks they spawn) in ``lane`` on behalf of ``owner``."""
+    token = _work_context.set((lane, owner))
+    try:
+        yield
+    finally:
+        _work_context.reset(token)
+
+
+class _WorkItem:
+    __slots__ = ("lane", "granted", "enqueued_at", "cancelled")
+
+    def __init__(self, lane: Lane, granted: asyncio.Future):
+        self.lane = lane
+        self.granted = granted
+        self.enqueued_at = time.monotonic()
+        self.cancelled = False
+
+
+class _FairQueue:
+    """Per-owner FIFO queues served round-robin."""
+
+    def __init__(self):
+        self._owners: "OrderedDict[str, Deque[_WorkItem]]" = OrderedDict()
+        self.sizes = {lane: 0 for lane in Lane}
+
+    def push(self, owner: str, item: _WorkItem) -> None:
+        self._owners.setdefault(owner, deque()).append(item)
+        self.sizes[item.lane] += 1
+
+    def pop(self) -> Optional[_WorkItem]:
+        while self._owners:
+            owner, items = next(iter(self._owners.items()))
+            item = items.popleft()
+            if items:
+                self._owners.move_to_end(owner)
+            else:
+                del self._owners[owner]
+            if not item.cancelled:
+                self.sizes[item.lane] -= 1
+                return item
+        return None
+
+
+class _LaneStats:
+    def __init__(self):
+        self.completed = 0
+        self.cancelled = 0
+        self.running = 0
+        self.waits: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    @staticmethod
+    def _percentile(values: Deque[float], fraction: float) -> float:
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def snapshot(self, queued: int) -> Dict[str, float]:
+        return {
+            "queued": queued,
+            "running": self.running,
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "wait_p50_seconds": round(self._percentile(self.waits, 0.5), 4),
+            "wait_p95_seconds": round(self._percentile(self.waits, 0.95), 4),
+            "latency_p50_seconds": round(self._percentile(self.latencies, 0.5), 4),
+            "latency_p95_seconds": round(self._percentile(self.latencies, 0.95), 4),
+        }
+
+
+class WorkScheduler:
+    """Per-owner round-robin dispatcher in front of a thread pool."""
+
+    def __init__(self, executor: Executor, max_in_flight: int):
+        self.executor = executor
+        self.max_in_flight = max(1, max_in_flight)
+        self._queue = _FairQueue()
+        self._stats = {lane: _LaneStats() for lane in Lane}
+        self._in_flight = 0
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run ``fn(*args)`` on the pool once the scheduler gives it a slot."""
+        lane, owner = _work_context.get()
+        loop = asyncio.get_running_loop()
+        item = _WorkItem(lane, loop.create_future())
+        self._queue.push(owner, item)
+        self._dispatch()
+
+        try:
+            await item.granted
+        except asyncio.CancelledError:
+            if item.granted.done() and not item.granted.cancelled():
+                # Slot was granted just before the cancellation arrived
+                self._release()
+            else:
+                item.cancelled = True
+                self._queue.sizes[lane] -= 1
+                self._stats[lane].cancelled += 1
+            raise
+
+        stats = self._stats[lane]
+        started = time.monotonic()
+        stats.waits.append(started - item.enqueued_at)
+        stats.running += 1
+        token = CancelToken()
+        future = loop.run_in_executor(self.executor, bind_token(token, fn, *args))
+        # The slot is held until the thread is done, also when the caller stops waiting for it
+        future.add_done_callback(lambda _: self._finish(item))
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # The thread cannot be interrupted, but the process it waits on can
+            token.cancel()
+            stats.cancelled += 1
+            # Return only once the thread is done, so the caller can free what it uses
+            while not future.done():
+                try:
+                    await asyncio.wait([future])
+                except asyncio.CancelledError:
+                    pass
+            raise
+
+    def _finish(self, item: _WorkItem) -> None:
+        stats = self._stats[item.lane]
+        stats.running -= 1
+        stats.completed += 1
+        stats.latencies.append(time.monotonic() - item.enqueued_at)
+        self._release()
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._in_flight < self.max_in_flight:
+            item = self._queue.pop()
+            if item is None:
+                return
+            if item.granted.done():
+                continue
+            self._in_flight += 1
+            item.granted.set_result(None)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Queue depth, running units and wait/latency percentiles per lane."""
+        return {lane.value: self._stats[lane].snapshot(self._queue.sizes[lane]) for lane in Lane}
@@ -1,16 +1,28 @@
-"""OCR service using pytesseract."""
+"""OCR service using Tesseract."""
 import asyncio
 import base64
-import io
 import logging
+import os
+import tempfile
 from concurrent.futures import ThreadPoolExecutor
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
 
-import pytesseract
-from pdf2image import convert_from_bytes
-from PIL import Image
+import numpy as np
 
 from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.models.ocr import ExtractionMode
+from app.services.image_processing.service import ImageProcessingService
+from app.services.ocr.admission import AdmissionController
+from app.services.ocr.cache import OCRResultCache, content_digest
+from app.services.ocr.cancellation import raise_if_cancelled
+from app.services.ocr.engine import build_engine
+from app.services.ocr.layout import OCRWord, WordIndex, words_to_text
+from app.services.ocr.page_cache import RenderedPageCache
+from app.services.ocr.profiles import RecognitionProfile, resolve_profile
+from app.services.ocr.rasterizer import PDFRasterizer
+from app.services.ocr.regions import a4_page_area, plan_region_renders
+from app.services.ocr.scheduler import WorkScheduler
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -20,47 +32,112 @@ class OCRService:
     """Service for OCR operations using Tesseract."""
 
     def __init__(self):
-        if settings.TESSERACT_PATH:
-            pytesseract.pytesseract.tesseract_cmd = settings.TESSERACT_PATH
-        # Thread pool for CPU-bound OCR operations
+        self.engine = build_engine(
+            settings.OCR_ENGINE,
+            pool_size=settings.OCR_ENGINE_POOL_SIZE,
+            tesseract_cmd=settings.TESSERACT_PATH,
+            tessdata_path=settings.TESSDATA_PATH,
+        )
+        self.image_processing = ImageProcessingService()
+        self.admission = AdmissionController(
+            max_running=settings.OCR_MAX_RUNNING_REQUESTS,
+            max_queued=settings.OCR_QUEUE_MAX_DEPTH,
+            queue_timeout=settings.OCR_QUEUE_TIMEOUT_SECONDS,
+        )
+        self.cache: Optional[OCRResultCache] = None
+        if settings.OCR_CACHE_ENABLED:
+            self.cache = OCRResultCache(
+                max_entries=settings.OCR_CACHE_MAX_ENTRIES,
+                session_factory=AsyncSessionLocal if settings.OCR_CACHE_PERSISTENT else None,
+            )
+        self.page_cache: Optional[RenderedPageCache] = None
+        if settings.OCR_PAGE_CACHE_ENABLED:
+            self.page_cache = RenderedPageCache(
+                settings.OCR_PAGE_CACHE_DIR or os.path.join(tempfile.gettempdir(), "inuka-page-cache"),
+                settings.OCR_PAGE_CACHE_MAX_BYTES,
+            )
+        # Thread pool for CPU-bound OCR operations, fed by the fair-share scheduler
         self.executor = ThreadPoolExecutor(max_workers=settings.WORKER_POOL_SIZE)
+        self.scheduler = WorkScheduler(self.executor, max_in_flight=settings.WORKER_POOL_SIZE)
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Hit/miss counters of the OCR result cache."""
+        if self.cache is None:
+            return {"hits": 0, "memory_hits": 0, "persistent_hits": 0, "misses": 0, "entries": 0}
+        return self.cache.stats()
+
+    def close(self) -> None:
+        """Stop the worker threads and release the OCR engines."""
+        self.executor.shutdown(wait=True)
+        self.engine.close()
 
     def _is_pdf(self, data: bytes) -> bool:
         """Check if data is a PDF file by examining magic bytes."""
         return data.startswith(b"%PDF")
 
-    def _extract_text_from_pdf_sync(self, pdf_data: bytes, language: Optional[str] = None) -> str:
-        """Synchronous PDF to text extraction (runs in thread pool)."""
-        logger.info("Converting PDF to images for OCR processing")
+    def _rasterizer(self, pdf_data: bytes) -> PDFRasterizer:
+        """Create a page-at-a-time rasterizer with the configured render settings."""
+        return PDFRasterizer(
+            pdf_data, dpi=settings.OCR_PDF_DPI, grayscale=settings.OCR_PDF_GRAYSCALE, cache=self.page_cache
+        )
 
-        # Convert PDF pages to images
-        images = convert_from_bytes(pdf_data, dpi=300)
+    @staticmethod
+    def _params_by_page(all_page_params: Dict[str, List[Dict[str, Any]]]) -> Dict[int, List[Dict[str, Any]]]:
+        """Map page number to its field params for pages with fields, in ascending page order."""
+        by_page = {}
+        for page_key, page_params in all_page_params.items():
+            if not page_params:
+                continue
+            try:
+                by_page[int(page_key)] = page_params
+            except ValueError:
+                logger.warning(f"Ignoring params for invalid page key '{page_key}'")
+        return dict(sorted(by_page.items()))
+
+    def _extract_page_text_sync(self, rasterizer: PDFRasterizer, page_num: int, lang: str) -> str:
+        """Text of one PDF page: its text layer if it has one, otherwise OCR of the rendered page."""
+        # Digitally generated pages carry their text; only render and OCR the others
+        words = rasterizer.text_words(page_num) if settings.OCR_PDF_TEXT_LAYER else None
+        if words:
+            logger.debug(f"Using text layer of PDF page {page_num}")
+            return words_to_text(words, multiline=True)
+
+        image = rasterizer.render(page_num)
+        if image is None:
+            return ""
+        logger.debug(f"Processing PDF page {page_num}")
+        return self.engine.image_to_string(image, lang)
+
+    async def _extract_text_from_pdf(self, pdf_data: bytes, language: Optional[str] = None) -> str:
+        """PDF to text extraction, one scheduled work unit per page."""
+        logger.info("Rendering PDF pages for OCR processing")
 
         # Use configured language or default
         lang = language or settings.OCR_LANGUAGES
 
-        # Extract text from each page
+        # Render and OCR one page at a time so only a single page is held in memory
         all_text = []
-        for page_num, image in enumerate(images, start=1):
-            logger.debug(f"Processing PDF page {page_num}/{len(images)}")
-            page_text = pytesseract.image_to_string(image, lang=lang)
-            if page_text.strip():
-                all_text.append(f"--- Page {page_num} ---\n{page_text.strip()}")
+        with self._rasterizer(pdf_data) as rasterizer:
+            page_count = await self.scheduler.run(rasterizer.page_count)
+            for page_num in range(1, page_count + 1):
+                page_text = await self.scheduler.run(self._extract_page_text_sync, rasterizer, page_num, lang)
+                if page_text.strip():
+                    all_text.append(f"--- Page {page_num} ---\n{page_text.strip()}")
 
         result = "\n\n".join(all_text)
-        logger.info(f"Extracted text from {len(images)} PDF pages")
+        logger.info(f"Extracted text from {page_count} PDF pages")
         return result
 
     def _extract_text_from_image_sync(self, image_data: bytes, language: Optional[str] = None) -> str:
         """Synchronous image text extraction (runs in thread pool)."""
-        # Convert bytes to PIL Image
-        image = Image.open(io.BytesIO(image_data))
+        # Decode bytes to pixels
+        image = self._load_image_sync(image_data)
 
         # Use configured language or default
         lang = language or settings.OCR_LANGUAGES
 
         # Extract text
-        text = pytesseract.image_to_string(image, lang=lang)
+        text = self.engine.image_to_string(image, lang)
         return text.strip()
 
     async def extract_text(self, image_data: bytes, language: Optional[str] = None) -> str:
@@ -69,16 +146,11 @@ class OCRService:
             # Check if it's a PDF
             if self._is_pdf(image_data):
                 logger.info("Detected PDF file, using PDF extraction")
-                # Run blocking PDF OCR operation in thread pool
-                loop = asyncio.get_event_loop()
-                text = await loop.run_in_executor(self.executor, self._extract_text_from_pdf_sync, image_data, language)
+                text = await self._extract_text_from_pdf(image_data, language)
             else:
                 logger.info("Detected image file, using direct OCR")
                 # Run blocking image OCR operation in thread pool
-                loop = asyncio.get_event_loop()
-                text = await loop.run_in_executor(
-                    self.executor, self._extract_text_from_image_sync, image_data, language
-                )
+                text = await self.scheduler.run(self._extract_text_from_image_sync, image_data, language)
             return text
         except Exception as e:
             raise Exception(f"OCR processing failed: {str(e)}")
@@ -91,45 +163,62 @@ class OCRService:
 
     def _extract_region_text_sync(
         self,
-        image: Image.Image,
+        image: np.ndarray,
         x1: float,
         y1: float,
         x2: float,
         y2: float,
         language: Optional[str] = None,
+        profile: Optional[RecognitionProfile] = None,
     ) -> str:
         """Extract text from a specific region of an image."""
-        # Crop the region
-        region = image.crop((int(x1), int(y1), int(x2), int(y2)))
+        # Crop the region (a view, clipped to the image bounds)
+        region = image[max(int(y1), 0) : int(y2), max(int(x1), 0) : int(x2)]
+        if region.size == 0:
+            return ""
 
         # Use configured language or default
         lang = language or settings.OCR_LANGUAGES
 
         # Extract text from region
-        text = pytesseract.image_to_string(region, lang=lang)
+        text = self.engine.image_to_string(region, lang, profile)
         return text.strip()
 
     def _extract_fields_from_image_sync(
         self,
-        image_data: bytes,
+        image: np.ndarray,
         page_params: List[Dict[str, Any]],
         language: Optional[str] = None,
+        mode: ExtractionMode = ExtractionMode.REGION,
+        failed: Optional[Set[str]] = None,
+        profiles: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, str]:
         """
         Extract text from multiple regions defined by page_params.
 
         Args:
-            image_data: Image bytes
+            image: Page image
             page_params: List of field definitions with id, x1, y1, x2, y2
             language: OCR language
+            mode: REGION runs OCR per field, PAGE runs it once and maps words to fields
+            failed: Optional set that collects the ids of fields whose OCR raised
+            profiles: Recognition profile overrides (the "profiles" section of a form's ocr_config)
 
         Returns:
             Dictionary mapping field id to extracted text
         """
-        image = Image.open(io.BytesIO(image_data))
         results = {}
 
+        word_index = None
+        if mode == ExtractionMode.PAGE:
+            try:
+                word_index = WordIndex(self.engine.image_to_words(image, language or settings.OCR_LANGUAGES))
+            except Exception as e:
+                logger.error(f"Page OCR failed, falling back to per-region OCR: {str(e)}")
+
         for param in page_params:
+            # A cancelled unit stops here instead of reading its remaining fields
+            raise_if_cancelled()
             field_id = param.get("id")
             if not field_id:
                 continue
@@ -145,7 +234,12 @@ class OCRService:
                     logger.warning(f"Invalid region for field {field_id}: ({x1},{y1}) to ({x2},{y2})")
                     continue
 
-                text = self._extract_region_text_sync(image, x1, y1, x2, y2, language)
+                if word_index is not None:
+                    words = word_index.query(x1, y1, x2, y2)
+                    text = words_to_text(words, multiline=bool(param.get("isMultiline")))
+                else:
+                    profile = resolve_profile(param, profiles)
+                    text = self._extract_region_text_sync(image, x1, y1, x2, y2, language, profile)
                 results[field_id] = text
                 logger.debug(
                     f"Extracted field {field_id}: {text[:50]}..."
@@ -155,7 +249,210 @@ class OCRService:
             except Exception as e:
                 logger.error(f"Failed to extract field {field_id}: {str(e)}")
                 results[field_id] = ""
+                if failed is not None:
+                    failed.add(field_id)
+
+        return results
+
+    @staticmethod
+    def _fields_from_words(words: List[OCRWord], page_params: List[Dict[str, Any]]) -> Dict[str, str]:
+        """Text of every field that has words inside its rectangle; fields without words are left out."""
+        word_index = WordIndex(words)
+        results = {}
+        for param in page_params:
+            field_id = param.get("id")
+            try:
+                x1, y1, x2, y2 = (float(param.get(name, 0)) for name in ("x1", "y1", "x2", "y2"))
+            except (TypeError, ValueError):
+                continue
+            if not field_id or x2 <= x1 or y2 <= y1:
+                continue
+            text = words_to_text(word_index.query(x1, y1, x2, y2), multiline=bool(param.get("isMultiline")))
+            if text:
+                results[field_id] = text
+        return results
 
+    def _load_image_sync(self, image_data: bytes) -> np.ndarray:
+        """Decode image bytes once into grayscale pixels shared by all field tasks."""
+        return self.image_processing.decode(image_data, grayscale=True)
+
+    async def _extract_page_fields(
+        self,
+        image: np.ndarray,
+        page_params: List[Dict[str, Any]],
+        language: Optional[str],
+        mode: ExtractionMode,
+        failed: Optional[Set[str]] = None,
+        profiles: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, str]:
+        """
+        Extract the fields of one page on the thread pool.
+
+        In REGION mode every field is its own task, so the fields of a page are
+        recognised in parallel; in PAGE mode the single OCR pass is one task.
+        Results keep the order of page_params.
+        """
+        if mode == ExtractionMode.PAGE:
+            return await self.scheduler.run(
+                self._extract_fields_from_image_sync,
+                image,
+                page_params,
+                language,
+                mode,
+                failed,
+                profiles,
+            )
+
+        field_results = await asyncio.gather(
+            *(
+                self.scheduler.run(
+                    self._extract_fields_from_image_sync,
+                    image,
+                    [param],
+                    language,
+                    mode,
+                    failed,
+                    profiles,
+                )
+                for param in page_params
+            )
+        )
+        results: Dict[str, str] = {}
+        for field_result in field_results:
+            results.update(field_result)
+        return results
+
+    def _field_cache_keys(
+        self,
+        page_digest: str,
+        page_params: List[Dict[str, Any]],
+        language: Optional[str],
+        mode: ExtractionMode,
+        profiles: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, str]:
+        """Cache key for every field of a page, from page content, region, language and engine settings."""
+        lang = language or settings.OCR_LANGUAGES
+        keys = {}
+        for param in page_params:
+            field_id = param.get("id")
+            if not field_id:
+                continue
+            try:
+                box = [round(float(param.get(name, 0)), 2) for name in ("x1", "y1", "x2", "y2")]
+            except (TypeError, ValueError):
+                continue
+            profile = resolve_profile(param, profiles) if mode == ExtractionMode.REGION else None
+            keys[field_id] = content_digest(
+                page_digest, *box, bool(param.get("isMultiline")), lang, mode.value, self.engine.name, profile
+            )
+        return keys
+
+    async def _extract_page_fields_cached(
+        self,
+        page_digest: str,
+        extract: Callable[[List[Dict[str, Any]], Set[str]], Awaitable[Optional[Dict[str, str]]]],
+        page_params: List[Dict[str, Any]],
+        language: Optional[str],
+        mode: ExtractionMode,
+        sources: Optional[Dict[str, str]] = None,
+        profiles: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, str]:
+        """
+        Extract the fields of one page, answering what it can from the result cache.
+
+        ``extract(params, failed)`` loads (decodes or renders) the page and runs
+        OCR for the given fields; it is only called when at least one field is
+        not cached, and returns None if the page does not exist. Failed fields
+        are not cached. ``sources`` receives "cache" or "ocr" per field.
+        """
+        keys = self._field_cache_keys(page_digest, page_params, language, mode, profiles) if self.cache else {}
+        cached = await self.cache.get_many(keys.values()) if self.cache and keys else {}
+
+        fresh: Dict[str, str] = {}
+        pending = [param for param in page_params if keys.get(param.get("id")) not in cached]
+        if pending:
+            failed: Set[str] = set()
+            fresh = await extract(pending, failed)
+            if fresh is None:
+                return {}
+            if self.cache:
+                await self.cache.set_many(
+                    {
+                        keys[field_id]: text
+                        for field_id, text in fresh.items()
+                        if field_id in keys and field_id not in failed
+                    }
+                )
+
+        # Keep page_params order (later duplicates override earlier ones)
+        results: Dict[str, str] = {}
+        for param in page_params:
+            field_id = param.get("id")
+            if field_id in fresh:
+                results[field_id] = fresh[field_id]
+                source = "ocr"
+            elif keys.get(field_id) in cached:
+                results[field_id] = cached[keys[field_id]]
+                source = "cache"
+            else:
+                continue
+            if sources is not None:
+                sources[field_id] = source
+        return results
+
+    async def _extract_pdf_regions(
+        self,
+        rasterizer: PDFRasterizer,
+        page_num: int,
+        page_params: List[Dict[str, Any]],
+        language: Optional[str],
+        mode: ExtractionMode,
+        failed: Optional[Set[str]] = None,
+        profiles: Optional[Dict[str, Any]] = None,
+    ) -> Optional[Dict[str, str]]:
+        """
+        Extract fields of a PDF page by rendering only the regions around them.
+
+        Fields are rendered at the DPI their box height calls for, nearby fields
+        of one DPI together (see ``plan_region_renders``), and their coordinates
+        are scaled into the render. Where the renders would cost more than
+        OCR_REGION_MAX_PAGE_SHARE of the page, the whole page is rendered at the
+        base DPI instead. Returns None if the page does not exist.
+        """
+        results: Dict[str, str] = {}
+        renders = plan_region_renders(
+            page_params,
+            base_dpi=rasterizer.dpi,
+            target_height=settings.OCR_REGION_TARGET_HEIGHT,
+            min_dpi=settings.OCR_REGION_MIN_DPI,
+            max_dpi=settings.OCR_REGION_MAX_DPI,
+            page_area=a4_page_area(rasterizer.dpi),
+            max_page_share=settings.OCR_REGION_MAX_PAGE_SHARE,
+        )
+        if renders is None:
+            image = await self.scheduler.run(rasterizer.render, page_num)
+            if image is None:
+                return None
+            logger.debug(f"Rendered page {page_num} whole, its fields would cost more as regions")
+            return await self._extract_page_fields(image, page_params, language, mode, failed, profiles)
+        for render in renders:
+            image = await self.scheduler.run(
+                rasterizer.render_region,
+                page_num,
+                render.dpi,
+                render.left,
+                render.top,
+                render.right,
+                render.bottom,
+            )
+            if image is None:
+                return None
+            logger.debug(f"Rendered {len(render.params)} field(s) of page {page_num} at {render.dpi} dpi")
+            results.update(
+                await self._extract_page_fields(
+                    image, render.scaled_params(rasterizer.dpi), language, mode, failed, profiles
+                )
+            )
         return results
 
     async def extract_fields_from_base64(
@@ -163,6 +460,9 @@ class OCRService:
         image_base64: str,
         page_params: List[Dict[str, Any]],
         language: Optional[str] = None,
+        mode: ExtractionMode = ExtractionMode.REGION,
+        sources: Optional[Dict[str, str]] = None,
+        profiles: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, str]:
         """
         Extract text from regions defined by page_params from a base64 image.
@@ -171,18 +471,21 @@ class OCRService:
             image_base64: Base64 encoded image
             page_params: List of field definitions with id, x1, y1, x2, y2
             language: OCR language
+            mode: Per-region or single-pass page extraction
+            sources: Optional dict that receives how each field was read ("ocr" or "cache")
+            profiles: Recognition profile overrides (the "profiles" section of a form's ocr_config)
 
         Returns:
             Dictionary mapping field id to extracted text
         """
         image_data = base64.b64decode(image_base64)
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            self.executor,
-            self._extract_fields_from_image_sync,
-            image_data,
-            page_params,
-            language,
+
+        async def extract(params: List[Dict[str, Any]], failed: Set[str]) -> Dict[str, str]:
+            image = await self.scheduler.run(self._load_image_sync, image_data)
+            return await self._extract_page_fields(image, params, language, mode, failed, profiles)
+
+        return await self._extract_page_fields_cached(
+            content_digest(image_data), extract, page_params, language, mode, sources, profiles
         )
 
     async def extract_fields_from_pdf_base64(
@@ -190,51 +493,106 @@ class OCRService:
         pdf_base64: str,
         all_page_params: Dict[str, List[Dict[str, Any]]],
         language: Optional[str] = None,
+        mode: ExtractionMode = ExtractionMode.REGION,
+        sources: Optional[Dict[str, str]] = None,
+        profiles: Optional[Dict[str, Any]] = None,
+        on_page: Optional[Callable[[int, Dict[str, str], Dict[str, str]], Awaitable[None]]] = None,
     ) -> Dict[str, str]:
         """
         Extract text from regions defined by all_page_params from a base64 PDF.
 
+        Fields are read from the PDF's embedded text layer where it has words
+        inside the field rectangle; the remaining fields go through OCR.
+
         Args:
             pdf_base64: Base64 encoded PDF
             all_page_params: Dict mapping page numbers (as strings) to list of field definitions
             language: OCR language
+            mode: Per-region or single-pass page extraction
+            sources: Optional dict that receives how each field was read ("text_layer", "ocr" or "cache")
+            profiles: Recognition profile overrides (the "profiles" section of a form's ocr_config)
+            on_page: Awaited with (page number, fields, sources) as each page finishes
 
         Returns:
             Dictionary mapping field id to extracted text (merged from all pages)
         """
         pdf_data = base64.b64decode(pdf_base64)
-
-        # Convert PDF pages to images
-        loop = asyncio.get_event_loop()
-        images = await loop.run_in_executor(
-            self.executor,
-            lambda: convert_from_bytes(pdf_data, dpi=300),
-        )
-
-        all_results = {}
-
-        for page_num, image in enumerate(images, start=1):
-            page_key = str(page_num)
-            page_params = all_page_params.get(page_key, [])
-
-            if not page_params:
-                continue
-
-            # Save image to bytes for processing
-            img_byte_arr = io.BytesIO()
-            image.save(img_byte_arr, format="PNG")
-            img_bytes = img_byte_arr.getvalue()
-
-            # Extract fields for this page
-            page_results = await loop.run_in_executor(
-                self.executor,
-                self._extract_fields_from_image_sync,
-                img_bytes,
-                page_params,
-                language,
-            )
-
-            # Merge results (later pages override earlier if same field id)
-            all_results.update(page_results)
-
+        params_by_page = self._params_by_page(all_page_params)
+        pages = list(params_by_page)
+        if not pages:
+            return {}
+
+        rasterizer = self._rasterizer(pdf_data)
+        # Bounds how many rendered pages are held in memory at once
+        pages_in_flight = asyncio.Semaphore(settings.OCR_PDF_PAGES_IN_FLIGHT)
+
+        region_render = settings.OCR_PDF_RENDER_MODE == "region"
+
+        async def extract_page(page_num: int) -> Tuple[Dict[str, str], Dict[str, str]]:
+            page_params = params_by_page[page_num]
+            page_sources: Dict[str, str] = {}
+
+            async def extract(params: List[Dict[str, Any]], failed: Set[str]) -> Optional[Dict[str, str]]:
+                if region_render:
+                    return await self._extract_pdf_regions(
+                        rasterizer, page_num, params, language, mode, failed, profiles
+                    )
+                image = await self.scheduler.run(rasterizer.render, page_num)
+                if image is None:
+                    return None
+                return await self._extract_page_fields(image, params, language, mode, failed, profiles)
+
+            async with pages_in_flight:
+                text_results: Dict[str, str] = {}
+                if settings.OCR_PDF_TEXT_LAYER:
+                    words = await self.scheduler.run(rasterizer.text_words, page_num)
+                    if words:
+                        text_results = self._fields_from_words(words, page_params)
+
+                ocr_results: Dict[str, str] = {}
+                remaining = [param for param in page_params if param.get("id") not in text_results]
+                if remaining:
+                    page_digest = content_digest(
+                        rasterizer.digest,
+                        page_num,
+                        "region" if region_render else rasterizer.dpi,
+                        rasterizer.grayscale,
+                    )
+                    ocr_results = await self._extract_page_fields_cached(
+                        page_digest, extract, remaining, language, mode, page_sources, profiles
+                    )
+
+            results: Dict[str, str] = {}
+            for param in page_params:
+                field_id = param.get("id")
+                if field_id in text_results:
+                    results[field_id] = text_results[field_id]
+                    page_sources[field_id] = "text_layer"
+                elif field_id in ocr_results:
+                    results[field_id] = ocr_results[field_id]
+            if on_page is not None:
+                await on_page(page_num, results, page_sources)
+            return results, page_sources
+
+        # Pages and their fields run concurrently across the pool; only pages
+        # with fields are rendered.
+        tasks = [asyncio.ensure_future(extract_page(page_num)) for page_num in pages]
+        try:
+            page_results = await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            try:
+                # Let cancelled pages finish their running render before the document is closed
+                await asyncio.gather(*tasks, return_exceptions=True)
+            finally:
+                # Also if the request is cancelled again while waiting
+                rasterizer.close()
+
+        # Merge in page order (later pages override earlier if same field id)
+        all_results: Dict[str, str] = {}
+        for results, page_sources in page_results:
+            all_results.update(results)
+            if sources is not None:
+                sources.update(page_sources)
         return all_results
@@ -0,0 +1,80 @@
+"""Embedded text of digitally generated PDFs.
+
+PDFs produced by software (rather than scanned) carry their text with exact
+glyph positions. ``pdftotext -bbox`` lists every word with its box in PDF
+points; the boxes are converted to pixels at the render DPI so they can be
+matched against field rectangles exactly like OCR words.
+"""
+import logging
+from typing import List, Optional
+
+from lxml import etree
+
+from app.services.ocr.cancellation import run_cancellable
+from app.services.ocr.layout import OCRWord
+
+logger = logging.getLogger(__name__)
+
+POINTS_PER_INCH = 72
+
+
+def parse_bbox_html(document: bytes, dpi: int) -> List[List[OCRWord]]:
+    """
+    Parse ``pdftotext -bbox`` output into words per page.
+
+    Args:
+        document: XHTML written by pdftotext
+        dpi: Resolution the word boxes are converted to
+
+    Returns:
+        One list of words per page in the output, in page order
+    """
+    scale = dpi / POINTS_PER_INCH
+    root = etree.fromstring(document, etree.XMLParser(recover=True, resolve_entities=False, no_network=True))
+    if root is None:
+        return []
+
+    pages = []
+    for page in root.iter("{*}page"):
+        words = []
+        for word in page.iter("{*}word"):
+            text = (word.text or "").strip()
+            if not text:
+                continue
+            words.append(
+                OCRWord(
+                    text,
+                    float(word.get("xMin")) * scale,
+                    float(word.get("yMin")) * scale,
+                    float(word.get("xMax")) * scale,
+                    float(word.get("yMax")) * scale,
+                    100.0,
+                )
+            )
+        pages.append(words)
+    return pages
+
+
+def read_text_layer(path: str, page: int, dpi: int) -> Optional[List[OCRWord]]:
+    """
+    Words of one page's text layer, in pixels at ``dpi``.
+
+    Returns an empty list for a page without text, and None when the text
+    layer cannot be read (no such page, pdftotext missing or failing).
+    """
+    command = ["pdftotext", "-q", "-f", str(page), "-l", str(page), "-bbox", path, "-"]
+    try:
+        returncode, stdout, stderr = run_cancellable(command, timeout=60)
+    except FileNotFoundError:
+        logger.warning("pdftotext not found, PDF text layers are not used")
+        return None
+    if returncode != 0:
+        logger.debug(f"pdftotext failed on page {page}: {stderr.decode('utf-8', 'ignore').strip()}")
+        return None
+
+    try:
+        pages = parse_bbox_html(stdout, dpi)
+    except (etree.XMLSyntaxError, TypeError, ValueError) as e:
+        logger.warning(f"Unreadable text layer on page {page}: {str(e)}")
+        return None
+    return pages[0] if pages else None
@@ -0,0 +1,267 @@
+"""Worker that runs OCR scan jobs from the ocr_jobs queue.
+
+The API only enqueues scan jobs; any number of worker processes (see
+``app/worker.py``) claim and run them. A worker holds a lease on each job it
+runs and renews it every heartbeat. If the worker dies, its lease runs out
+and another worker picks the job up again. A worker that finds it has lost a
+lease stops the job without writing anything. Failed attempts are retried
+with exponential backoff until the job's ``max_attempts`` is used up.
+Invalid input is not retried.
+
+Field extraction jobs store each page's fields as the page finishes, so
+clients can follow their progress; a retried attempt only runs the pages
+that are not stored yet. The final fields are merged into the target
+document's params in the transaction that completes the job.
+"""
+import asyncio
+import binascii
+import logging
+import os
+import random
+import socket
+import uuid
+from datetime import timedelta
+from typing import Any, Dict, Optional, Set, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import get_settings
+from app.models.ocr import ExtractionMode, JobKind, OCRJob
+from app.repositories.document_repository import DocumentRepository
+from app.repositories.ocr_repository import OCRRepository, utcnow
+from app.services.ocr.events import notify_job_event
+from app.services.ocr.scheduler import Lane, work_context
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class InvalidJobError(ValueError):
+    """Raised for jobs that cannot succeed however often they are retried."""
+
+
+def retry_delay(attempt: int, base: float, maximum: float) -> float:
+    """Exponential backoff with jitter: about ``base * 2**(attempt-1)`` seconds, capped at ``maximum``."""
+    delay = min(maximum, base * 2 ** max(0, attempt - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def merge_page_results(page_results: Dict[str, Any]) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Fields and sources of the finished pages, later pages overriding earlier ones like a full extraction."""
+    fields: Dict[str, str] = {}
+    sources: Dict[str, str] = {}
+    for page in sorted(page_results, key=int):
+        fields.update(page_results[page]["fields"])
+        sources.update(page_results[page]["sources"])
+    return fields, sources
+
+
+class OCRJobWorker:
+    """Claims scan jobs and runs them on an OCRService, up to ``concurrency`` at a time."""
+
+    def __init__(
+        self,
+        ocr_service,
+        session_factory: async_sessionmaker[AsyncSession],
+        worker_id: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        lease_seconds: Optional[float] = None,
+        heartbeat_seconds: Optional[float] = None,
+        poll_seconds: Optional[float] = None,
+    ):
+        self.ocr_service = ocr_service
+        self.session_factory = session_factory
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.concurrency = max(1, concurrency or settings.OCR_WORKER_CONCURRENCY)
+        self.lease_seconds = lease_seconds or settings.OCR_JOB_LEASE_SECONDS
+        self.heartbeat_seconds = heartbeat_seconds or settings.OCR_JOB_HEARTBEAT_SECONDS
+        self.poll_seconds = poll_seconds or settings.OCR_WORKER_POLL_SECONDS
+        # SQLite allows one writer at a time; claims from this process queue up here rather than in the database
+        self._claim_lock = asyncio.Lock()
+
+    async def claim(self) -> Optional[OCRJob]:
+        """Lease the next runnable job, if any."""
+        async with self._claim_lock:
+            async with self.session_factory() as session:
+                job = await OCRRepository(session).claim_next(self.worker_id, self.lease_seconds)
+                if job is not None:
+                    await notify_job_event(session, job)
+                return job
+
+    async def run_once(self) -> bool:
+        """Claim and run a single job; False if there was none."""
+        job = await self.claim()
+        if job is None:
+            return False
+        await self.process(job)
+        return True
+
+    async def run(self, stop: asyncio.Event) -> None:
+        """Run jobs until ``stop`` is set, then let the running ones finish."""
+        logger.info(f"OCR worker {self.worker_id} started (concurrency {self.concurrency})")
+        running: Set[asyncio.Task] = set()
+        stopping = asyncio.ensure_future(stop.wait())
+        try:
+            while not stop.is_set():
+                while len(running) < self.concurrency:
+                    try:
+                        job = await self.claim()
+                    except Exception as e:
+                        logger.error(f"Failed to claim OCR job: {str(e)}")
+                        job = None
+                    if job is None:
+                        break
+                    task = asyncio.create_task(self.process(job))
+                    running.add(task)
+                    task.add_done_callback(running.discard)
+
+                # Poll again when a job finishes, the poll interval passes, or we are told to stop
+                await asyncio.wait({stopping, *running}, timeout=self.poll_seconds, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            stopping.cancel()
+            if running:
+                logger.info(f"Waiting for {len(running)} running OCR jobs to finish")
+                await asyncio.gather(*running, return_exceptions=True)
+        logger.info(f"OCR worker {self.worker_id} stopped")
+
+    async def process(self, job: OCRJob) -> None:
+        """Run a claimed job, renewing its lease, and record the outcome."""
+        logger.info(f"Starting OCR processing for job {job.job_id} (attempt {job.attempts}/{job.max_attempts})")
+        if job.attempts > job.max_attempts:
+            # Earlier workers died holding the lease
+            await self._fail(job, "Job abandoned after its worker stopped responding", retry=False)
+            return
+
+        work = asyncio.ensure_future(self._execute(job))
+        lease_lost = asyncio.Event()
+        keeper = asyncio.create_task(self._keep_lease(job, work, lease_lost))
+        try:
+            result = await work
+        except asyncio.CancelledError:
+            if lease_lost.is_set():
+                logger.warning(f"Lost the lease on job {job.job_id}, abandoning it")
+                return
+            raise
+        except InvalidJobError as e:
+            await self._fail(job, str(e), retry=False)
+            return
+        except Exception as e:
+            logger.error(f"OCR processing failed for job {job.job_id}: {str(e)}")
+            await self._fail(job, str(e), retry=job.attempts < job.max_attempts)
+            return
+        finally:
+            keeper.cancel()
+
+        async with self.session_factory() as session:
+            if await self._complete(session, job, result):
+                logger.info(f"OCR processing completed for job {job.job_id}")
+                await self._announce(session, job.job_id)
+            else:
+                logger.warning(f"Lost the lease on job {job.job_id} before storing its result")
+
+    async def _execute(self, job: OCRJob) -> Any:
+        payload = job.payload or {}
+        if not payload.get("image_base64"):
+            raise InvalidJobError("Either image_base64 or image_url required")
+        with work_context(Lane.BATCH, job.owner or "anonymous"):
+            try:
+                if job.kind == JobKind.EXTRACT_FIELDS:
+                    return await self._extract_fields(job, payload)
+                return await self.ocr_service.extract_text_from_base64(payload["image_base64"], payload.get("language"))
+            except binascii.Error as e:  # undecodable base64
+                raise InvalidJobError(f"Invalid base64 data: {str(e)}")
+
+    async def _extract_fields(self, job: OCRJob, payload: Dict[str, Any]) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """Run a field extraction job, storing each page's fields as it finishes."""
+        mode = ExtractionMode(payload.get("mode") or settings.OCR_EXTRACTION_MODE)
+        # Pages stored by earlier attempts are not run again
+        page_results: Dict[str, Any] = dict(job.page_results or {})
+        store_lock = asyncio.Lock()
+
+        async def store_page(page_num: int, fields: Dict[str, str], sources: Dict[str, str]) -> None:
+            async with store_lock:
+                page_results[str(page_num)] = {"fields": fields, "sources": sources}
+                merged_fields, merged_sources = merge_page_results(page_results)
+                async with self.session_factory() as session:
+                    repo = OCRRepository(session)
+                    if await repo.record_pages(
+                        job.job_id, self.worker_id, dict(page_results), merged_fields, merged_sources
+                    ):
+                        await self._announce(session, job.job_id)
+
+        if payload.get("all_page_params") is not None:
+            remaining = {
+                page: params for page, params in payload["all_page_params"].items() if page not in page_results
+            }
+            if remaining:
+                await self.ocr_service.extract_fields_from_pdf_base64(
+                    payload["image_base64"],
+                    remaining,
+                    payload.get("language"),
+                    mode,
+                    profiles=payload.get("profiles"),
+                    on_page=store_page,
+                )
+        elif "1" not in page_results:
+            sources: Dict[str, str] = {}
+            fields = await self.ocr_service.extract_fields_from_base64(
+                payload["image_base64"],
+                payload.get("page_params") or [],
+                payload.get("language"),
+                mode,
+                sources,
+                payload.get("profiles"),
+            )
+            await store_page(1, fields, sources)
+        return merge_page_results(page_results)
+
+    async def _complete(self, session: AsyncSession, job: OCRJob, result: Any) -> bool:
+        """Store a job's result; False if the worker has lost the lease."""
+        repo = OCRRepository(session)
+        if job.kind != JobKind.EXTRACT_FIELDS:
+            return await repo.complete(job.job_id, self.worker_id, result)
+
+        fields, sources = result
+        if not await repo.complete_fields(job.job_id, self.worker_id, fields, sources, commit=False):
+            return False
+        document_id = (job.payload or {}).get("document_id")
+        if document_id is not None and not await DocumentRepository(session).merge_params(document_id, fields):
+            logger.warning(f"Document {document_id} not found, fields of job {job.job_id} not saved")
+        # The job's result and the document's fields are committed together
+        await session.commit()
+        return True
+
+    async def _keep_lease(self, job: OCRJob, work: asyncio.Future, lease_lost: asyncio.Event) -> None:
+        """Renew the job's lease every heartbeat; cancel the work if it is lost."""
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                async with self.session_factory() as session:
+                    renewed = await OCRRepository(session).heartbeat(job.job_id, self.worker_id, self.lease_seconds)
+            except Exception as e:
+                # Keep working; the lease only lapses if renewals keep failing
+                logger.warning(f"Heartbeat for job {job.job_id} failed: {str(e)}")
+                continue
+            if not renewed:
+                lease_lost.set()
+                work.cancel()
+                return
+
+    async def _fail(self, job: OCRJob, error: str, retry: bool) -> None:
+        retry_at = None
+        if retry:
+            delay = retry_delay(
+                job.attempts, settings.OCR_JOB_RETRY_BACKOFF_SECONDS, settings.OCR_JOB_RETRY_BACKOFF_MAX_SECONDS
+            )
+            retry_at = utcnow() + timedelta(seconds=delay)
+            logger.info(f"Retrying job {job.job_id} in {delay:.1f}s")
+        async with self.session_factory() as session:
+            if await OCRRepository(session).fail(job.job_id, self.worker_id, error, retry_at):
+                await self._announce(session, job.job_id)
+
+    @staticmethod
+    async def _announce(session: AsyncSession, job_id: str) -> None:
+        """Push the job's new state to the streams watching it."""
+        job = await OCRRepository(session).get_by_job_id(job_id)
+        if job is not None:
+            await notify_job_event(session, job)
@@ -0,0 +1,285 @@
+"""Content-addressed blob storage.
+
+Binary objects (document pages) are stored once per content, under the
+SHA-256 of their bytes; rows in the database keep only the hash, size and
+MIME type. Storing the same bytes twice is a no-op, and a blob never
+changes once written, so readers need no locking.
+
+A blob may have named variants (e.g. preview renditions of a page image)
+stored next to it. They are derived from the blob's content alone, so they
+are addressed by the blob's hash and their name.
+
+``BlobStore`` is the interface; ``LocalBlobStore`` keeps blobs on the local
+filesystem and is the default backend (BLOB_STORE_BACKEND=local).
+"""
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import AsyncIterable, AsyncIterator, BinaryIO, Optional
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+# Bytes per chunk when streaming a blob
+STREAM_CHUNK_SIZE = 256 * 1024
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+_VARIANT_RE = re.compile(r"^[a-z0-9_-]{1,32}$")
+
+
+class BlobNotFoundError(LookupError):
+    """Raised when no blob has the requested hash."""
+
+
+@dataclass(frozen=True)
+class BlobInfo:
+    """Hash and size of a stored blob."""
+
+    digest: str  # SHA-256, hex
+    size: int
+
+
+class BlobWriter(ABC):
+    """A blob being written in chunks; hashed as it is written, stored on ``commit``."""
+
+    size: int = 0
+
+    @abstractmethod
+    async def write(self, chunk: bytes) -> None:
+        """Append a chunk."""
+
+    @abstractmethod
+    async def commit(self) -> BlobInfo:
+        """Store the blob written so far (if not stored already) and return its hash and size."""
+
+    @abstractmethod
+    async def abort(self) -> None:
+        """Discard what was written."""
+
+
+class BlobStore(ABC):
+    """Storage of immutable binary objects keyed by their SHA-256."""
+
+    @abstractmethod
+    async def put(self, data: bytes) -> BlobInfo:
+        """Store bytes (if not stored already) and return their hash and size."""
+
+    @abstractmethod
+    async def open_writer(self) -> BlobWriter:
+        """Start a blob whose bytes are not all at hand yet."""
+
+    async def put_stream(self, chunks: AsyncIterable[bytes]) -> BlobInfo:
+        """Store a blob from chunks, holding one chunk in memory at a time."""
+        writer = await self.open_writer()
+        try:
+            async for chunk in chunks:
+                await writer.write(chunk)
+        except BaseException:
+            await writer.abort()
+            raise
+        return await writer.commit()
+
+    @abstractmethod
+    async def put_variant(self, digest: str, variant: str, data: bytes) -> None:
+        """Store (or replace) a named variant of a blob."""
+
+    @abstractmethod
+    async def exists(self, digest: str, variant: Optional[str] = None) -> bool:
+        """Whether a blob (or one of its variants) is stored."""
+
+    @abstractmethod
+    async def size(self, digest: str, variant: Optional[str] = None) -> Optional[int]:
+        """Size of a blob (or one of its variants); None if it is not stored."""
+
+    @abstractmethod
+    def stream(
+        self,
+        digest: str,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        start: int = 0,
+        end: Optional[int] = None,
+        variant: Optional[str] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Read a blob (or one of its variants) in chunks; iterating raises BlobNotFoundError if it is missing.
+
+        ``start`` and ``end`` (exclusive) select a byte range of the blob.
+        """
+
+    async def read(self, digest: str, variant: Optional[str] = None) -> bytes:
+        """Read a whole blob. Prefer ``stream`` for anything that does not need all bytes at once."""
+        return b"".join([chunk async for chunk in self.stream(digest, variant=variant)])
+
+
+class _LocalBlobWriter(BlobWriter):
+    """Writes to a temp file in the store, renamed to the blob's path on commit."""
+
+    def __init__(self, store: "LocalBlobStore", file: BinaryIO, tmp_path: str):
+        self._store = store
+        self._file: Optional[BinaryIO] = file
+        self._tmp_path = tmp_path
+        self._sha256 = hashlib.sha256()
+
+    def _write_sync(self, chunk: bytes) -> None:
+        self._sha256.update(chunk)
+        self._file.write(chunk)
+
+    async def write(self, chunk: bytes) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self._write_sync, chunk)
+        self.size += len(chunk)
+
+    def _commit_sync(self) -> BlobInfo:
+        self._file.close()
+        self._file = None
+        info = BlobInfo(self._sha256.hexdigest(), self.size)
+        self._store._place(self._tmp_path, info.digest)
+        return info
+
+    async def commit(self) -> BlobInfo:
+        return await asyncio.get_running_loop().run_in_executor(None, self._commit_sync)
+
+    def _abort_sync(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        try:
+            os.unlink(self._tmp_path)
+        except FileNotFoundError:
+            pass
+
+    async def abort(self) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self._abort_sync)
+
+
+class LocalBlobStore(BlobStore):
+    """Blobs as files under a directory, sharded by the first bytes of their hash.
+
+    Files are written to a temp name and renamed into place, so concurrent
+    writers of the same content and readers never see a partial blob.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._tmp_dir = os.path.join(root, "tmp")
+        os.makedirs(self._tmp_dir, exist_ok=True)
+
+    def path(self, digest: str, variant: Optional[str] = None) -> str:
+        """File of a blob, or of one of its variants (next to it)."""
+        if not _DIGEST_RE.match(digest) or (variant is not None and not _VARIANT_RE.match(variant)):
+            raise BlobNotFoundError(digest)
+        name = digest if variant is None else f"{digest}.{variant}"
+        return os.path.join(self.root, digest[:2], digest[2:4], name)
+
+    def _place(self, tmp_path: str, digest: str, variant: Optional[str] = None) -> None:
+        """Move a written temp file to the blob's path, or drop it if the blob is stored already."""
+        path = self.path(digest, variant)
+        try:
+            if variant is None and os.path.exists(path):
+                os.unlink(tmp_path)
+                return
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def _put_sync(self, data: bytes) -> BlobInfo:
+        info = BlobInfo(hashlib.sha256(data).hexdigest(), len(data))
+        if os.path.exists(self.path(info.digest)):
+            return info
+        fd, tmp_path = tempfile.mkstemp(dir=self._tmp_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self._place(tmp_path, info.digest)
+        return info
+
+    async def put(self, data: bytes) -> BlobInfo:
+        return await asyncio.get_running_loop().run_in_executor(None, self._put_sync, data)
+
+    def _put_variant_sync(self, digest: str, variant: str, data: bytes) -> None:
+        self.path(digest, variant)
+        fd, tmp_path = tempfile.mkstemp(dir=self._tmp_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self._place(tmp_path, digest, variant)
+
+    async def put_variant(self, digest: str, variant: str, data: bytes) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self._put_variant_sync, digest, variant, data)
+
+    def _open_writer_sync(self) -> _LocalBlobWriter:
+        fd, tmp_path = tempfile.mkstemp(dir=self._tmp_dir, suffix=".tmp")
+        return _LocalBlobWriter(self, os.fdopen(fd, "wb"), tmp_path)
+
+    async def open_writer(self) -> BlobWriter:
+        return await asyncio.get_running_loop().run_in_executor(None, self._open_writer_sync)
+
+    async def exists(self, digest: str, variant: Optional[str] = None) -> bool:
+        return await self.size(digest, variant) is not None
+
+    async def size(self, digest: str, variant: Optional[str] = None) -> Optional[int]:
+        try:
+            path = self.path(digest, variant)
+            return await asyncio.get_running_loop().run_in_executor(None, os.path.getsize, path)
+        except (BlobNotFoundError, FileNotFoundError):
+            return None
+
+    async def stream(
+        self,
+        digest: str,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        start: int = 0,
+        end: Optional[int] = None,
+        variant: Optional[str] = None,
+    ) -> AsyncIterator[bytes]:
+        loop = asyncio.get_running_loop()
+        try:
+            f = await loop.run_in_executor(None, open, self.path(digest, variant), "rb")
+        except FileNotFoundError:
+            raise BlobNotFoundError(digest)
+        try:
+            if start:
+                await loop.run_in_executor(None, f.seek, start)
+            remaining = None if end is None else max(0, end - start)
+            while remaining is None or remaining > 0:
+                size = chunk_size if remaining is None else min(chunk_size, remaining)
+                chunk = await loop.run_in_executor(None, f.read, size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            f.close()
+
+
+@lru_cache()
+def get_originals_store() -> Optional[BlobStore]:
+    """Cold store of uploaded page originals, if BLOB_STORE_ORIGINALS_PATH is set (also a FastAPI dependency)."""
+    if not settings.BLOB_STORE_ORIGINALS_PATH:
+        return None
+    return LocalBlobStore(settings.BLOB_STORE_ORIGINALS_PATH)
+
+
+@lru_cache()
+def get_blob_store() -> BlobStore:
+    """The configured blob store (also the FastAPI dependency, overridable in tests)."""
+    if settings.BLOB_STORE_BACKEND == "local":
+        return LocalBlobStore(settings.BLOB_STORE_PATH)
+    raise ValueError(f"Unknown blob store backend: {settings.BLOB_STORE_BACKEND}")
@@ -0,0 +1,139 @@
+"""Ingest-time normalisation of uploaded pages.
+
+Phone photos and scanner PNGs arrive at many megabytes and far more pixels
+than OCR needs, and every OCR call, preview and download paid for that.
+``PageIngest`` puts each uploaded page into the blob store normalised, once:
+
+* the long edge is capped at that of an A4 page at DOCUMENT_PAGE_MAX_DPI;
+* the EXIF orientation is applied to the pixels (the re-encoded page carries
+  no EXIF, so it is never applied twice);
+* the page is re-encoded as DOCUMENT_PAGE_ENCODING: lossless grayscale PNG
+  (the default), or high-quality JPEG, which is lossy; keep the originals
+  (BLOB_STORE_ORIGINALS_PATH) when using it.
+
+A page that needed neither resizing nor rotation keeps its uploaded encoding
+if that is smaller. Decoding needs the whole encoded page in memory, so a
+page image is normalised from bytes, one page at a time; its size is capped
+by DOCUMENT_MAX_PAGE_BYTES. PDFs and other non-image pages are stored as uploaded.
+Normalised pages record their uploaded size (``original_size``); with
+BLOB_STORE_ORIGINALS_PATH set, the uploaded original of every page is also
+kept in that (cold) store and referenced as ``original``.
+"""
+import asyncio
+import io
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from PIL import Image
+
+from app.core.config import get_settings
+from app.services.image_processing.service import ImageProcessingService
+from app.services.storage.blob_store import BlobStore
+from app.services.storage.pages import page_ref
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Long edge of an A4 page
+A4_LONG_EDGE_INCHES = 11.69
+
+# Page types that are normalised
+NORMALIZED_TYPES = frozenset({"image/jpeg", "image/png", "image/tiff", "image/bmp", "image/webp"})
+
+# DOCUMENT_PAGE_ENCODING -> file extension and MIME type
+ENCODINGS = {"jpeg": (".jpg", "image/jpeg"), "png-gray": (".png", "image/png")}
+
+_EXIF_ORIENTATION = 0x0112
+
+
+@dataclass
+class IngestReport:
+    """Bytes of the pages of one upload, as uploaded and as stored."""
+
+    pages: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_in - self.bytes_out
+
+
+class PageIngest:
+    """Moves uploaded pages from a staging store into the blob store, normalising page images."""
+
+    def __init__(
+        self,
+        store: BlobStore,
+        originals_store: Optional[BlobStore] = None,
+        image_service: Optional[ImageProcessingService] = None,
+        normalize: Optional[bool] = None,
+        max_dpi: Optional[int] = None,
+        encoding: Optional[str] = None,
+        jpeg_quality: Optional[int] = None,
+    ):
+        self.store = store
+        self.originals_store = originals_store
+        self.image_service = image_service or ImageProcessingService()
+        self.normalize_pages = settings.DOCUMENT_NORMALIZE_PAGES if normalize is None else normalize
+        self.max_edge = round(A4_LONG_EDGE_INCHES * (max_dpi or settings.DOCUMENT_PAGE_MAX_DPI))
+        self.encoding = encoding or settings.DOCUMENT_PAGE_ENCODING
+        if self.encoding not in ENCODINGS:
+            raise ValueError(f"Unknown page encoding: {self.encoding}")
+        self.jpeg_quality = jpeg_quality or settings.DOCUMENT_PAGE_JPEG_QUALITY
+        self.report = IngestReport()
+        self._ingested: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def stages(self) -> bool:
+        """Whether pages need a staging store, i.e. are not stored exactly as uploaded."""
+        return self.normalize_pages or self.originals_store is not None
+
+    def normalize(self, data: bytes) -> Optional[bytes]:
+        """Normalised encoding of a page image; None if the uploaded bytes are to be kept."""
+        try:
+            with Image.open(io.BytesIO(data)) as pil_image:
+                long_edge = max(pil_image.size)
+                orientation = pil_image.getexif().get(_EXIF_ORIENTATION, 1)
+            # The EXIF orientation is applied while decoding (also when Pillow decodes)
+            image = self.image_service.downscale(self.image_service.decode_reduced(data, self.max_edge), self.max_edge)
+            ext, _ = ENCODINGS[self.encoding]
+            if self.encoding == "png-gray":
+                encoded = self.image_service.encode(self.image_service.decode(image, grayscale=True), ext)
+            else:
+                encoded = self.image_service.encode(image, ext, self.jpeg_quality)
+        except Exception as e:
+            logger.warning(f"Page image kept as uploaded, could not normalise it: {str(e)}")
+            return None
+        if long_edge <= self.max_edge and orientation == 1 and len(encoded) >= len(data):
+            return None
+        return encoded
+
+    async def ingest(self, staging: BlobStore, ref: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a page staged in ``staging``; returns its page reference in the blob store."""
+        if ref["hash"] in self._ingested:
+            return self._ingested[ref["hash"]]
+
+        original = None
+        if self.originals_store is not None:
+            original = page_ref(await self.originals_store.put_stream(staging.stream(ref["hash"])), ref["content_type"])
+
+        if self.normalize_pages and ref["content_type"] in NORMALIZED_TYPES:
+            data = await staging.read(ref["hash"])
+            normalized = await asyncio.get_running_loop().run_in_executor(None, self.normalize, data)
+            if normalized is not None:
+                stored = page_ref(await self.store.put(normalized), ENCODINGS[self.encoding][1])
+                stored["original_size"] = ref["size"]
+            else:
+                stored = page_ref(await self.store.put(data), ref["content_type"])
+        else:
+            stored = page_ref(await self.store.put_stream(staging.stream(ref["hash"])), ref["content_type"])
+
+        if original is not None:
+            stored["original"] = original
+        self.report.pages += 1
+        self.report.bytes_in += ref["size"]
+        self.report.bytes_out += stored["size"]
+        self._ingested[ref["hash"]] = stored
+        return stored
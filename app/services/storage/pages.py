@@ -0,0 +1,202 @@
+"""Document pages in the blob store.
+
+``Document.original_file`` (and ``processing_file``) map page numbers to
+page references, ``{"hash": ..., "size": ..., "content_type": ...}``; the
+page bytes themselves live in the blob store, so listings read the page
+metadata straight from ``original_file``. Rows written before the blob store map pages to base64 strings;
+``migrate_document_pages`` moves those into the store.
+"""
+import base64
+import binascii
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import load_only
+
+from app.models.document import Document
+from app.services.storage.blob_store import BlobInfo, BlobStore
+
+logger = logging.getLogger(__name__)
+
+# Leading bytes of the page formats we receive
+_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"%PDF", "application/pdf"),
+    (b"II*\x00", "image/tiff"),
+    (b"MM\x00*", "image/tiff"),
+    (b"GIF8", "image/gif"),
+    (b"BM", "image/bmp"),
+)
+
+
+def sniff_content_type(data: bytes) -> str:
+    """MIME type of page bytes from their signature."""
+    for signature, content_type in _SIGNATURES:
+        if data.startswith(signature):
+            return content_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
+
+
+def page_ref(info: BlobInfo, content_type: str) -> Dict[str, Any]:
+    """What a document stores for one page."""
+    return {"hash": info.digest, "size": info.size, "content_type": content_type}
+
+
+def is_page_ref(value: Any) -> bool:
+    """Whether a page entry is a blob reference rather than legacy inline data."""
+    return isinstance(value, dict) and "hash" in value
+
+
+def page_infos(pages: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Metadata of a document's pages, in page order.
+
+    Pages not yet moved to the blob store are listed without hash, size or
+    content type rather than decoded.
+    """
+    infos = []
+    for page in sorted(pages or {}, key=lambda key: (not key.isdigit(), int(key) if key.isdigit() else 0, key)):
+        value = pages[page]
+        if is_page_ref(value):
+            infos.append({"page": page, **value})
+        else:
+            infos.append({"page": page, "hash": None, "size": None, "content_type": None})
+    return infos
+
+
+def decode_page_text(value: str) -> Tuple[bytes, str]:
+    """
+    Bytes and MIME type of a page given as text.
+
+    Base64 text is decoded; anything else is kept as UTF-8 text.
+    """
+    try:
+        data = base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError):
+        return value.encode("utf-8"), "text/plain; charset=utf-8"
+    return data, sniff_content_type(data)
+
+
+async def store_page_text(store: BlobStore, value: str) -> Dict[str, Any]:
+    """Move a page given as text into the blob store."""
+    data, content_type = decode_page_text(value)
+    return page_ref(await store.put(data), content_type)
+
+
+def template_page(template: Optional[Dict[str, Any]], page: int) -> Optional[Dict[str, Any]]:
+    """The ``template["data"]`` entry of a form template page, if any."""
+    for entry in (template or {}).get("data") or []:
+        if isinstance(entry, dict) and entry.get("page") == page:
+            return entry
+    return None
+
+
+async def store_template_image(store: BlobStore, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Put the image of a form template page into the blob store.
+
+    The entry (``{"page", "binary", "type", ...}`` with base64 ``binary``)
+    gets the ``hash`` of its image in place of ``binary``, and its ``type``
+    if it had none.
+
+    Returns:
+        ``{"hash", "content_type"}`` of the image; None if the entry has none
+    """
+    binary = entry.get("binary")
+    if not isinstance(binary, str) or not binary:
+        return None
+    try:
+        data = base64.b64decode(binary, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    info = await store.put(data)
+    del entry["binary"]
+    entry["hash"] = info.digest
+    entry["type"] = entry.get("type") or sniff_content_type(data)
+    return {"hash": info.digest, "content_type": entry["type"]}
+
+
+async def store_template_images(
+    store: BlobStore, template: Optional[Dict[str, Any]]
+) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Put the page images of a form template into the blob store.
+
+    Returns:
+        A copy of the template whose pages carry the ``hash`` of their image
+        instead of the image, and ``{"hash", "content_type"}`` of each image
+    """
+    if not template or not isinstance(template.get("data"), list):
+        return template, []
+    template = {**template, "data": [dict(entry) if isinstance(entry, dict) else entry for entry in template["data"]]}
+    images = []
+    for entry in template["data"]:
+        if isinstance(entry, dict):
+            image = await store_template_image(store, entry)
+            if image is not None:
+                images.append(image)
+    return template, images
+
+
+async def _migrate_pages(store: BlobStore, pages: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Pages with legacy entries stored as blobs; None if there was nothing to migrate."""
+    if not pages or all(is_page_ref(value) for value in pages.values()):
+        return None
+    migrated = {}
+    for page, value in pages.items():
+        migrated[page] = await store_page_text(store, value) if isinstance(value, str) else value
+    return migrated
+
+
+async def migrate_document_pages(
+    session_factory: async_sessionmaker[AsyncSession], store: BlobStore, batch_size: int = 100
+) -> int:
+    """
+    Move inline base64 pages of all documents into the blob store.
+
+    Documents are walked by id in batches, one transaction per batch, so the
+    migration can be resumed after an interruption; documents already
+    migrated are skipped.
+
+    The rows of a batch are read ``FOR UPDATE``, so on PostgreSQL an upload
+    to one of them waits for the batch to commit and is never overwritten
+    with the migrated old pages; the migration can run while the API is
+    serving. SQLite has no row locks (the clause is not rendered); there,
+    run it with the API stopped.
+
+    Returns:
+        Number of documents migrated
+    """
+    migrated = 0
+    last_id = 0
+    while True:
+        async with session_factory() as session:
+            result = await session.execute(
+                select(Document)
+                .options(load_only(Document.id, Document.original_file, Document.processing_file))
+                .where(Document.id > last_id)
+                .order_by(Document.id)
+                .limit(batch_size)
+                .with_for_update()
+                .execution_options(populate_existing=True)
+            )
+            documents = list(result.scalars().all())
+            if not documents:
+                return migrated
+            for document in documents:
+                original_file = await _migrate_pages(store, document.original_file)
+                processing_file = await _migrate_pages(store, document.processing_file)
+                if original_file is not None:
+                    document.original_file = original_file
+                if processing_file is not None:
+                    document.processing_file = processing_file
+                if original_file is not None or processing_file is not None:
+                    migrated += 1
+            await session.commit()
+            last_id = documents[-1].id
+            logger.info(f"Migrated document pages up to document {last_id} ({migrated} documents so far)")
@@ -0,0 +1,231 @@
+"""Streaming ingestion of document uploads.
+
+``request.form()`` spools every part of a multipart body before the endpoint
+sees any of them, and the endpoint then had to read each page whole.
+``DocumentUploadParser`` instead feeds the body through the multipart parser
+as it arrives and writes page files straight into the blob store, hashing
+them on the way, so an upload holds about one network chunk in memory
+whatever the size and number of its pages. Size limits are checked as bytes
+arrive: an upload over the limit is rejected from its Content-Length, or as
+soon as it has sent too much.
+
+Page parts are named by their page number. A page sent as a file is
+streamed; a page sent as a text field (base64) is buffered up to the size
+its decoded page may have, as are url-encoded bodies.
+"""
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+import multipart
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import parse_options_header
+from starlette.datastructures import Headers
+
+from app.services.storage.blob_store import BlobStore, BlobWriter
+from app.services.storage.pages import page_ref, sniff_content_type, store_page_text
+
+# Largest non-page field (e.g. page_count)
+MAX_FIELD_BYTES = 64 * 1024
+
+# Bytes kept from the start of a page to sniff its type
+_SNIFF_BYTES = 16
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload or one of its pages exceeds its size limit."""
+
+
+class MalformedUploadError(ValueError):
+    """Raised when an upload body cannot be parsed."""
+
+
+@dataclass
+class DocumentUpload:
+    """Parsed upload: plain form fields, and page number -> page reference of pages in the blob store."""
+
+    fields: Dict[str, str] = field(default_factory=dict)
+    pages: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+
+@dataclass
+class _Part:
+    """State of the multipart part being received."""
+
+    headers: Dict[bytes, bytes] = field(default_factory=dict)
+    name: str = ""
+    content_type: Optional[str] = None
+    is_page: bool = False
+    is_file: bool = False
+    writer: Optional[BlobWriter] = None
+    head: bytes = b""
+    data: bytearray = field(default_factory=bytearray)
+    size: int = 0
+
+
+def is_page_name(name: str) -> bool:
+    """Whether a form field name is a page number."""
+    return name.isdigit() and int(name) >= 1
+
+
+class DocumentUploadParser:
+    """Parses a document upload body into the blob store, chunk by chunk."""
+
+    def __init__(self, store: BlobStore, headers: Headers, max_page_bytes: int, max_upload_bytes: int):
+        self.store = store
+        self.headers = headers
+        self.max_page_bytes = max_page_bytes
+        self.max_upload_bytes = max_upload_bytes
+        # Longest base64 text of a page within the page limit
+        self.max_page_text_bytes = (max_page_bytes + 2) // 3 * 4
+        self._part = _Part()
+        self._header_name = b""
+        self._header_value = b""
+        self._events: List[Tuple[str, _Part, bytes]] = []
+        self._writing: Optional[_Part] = None  # Page whose blob is open
+        self._upload = DocumentUpload()
+
+    def _check_content_length(self) -> None:
+        try:
+            content_length = int(self.headers.get("content-length", "0"))
+        except ValueError:
+            raise MalformedUploadError("Invalid Content-Length")
+        if content_length > self.max_upload_bytes:
+            raise UploadTooLargeError(f"Upload is larger than {self.max_upload_bytes} bytes")
+
+    async def _body(self, stream: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """The request body, cut off once it exceeds the upload limit."""
+        received = 0
+        async for chunk in stream:
+            received += len(chunk)
+            if received > self.max_upload_bytes:
+                raise UploadTooLargeError(f"Upload is larger than {self.max_upload_bytes} bytes")
+            yield chunk
+
+    async def parse(self, stream: AsyncIterator[bytes]) -> DocumentUpload:
+        """Read the whole body; pages end up in the blob store."""
+        self._check_content_length()
+        content_type, params = parse_options_header(self.headers.get("content-type", ""))
+        if content_type == b"multipart/form-data":
+            boundary = params.get(b"boundary")
+            if not boundary:
+                raise MalformedUploadError("Missing boundary in multipart body")
+            await self._parse_multipart(self._body(stream), boundary)
+        else:
+            await self._parse_urlencoded(self._body(stream))
+        return self._upload
+
+    async def _parse_urlencoded(self, body: AsyncIterator[bytes]) -> None:
+        data = b"".join([chunk async for chunk in body])
+        for name, value in parse_qsl(data.decode("latin-1"), keep_blank_values=True):
+            await self._add_text(name, value)
+
+    async def _parse_multipart(self, body: AsyncIterator[bytes], boundary: bytes) -> None:
+        callbacks = {
+            "on_part_begin": self._on_part_begin,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+        }
+        parser = multipart.MultipartParser(boundary, callbacks)
+        try:
+            async for chunk in body:
+                try:
+                    parser.write(chunk)
+                except MultipartParseError as e:
+                    raise MalformedUploadError(f"Invalid multipart body: {str(e)}")
+                # Callbacks only record what happened; blob writes need to be awaited
+                await self._handle_events()
+            parser.finalize()
+            await self._handle_events()
+            if self._writing is not None:
+                raise MalformedUploadError("Multipart body ended inside a part")
+        except BaseException:
+            if self._writing is not None:
+                await self._writing.writer.abort()
+                self._writing = None
+            raise
+
+    # Parser callbacks
+
+    def _on_part_begin(self) -> None:
+        self._part = _Part()
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+        if len(self._header_name) + len(self._header_value) > MAX_FIELD_BYTES:
+            raise MalformedUploadError("Multipart header too large")
+
+    def _on_header_end(self) -> None:
+        self._part.headers[self._header_name.lower()] = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        part = self._part
+        _, options = parse_options_header(part.headers.get(b"content-disposition", b""))
+        if b"name" not in options:
+            raise MalformedUploadError('The Content-Disposition header field "name" must be provided')
+        part.name = options[b"name"].decode("utf-8", "replace")
+        part.is_file = b"filename" in options
+        part.is_page = is_page_name(part.name)
+        if b"content-type" in part.headers:
+            part.content_type = part.headers[b"content-type"].decode("latin-1")
+        self._events.append(("start", part, b""))
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        self._events.append(("data", self._part, data[start:end]))
+
+    def _on_part_end(self) -> None:
+        self._events.append(("end", self._part, b""))
+
+    async def _handle_events(self) -> None:
+        events, self._events = self._events, []
+        for event, part, data in events:
+            if event == "start":
+                if part.is_file and part.is_page:
+                    part.writer = await self.store.open_writer()
+                    self._writing = part
+            elif event == "data":
+                await self._add_data(part, data)
+            else:
+                await self._finish(part)
+
+    async def _add_data(self, part: _Part, data: bytes) -> None:
+        part.size += len(data)
+        if part.writer is not None:
+            if part.size > self.max_page_bytes:
+                raise UploadTooLargeError(f"Page {part.name} is larger than {self.max_page_bytes} bytes")
+            if len(part.head) < _SNIFF_BYTES:
+                part.head += data[: _SNIFF_BYTES - len(part.head)]
+            await part.writer.write(data)
+        elif not part.is_file:
+            if part.size > (self.max_page_text_bytes if part.is_page else MAX_FIELD_BYTES):
+                raise UploadTooLargeError(f"Field {part.name} is too large")
+            part.data += data
+        # Files that are not pages are dropped
+
+    async def _finish(self, part: _Part) -> None:
+        if part.writer is not None:
+            info = await part.writer.commit()
+            self._writing = None
+            content_type = part.content_type
+            if not content_type or content_type == "application/octet-stream":
+                content_type = sniff_content_type(part.head)
+            self._upload.pages[part.name] = page_ref(info, content_type)
+        elif not part.is_file:
+            await self._add_text(part.name, part.data.decode("utf-8", "replace"))
+
+    async def _add_text(self, name: str, value: str) -> None:
+        if is_page_name(name):
+            if len(value) > self.max_page_text_bytes:
+                raise UploadTooLargeError(f"Page {name} is larger than {self.max_page_bytes} bytes")
+            self._upload.pages[name] = await store_page_text(self.store, value)
+        else:
+            self._upload.fields[name] = value
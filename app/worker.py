@@ -0,0 +1,49 @@
+"""OCR worker entry point.
+
+Runs queued ``/api/ocr/scan`` jobs outside the API process:
+
+    python -m app.worker
+
+Start as many worker processes as the OCR load needs; they share the queue
+through the database. SIGTERM/SIGINT stop claiming new jobs and let running
+ones finish. Workers also run job retention (``app/services/ocr/retention.py``).
+"""
+import asyncio
+import logging
+import signal
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal, engine
+from app.services.ocr.retention import JobRetention
+from app.services.ocr.service import OCRService
+from app.services.ocr.worker import OCRJobWorker
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+async def main() -> None:
+    """Run an OCR job worker until the process is told to stop."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    ocr_service = OCRService()
+    worker = OCRJobWorker(ocr_service, AsyncSessionLocal)
+    retention = asyncio.create_task(JobRetention(AsyncSessionLocal).run(stop))
+    try:
+        await worker.run(stop)
+        await retention
+    finally:
+        retention.cancel()
+        ocr_service.close()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.DEBUG if settings.DEBUG else logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    asyncio.run(main())
@@ -5,6 +5,7 @@ import {
 } from '@mui/material';
 import * as pdfjs from 'pdfjs-dist';
 import { useTenantApiStore } from '../store/apiStore';
+import { formsApi } from '../store/api';
 import { useNavigate } from 'react-router-dom';
 import PdfViewer from '../components/PdfViewer';
 import SectionCanvas from '../components/SectionCanvas';
@@ -113,7 +114,15 @@ function InvoiceSelection() {
           };
           const pageImages = {};
           for (const pageData of form.template.data) {
-            const imgSrc = pageData.binary.startsWith('data:') ? pageData.binary : `data:${pageData.type || 'image/png'};base64,${pageData.binary}`;
+            let imgSrc;
+            if (pageData.hash) {
+              imgSrc = formsApi.getFormPageImageUrl(form.template_id, form.id, pageData.page, pageData.hash);
+            } else if (pageData.binary) {
+              // Forms saved before template images moved to the blob store
+              imgSrc = pageData.binary.startsWith('data:') ? pageData.binary : `data:${pageData.type || 'image/png'};base64,${pageData.binary}`;
+            } else {
+              continue;
+            }
             pageImages[pageData.page] = imgSrc;
           }
           viewer.pageImages = pageImages;
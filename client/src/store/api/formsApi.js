@@ -22,6 +22,11 @@ export const formsApi = {
     return apiRequest(`/api/templates/${templateID}/forms`);
   },
 
+  // Template page images are served from the blob store by their hash (cacheable URL)
+  getFormPageImageUrl: (templateID, formID, page, hash) => {
+    return `${baseUrl}/api/templates/${templateID}/forms/${formID}/pages/${page}/image?hash=${encodeURIComponent(hash)}`;
+  },
+
   uploadFormByTemplateID: async (formData, templateID) => {
     const response = await fetch(`${baseUrl}/api/templates/${templateID}/forms`, {
       method: 'POST',
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark the OCR engine backends on a synthetic customs form.
+
+Renders a page with N labelled fields, then OCRs every field region with each
+available backend, first one field at a time and then through a thread pool
+the way OCRService does.
+
+Usage: python scripts/bench_ocr_engine.py [--fields 60] [--threads 8] [--lang eng]
+"""
+import argparse
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.ocr.engine import PytesseractEngine, TesserocrEnginePool, tesserocr  # noqa: E402
+
+PAGE_SIZE = (2480, 3508)  # A4 at 300 dpi
+FIELD_HEIGHT = 56
+
+
+def build_page(field_count: int):
+    """Render a synthetic page and return it with the field boxes and expected values."""
+    page = Image.new("L", PAGE_SIZE, 255)
+    draw = ImageDraw.Draw(page)
+    font = ImageFont.load_default(size=36)
+
+    fields = []
+    columns = 2
+    for i in range(field_count):
+        col, row = i % columns, i // columns
+        x1 = 100 + col * 1200
+        y1 = 100 + row * (FIELD_HEIGHT + 40)
+        box = (x1, y1, x1 + 1000, y1 + FIELD_HEIGHT)
+        value = f"FIELD {i:03d} VALUE {1000 + i * 7}"
+        draw.text((box[0] + 10, box[1] + 8), value, fill=0, font=font)
+        fields.append((box, value))
+    return np.asarray(page), fields
+
+
+def run(engine, page, fields, lang: str, threads: int):
+    """OCR every field, return (seconds, correct reads)."""
+
+    def read(field):
+        (x1, y1, x2, y2), expected = field
+        return engine.image_to_string(page[y1:y2, x1:x2], lang).strip() == expected
+
+    start = time.perf_counter()
+    if threads <= 1:
+        results = [read(field) for field in fields]
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            results = list(pool.map(read, fields))
+    return time.perf_counter() - start, sum(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fields", type=int, default=60)
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--lang", default=os.getenv("OCR_LANGUAGES", "eng"))
+    parser.add_argument("--tessdata", default=os.getenv("TESSDATA_PATH"))
+    args = parser.parse_args()
+
+    page, fields = build_page(args.fields)
+
+    engines = []
+    if shutil.which(os.getenv("TESSERACT_PATH") or "tesseract"):
+        engines.append(PytesseractEngine(os.getenv("TESSERACT_PATH")))
+    else:
+        print("tesseract binary not found, skipping pytesseract")
+    if tesserocr is not None:
+        engines.append(TesserocrEnginePool(size=args.threads, tessdata_path=args.tessdata))
+    else:
+        print("tesserocr not installed, skipping engine pool")
+
+    print(f"{args.fields} fields, lang={args.lang}, threads={args.threads}")
+    print(f"{'engine':<12} {'mode':<10} {'total s':>9} {'ms/field':>9} {'correct':>8}")
+    for engine in engines:
+        for threads in sorted({1, args.threads}):
+            seconds, correct = run(engine, page, fields, args.lang, threads)
+            mode = "serial" if threads == 1 else f"{threads} thr"
+            print(
+                f"{engine.name:<12} {mode:<10} {seconds:>9.2f} {seconds * 1000 / len(fields):>9.1f} "
+                f"{correct:>5}/{len(fields)}"
+            )
+        engine.close()
+
+
+if __name__ == "__main__":
+    main()
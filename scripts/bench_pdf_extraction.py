@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark multi-page PDF field extraction against page count.
+
+Compares the old strategy (render a page, OCR its fields one by one, then move
+on to the next page) with OCRService.extract_fields_from_pdf_base64, which
+schedules pages and fields concurrently on the worker pool.
+
+Pages are rendered with poppler when pdftoppm is installed; otherwise the
+pre-drawn page images are handed out directly so OCR scheduling can still be
+measured.
+
+Usage: python scripts/bench_pdf_extraction.py [--pages 1 2 4 8 10] [--fields-per-page 12]
+"""
+import argparse
+import asyncio
+import base64
+import io
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.config import get_settings  # noqa: E402
+from app.services.ocr import rasterizer  # noqa: E402
+from app.services.ocr.service import OCRService  # noqa: E402
+
+PAGE_SIZE = (2480, 3508)  # A4 at 300 dpi
+
+
+def build_document(page_count: int, fields_per_page: int):
+    """Draw the pages and return (pdf bytes, page images, all_page_params)."""
+    font = ImageFont.load_default(size=36)
+    pages, all_page_params = [], {}
+    for page_num in range(1, page_count + 1):
+        page = Image.new("L", PAGE_SIZE, 255)
+        draw = ImageDraw.Draw(page)
+        params = []
+        for i in range(fields_per_page):
+            x1, y1 = 100, 100 + i * 150
+            draw.text((x1 + 10, y1 + 8), f"P{page_num} FIELD {i} {4200 + i}", fill=0, font=font)
+            params.append({"id": f"p{page_num}_f{i}", "x1": x1, "y1": y1, "x2": x1 + 1200, "y2": y1 + 56})
+        pages.append(page)
+        all_page_params[str(page_num)] = params
+
+    buffer = io.BytesIO()
+    pages[0].save(buffer, format="PDF", save_all=True, append_images=pages[1:], resolution=300)
+    return buffer.getvalue(), pages, all_page_params
+
+
+async def sequential(service: OCRService, pdf_data: bytes, all_page_params) -> dict:
+    """The pre-scheduler strategy: one page at a time, fields in series."""
+    loop = asyncio.get_event_loop()
+    results = {}
+    with service._rasterizer(pdf_data) as pdf:
+        for page_num in sorted(int(key) for key in all_page_params):
+            image = await loop.run_in_executor(service.executor, pdf.render, page_num)
+            page_results = await loop.run_in_executor(
+                service.executor,
+                service._extract_fields_from_image_sync,
+                image,
+                all_page_params[str(page_num)],
+            )
+            results.update(page_results)
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 2, 4, 8, 10])
+    parser.add_argument("--fields-per-page", type=int, default=12)
+    args = parser.parse_args()
+
+    settings = get_settings()
+    service = OCRService()
+    service.page_cache = None  # Both strategies must render every page
+    print(f"engine={service.engine.name} workers={settings.WORKER_POOL_SIZE} dpi={settings.OCR_PDF_DPI}")
+
+    # Load the traineddata before timing anything
+    service.engine.image_to_string(np.full((32, 32), 255, np.uint8), settings.OCR_LANGUAGES)
+
+    use_poppler = shutil.which("pdftoppm") is not None
+    if not use_poppler:
+        print("pdftoppm not found, using pre-drawn page images instead of rendering")
+
+    print(f"{'pages':>5} {'sequential s':>13} {'concurrent s':>13} {'speedup':>8}")
+    for page_count in args.pages:
+        pdf_data, pages, all_page_params = build_document(page_count, args.fields_per_page)
+        if not use_poppler:
+            rasterizer.convert_from_path = lambda path, first_page, **kwargs: [pages[first_page - 1]]
+            rasterizer.pdfinfo_from_path = lambda path: {"Pages": len(pages)}
+
+        start = time.perf_counter()
+        expected = await sequential(service, pdf_data, all_page_params)
+        sequential_s = time.perf_counter() - start
+
+        pdf_base64 = base64.b64encode(pdf_data).decode("utf-8")
+        start = time.perf_counter()
+        results = await service.extract_fields_from_pdf_base64(pdf_base64, all_page_params)
+        concurrent_s = time.perf_counter() - start
+
+        assert list(results) == list(expected), "field order differs between strategies"
+        print(f"{page_count:>5} {sequential_s:>13.2f} {concurrent_s:>13.2f} {sequential_s / concurrent_s:>7.1f}x")
+
+    service.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
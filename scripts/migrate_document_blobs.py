@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Move document pages stored inline as base64 into the blob store.
+
+Documents uploaded before the blob store keep their pages as base64 strings
+in original_file/processing_file. This rewrites them as blob references, in
+batches of one transaction each; it can be re-run after an interruption. On
+PostgreSQL it can run while the API is serving (each batch locks its rows);
+on SQLite, stop the API first.
+
+Usage: python scripts/migrate_document_blobs.py [--batch-size 100]
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.database import AsyncSessionLocal, engine  # noqa: E402
+from app.services.storage.blob_store import get_blob_store  # noqa: E402
+from app.services.storage.pages import migrate_document_pages  # noqa: E402
+
+
+async def main(batch_size: int) -> None:
+    try:
+        migrated = await migrate_document_pages(AsyncSessionLocal, get_blob_store(), batch_size)
+        print(f"Migrated {migrated} documents")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=100, help="Documents per transaction")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(main(args.batch_size))
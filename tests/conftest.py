@@ -17,9 +17,11 @@ from app.main import app
 from app.models.document import Document  # noqa: F401
 from app.models.file import File  # noqa: F401
 from app.models.form import Form  # noqa: F401
-from app.models.ocr import OCRJob  # noqa: F401
+from app.models.ocr import OCRBatch, OCRJob  # noqa: F401
+from app.models.ocr_cache import OCRCacheEntry  # noqa: F401
 from app.models.template import Template  # noqa: F401
 from app.models.user import User  # noqa: F401
+from app.services.storage.blob_store import LocalBlobStore, get_blob_store
 
 # Test database file
 TEST_DB_FILE = Path(__file__).parent / "test.db"
@@ -76,14 +78,21 @@ async def db_session(db_engine) -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+@pytest.fixture
+def blob_store(tmp_path) -> LocalBlobStore:
+    """Create a blob store in a temporary directory."""
+    return LocalBlobStore(str(tmp_path / "blobs"))
+
+
 @pytest_asyncio.fixture
-async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
-    """Create a test client with test database."""
+async def client(db_session: AsyncSession, blob_store: LocalBlobStore) -> AsyncGenerator[AsyncClient, None]:
+    """Create a test client with test database and blob store."""
 
     async def override_get_db():
         yield db_session
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_blob_store] = lambda: blob_store
 
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:  # type: ignore
         yield ac
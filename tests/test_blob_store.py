@@ -0,0 +1,166 @@
+"""Tests for the blob store and document page migration."""
+import base64
+import hashlib
+import os
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from starlette.datastructures import Headers
+
+from app.core.database import Base
+from app.models.document import Document
+from app.services.storage.blob_store import BlobNotFoundError, LocalBlobStore
+from app.services.storage.pages import decode_page_text, migrate_document_pages, page_infos
+from app.services.storage.uploads import DocumentUploadParser, UploadTooLargeError
+
+PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
+)
+
+
+@pytest.mark.asyncio
+async def test_blobs_are_stored_once_and_streamed(blob_store):
+    """Test that blobs are keyed by content and read back in chunks."""
+    data = bytes(range(256)) * 100
+    info = await blob_store.put(data)
+    assert (info.digest, info.size) == (hashlib.sha256(data).hexdigest(), len(data))
+    assert await blob_store.put(data) == info
+    assert await blob_store.exists(info.digest)
+
+    chunks = [chunk async for chunk in blob_store.stream(info.digest, chunk_size=1000)]
+    assert len(chunks) == 26 and b"".join(chunks) == data
+    assert await blob_store.read(info.digest) == data
+
+    chunks = [chunk async for chunk in blob_store.stream(info.digest, chunk_size=1000, start=500, end=2600)]
+    assert [len(chunk) for chunk in chunks] == [1000, 1000, 100]
+    assert b"".join(chunks) == data[500:2600]
+
+
+@pytest.mark.asyncio
+async def test_put_stream_and_abort(blob_store: LocalBlobStore):
+    """Test that chunked writes hash as they go and aborted writes leave nothing behind."""
+    data = bytes(range(256)) * 100
+
+    async def chunks():
+        for i in range(0, len(data), 1000):
+            yield data[i : i + 1000]
+
+    info = await blob_store.put_stream(chunks())
+    assert info == await blob_store.put(data)
+    assert await blob_store.read(info.digest) == data
+
+    writer = await blob_store.open_writer()
+    await writer.write(b"partial")
+    await writer.abort()
+    assert os.listdir(blob_store._tmp_dir) == []
+
+
+def _multipart(boundary: str, parts) -> bytes:
+    body = b""
+    for name, filename, content in parts:
+        disposition = f'form-data; name="{name}"' + (f'; filename="{filename}"' if filename else "")
+        body += f"--{boundary}\r\nContent-Disposition: {disposition}\r\n\r\n".encode() + content + b"\r\n"
+    return body + f"--{boundary}--\r\n".encode()
+
+
+@pytest.mark.asyncio
+async def test_upload_parser_streams_pages(blob_store: LocalBlobStore):
+    """Test that pages arriving in small chunks are written to the blob store and limits apply per page."""
+    page = PNG * 50
+    body = _multipart(
+        "xyz",
+        [
+            ("page_count", None, b"3"),
+            ("1", "a.png", page),
+            ("2", None, base64.b64encode(PNG)),
+            ("3", "c.bin", page),
+            ("attachment", "notes.txt", b"ignored"),
+        ],
+    )
+    headers = Headers({"content-type": "multipart/form-data; boundary=xyz", "content-length": str(len(body))})
+
+    async def stream(chunk_size):
+        for i in range(0, len(body), chunk_size):
+            yield body[i : i + chunk_size]
+
+    parser = DocumentUploadParser(blob_store, headers, max_page_bytes=len(page), max_upload_bytes=len(body))
+    upload = await parser.parse(stream(7))
+    assert upload.fields == {"page_count": "3"}
+    assert (
+        upload.pages["1"]
+        == upload.pages["3"]
+        == {
+            "hash": hashlib.sha256(page).hexdigest(),
+            "size": len(page),
+            "content_type": "image/png",
+        }
+    )
+    assert upload.pages["2"]["hash"] == hashlib.sha256(PNG).hexdigest()
+    assert await blob_store.read(upload.pages["1"]["hash"]) == page
+
+    parser = DocumentUploadParser(blob_store, headers, max_page_bytes=len(page) - 1, max_upload_bytes=len(body))
+    with pytest.raises(UploadTooLargeError):
+        await parser.parse(stream(7))
+    assert os.listdir(blob_store._tmp_dir) == []
+
+
+@pytest.mark.asyncio
+async def test_missing_blobs(blob_store):
+    """Test that unknown and malformed hashes are reported as missing."""
+    assert not await blob_store.exists("0" * 64)
+    assert not await blob_store.exists("../../etc/passwd")
+    with pytest.raises(BlobNotFoundError):
+        await blob_store.read("0" * 64)
+
+
+def test_decode_page_text():
+    """Test that base64 pages are decoded and other text is kept as text."""
+    assert decode_page_text(base64.b64encode(PNG).decode()) == (PNG, "image/png")
+    assert decode_page_text("not base64!") == (b"not base64!", "text/plain; charset=utf-8")
+
+
+def test_page_infos():
+    """Test that page metadata is listed in page order and inline pages are not decoded."""
+    ref = {"hash": "a" * 64, "size": 3, "content_type": "image/png"}
+    assert page_infos({"10": ref, "2": "aW5saW5l", "1": ref}) == [
+        {"page": "1", **ref},
+        {"page": "2", "hash": None, "size": None, "content_type": None},
+        {"page": "10", **ref},
+    ]
+    assert page_infos(None) == []
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    """Sessions of a database of their own, as the migration runs outside a request."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'documents.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_migrate_document_pages(session_factory, blob_store: LocalBlobStore):
+    """Test that inline base64 pages move to the blob store in batches and migrated rows are skipped."""
+    page = base64.b64encode(PNG).decode()
+    async with session_factory() as session:
+        session.add_all(
+            [
+                Document(file_id=1, form_id=i, original_file={"1": page, "2": page}, processing_file={"1": page})
+                for i in range(3)
+            ]
+        )
+        session.add(Document(file_id=1, form_id=9, original_file=None))
+        await session.commit()
+
+    assert await migrate_document_pages(session_factory, blob_store, batch_size=2) == 3
+    assert await migrate_document_pages(session_factory, blob_store, batch_size=2) == 0
+
+    async with session_factory() as session:
+        document = await session.get(Document, 1)
+    ref = {"hash": hashlib.sha256(PNG).hexdigest(), "size": len(PNG), "content_type": "image/png"}
+    assert document.original_file == {"1": ref, "2": ref}
+    assert document.processing_file == {"1": ref}
+    assert await blob_store.read(ref["hash"]) == PNG
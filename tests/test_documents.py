@@ -1,10 +1,16 @@
 """Tests for document endpoints."""
 import base64
+import hashlib
 import io
+import os
 
+import cv2
+import numpy as np
 import pytest
 from httpx import AsyncClient
 
+from app.core.config import get_settings
+
 
 @pytest.mark.asyncio
 async def test_upload_document_single_page(client: AsyncClient):
@@ -329,8 +335,9 @@ async def test_update_existing_document(client: AsyncClient):
 
 
 @pytest.mark.asyncio
-async def test_get_documents_by_file(client: AsyncClient):
+async def test_get_documents_by_file(client: AsyncClient, monkeypatch):
     """Test getting all documents for a file."""
+    monkeypatch.setattr(get_settings(), "DOCUMENT_NORMALIZE_PAGES", False)  # Pages are stored as uploaded
     # Create a template
     template_response = await client.post(
         "/api/templates",
@@ -392,6 +399,24 @@ async def test_get_documents_by_file(client: AsyncClient):
     assert isinstance(data, list)
     assert len(data) == 2
 
+    # Metadata only: page references, no page contents
+    page = {
+        "page": "1",
+        "hash": hashlib.sha256(test_image).hexdigest(),
+        "size": len(test_image),
+        "content_type": "image/png",
+        "original_size": None,
+    }
+    assert [(doc["form_name"], doc["page_count"], doc["total_size"], doc["pages"]) for doc in data] == [
+        ("Form 1", 1, len(test_image), [page]),
+        ("Form 2", 1, len(test_image), [page]),
+    ]
+    assert "original_file" not in data[0] and "processing_file" not in data[0]
+
+    response = await client.get(f"/api/files/{file_id}/documents/{data[0]['id']}")
+    assert response.status_code == 200
+    assert response.json()["original_file"] == {"1": {key: page[key] for key in ("hash", "size", "content_type")}}
+
 
 @pytest.mark.asyncio
 async def test_delete_document(client: AsyncClient):
@@ -441,3 +466,262 @@ async def test_delete_document(client: AsyncClient):
     # Verify document list is empty
     list_response = await client.get(f"/api/files/{file_id}/documents")
     assert len(list_response.json()) == 0
+
+
+@pytest.mark.asyncio
+async def test_document_pages_in_blob_store(client: AsyncClient, blob_store, monkeypatch):
+    """Test that uploaded pages are stored as blobs and streamed back per page."""
+    monkeypatch.setattr(get_settings(), "DOCUMENT_NORMALIZE_PAGES", False)  # Pages are stored as uploaded
+    template_id = (await client.post("/api/templates", json={"name": "Test Template"})).json()["id"]
+    form_id = (
+        await client.post(
+            f"/api/templates/{template_id}/forms", json={"name": "Test Form", "formType": "customs_export"}
+        )
+    ).json()["id"]
+    file_id = (await client.post("/api/files", json={"template_id": template_id, "name": "Test File"})).json()["id"]
+
+    test_image = base64.b64decode(
+        "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
+    )
+    response = await client.post(
+        f"/api/files/{file_id}/documents/{form_id}",
+        files={
+            "1": ("page1.png", io.BytesIO(test_image), "image/png"),
+            "2": ("page2.bin", io.BytesIO(test_image), "application/octet-stream"),
+        },
+        data={"page_count": "2"},
+    )
+    assert response.status_code == 201
+    document = response.json()
+    pages = document["original_file"]
+    # Both pages have the same content: one blob, and the sniffed type for the untyped upload
+    assert (
+        pages["1"]
+        == pages["2"]
+        == {
+            "hash": hashlib.sha256(test_image).hexdigest(),
+            "size": len(test_image),
+            "content_type": "image/png",
+        }
+    )
+
+    response = await client.get(f"/api/files/{file_id}/documents/{document['id']}/pages/2")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+    assert response.content == test_image
+
+    assert (await client.get(f"/api/files/{file_id}/documents/{document['id']}/pages/3")).status_code == 404
+    assert (await client.get(f"/api/files/{file_id + 1}/documents/{document['id']}/pages/1")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_upload_document_size_limits(client: AsyncClient, blob_store, monkeypatch):
+    """Test that oversized pages and uploads are rejected with 413 and leave no partial blobs."""
+    monkeypatch.setattr(get_settings(), "DOCUMENT_MAX_PAGE_BYTES", 1000)
+    monkeypatch.setattr(get_settings(), "DOCUMENT_MAX_UPLOAD_BYTES", 5000)
+    template_id = (await client.post("/api/templates", json={"name": "Test Template"})).json()["id"]
+    form_id = (
+        await client.post(
+            f"/api/templates/{template_id}/forms", json={"name": "Test Form", "formType": "customs_export"}
+        )
+    ).json()["id"]
+    file_id = (await client.post("/api/files", json={"template_id": template_id, "name": "Test File"})).json()["id"]
+
+    response = await client.post(
+        f"/api/files/{file_id}/documents/{form_id}",
+        files={"1": ("page1.png", io.BytesIO(b"x" * 1001), "image/png")},
+        data={"page_count": "1"},
+    )
+    assert response.status_code == 413
+    assert "Page 1" in response.json()["detail"]
+
+    response = await client.post(
+        f"/api/files/{file_id}/documents/{form_id}",
+        files={str(page): (f"page{page}.png", io.BytesIO(b"x" * 1000), "image/png") for page in range(1, 7)},
+        data={"page_count": "6"},
+    )
+    assert response.status_code == 413
+    assert os.listdir(blob_store._tmp_dir) == []
+
+    response = await client.post(
+        f"/api/files/{file_id}/documents/{form_id}",
+        files={"1": ("page1.png", io.BytesIO(b"x" * 1000), "image/png")},
+        data={"page_count": "1"},
+    )
+    assert response.status_code == 201
+    assert response.json()["original_file"]["1"]["size"] == 1000
+
+
+@pytest.mark.asyncio
+async def test_document_page_caching_and_ranges(client: AsyncClient):
+    """Test ETag revalidation, hash-pinned immutable URLs and byte ranges on the page endpoint."""
+    template_id = (await client.post("/api/templates", json={"name": "Test Template"})).json()["id"]
+    form_id = (
+        await client.post(
+            f"/api/templates/{template_id}/forms", json={"name": "Test Form", "formType": "customs_export"}
+        )
+    ).json()["id"]
+    file_id = (await client.post("/api/files", json={"template_id": template_id, "name": "Test File"})).json()["id"]
+
+    content = b"%PDF-1.4 " + bytes(range(256)) * 40
+    document = (
+        await client.post(
+            f"/api/files/{file_id}/documents/{form_id}",
+            files={"1": ("page1.pdf", io.BytesIO(content), "application/pdf")},
+            data={"page_count": "1"},
+        )
+    ).json()
+    digest = hashlib.sha256(content).hexdigest()
+    url = f"/api/files/{file_id}/documents/{document['id']}/pages/1"
+
+    response = await client.get(url)
+    assert response.status_code == 200
+    assert response.headers["etag"] == f'"{digest}"'
+    assert response.headers["cache-control"] == "private, no-cache"
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.content == content
+
+    response = await client.get(url, headers={"If-None-Match": f'W/"other", "{digest}"'})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    response = await client.get(url, params={"hash": digest})
+    assert response.status_code == 200
+    assert "immutable" in response.headers["cache-control"]
+    assert (await client.get(url, params={"hash": "0" * 64})).status_code == 404
+
+    response = await client.get(url, headers={"Range": "bytes=100-199"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes 100-199/{len(content)}"
+    assert response.content == content[100:200]
+
+    response = await client.get(url, headers={"Range": "bytes=-50"})
+    assert response.status_code == 206
+    assert response.content == content[-50:]
+
+    # A stale If-Range gets the whole page; a range past the end gets 416
+    response = await client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert response.status_code == 200 and response.content == content
+    response = await client.get(url, headers={"Range": f"bytes={len(content)}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(content)}"
+
+
+@pytest.mark.asyncio
+async def test_document_page_renditions(client: AsyncClient, blob_store):
+    """Test that uploaded pages get preview renditions, regenerated on demand when missing."""
+    template_id = (await client.post("/api/templates", json={"name": "Test Template"})).json()["id"]
+    form_id = (
+        await client.post(
+            f"/api/templates/{template_id}/forms", json={"name": "Test Form", "formType": "customs_export"}
+        )
+    ).json()["id"]
+    file_id = (await client.post("/api/files", json={"template_id": template_id, "name": "Test File"})).json()["id"]
+
+    photo = cv2.imencode(".jpg", np.full((1200, 900, 3), 200, np.uint8))[1].tobytes()
+    document = (
+        await client.post(
+            f"/api/files/{file_id}/documents/{form_id}",
+            files={"1": ("page1.jpg", io.BytesIO(photo), "image/jpeg")},
+            data={"page_count": "1"},
+        )
+    ).json()
+    digest = document["original_file"]["1"]["hash"]
+    url = f"/api/files/{file_id}/documents/{document['id']}/pages/1/renditions"
+
+    # Generated after the upload response
+    response = await client.get(f"{url}/thumb", params={"hash": digest})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/jpeg"
+    assert "immutable" in response.headers["cache-control"]
+    assert cv2.imdecode(np.frombuffer(response.content, np.uint8), cv2.IMREAD_COLOR).shape == (200, 150, 3)
+    etag = response.headers["etag"]
+    assert (await client.get(f"{url}/thumb", headers={"If-None-Match": etag})).status_code == 304
+
+    assert (await client.get(f"{url}/huge")).status_code == 404
+
+    # A missing rendition is scheduled and available on the next request
+    os.unlink(blob_store.path(digest, "large"))
+    response = await client.get(f"{url}/large")
+    assert response.status_code == 404
+    assert response.headers["retry-after"] == "2"
+    assert (await client.get(f"{url}/large")).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_upload_normalises_page_images(client: AsyncClient, monkeypatch):
+    """Test that oversized page images are downscaled on upload and the bytes saved are listed."""
+    monkeypatch.setattr(get_settings(), "DOCUMENT_PAGE_MAX_DPI", 100)
+    template_id = (await client.post("/api/templates", json={"name": "Test Template"})).json()["id"]
+    form_id = (
+        await client.post(
+            f"/api/templates/{template_id}/forms", json={"name": "Test Form", "formType": "customs_export"}
+        )
+    ).json()["id"]
+    file_id = (await client.post("/api/files", json={"template_id": template_id, "name": "Test File"})).json()["id"]
+
+    pixels = np.random.default_rng(0).integers(0, 255, (2000, 1500, 3), np.uint8)
+    photo = cv2.imencode(".jpg", pixels, [cv2.IMWRITE_JPEG_QUALITY, 98])[1].tobytes()
+    response = await client.post(
+        f"/api/files/{file_id}/documents/{form_id}",
+        files={"1": ("page1.jpg", io.BytesIO(photo), "image/jpeg")},
+        data={"page_count": "1"},
+    )
+    assert response.status_code == 201
+    page = response.json()["original_file"]["1"]
+    assert page["original_size"] == len(photo) > page["size"]
+
+    listed = (await client.get(f"/api/files/{file_id}/documents")).json()[0]
+    assert listed["bytes_saved"] == len(photo) - page["size"]
+    content = (await client.get(f"/api/files/{file_id}/documents/{listed['id']}/pages/1")).content
+    assert cv2.imdecode(np.frombuffer(content, np.uint8), cv2.IMREAD_COLOR).shape == (1169, 877, 3)
+
+
+@pytest.mark.asyncio
+async def test_get_documents_by_file_loads_no_page_data(client: AsyncClient, db_engine, db_session):
+    """Test that listing documents reads page metadata from references, without processing pages or template images."""
+    from sqlalchemy import event
+
+    from app.models.document import Document
+    from app.models.form import Form
+
+    template_id = (await client.post("/api/templates", json={"name": "Test Template"})).json()["id"]
+    form_id = (
+        await client.post(f"/api/templates/{template_id}/forms", json={"name": "Form", "formType": "customs_export"})
+    ).json()["id"]
+    file_id = (await client.post("/api/files", json={"template_id": template_id, "name": "Test File"})).json()["id"]
+
+    # A form template with an inline image and a document with a migrated and a legacy inline page
+    page = base64.b64encode(b"\x89PNG\r\n\x1a\n" + b"\0" * 1000).decode()
+    ref = {"hash": "ab" * 32, "size": 1008, "content_type": "image/png"}
+    form = await db_session.get(Form, form_id)
+    form.template = {"data": [{"page": 1, "binary": page, "type": "image/png"}]}
+    db_session.add(
+        Document(
+            file_id=file_id,
+            form_id=form_id,
+            original_file={"1": ref, "2": page},
+            processing_file={"1": page},
+            params={},
+        )
+    )
+    await db_session.commit()
+    db_session.expunge_all()
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        response = await client.get(f"/api/files/{file_id}/documents")
+    finally:
+        event.remove(db_engine.sync_engine, "before_cursor_execute", capture)
+
+    assert response.status_code == 200
+    [document] = response.json()
+    assert (document["form_name"], document["page_count"], document["total_size"]) == ("Form", 2, 1008)
+    assert [page["hash"] for page in document["pages"]] == [ref["hash"], None]
+    assert statements
+    assert not [s for s in statements if "forms.template" in s or "documents.processing_file" in s]
@@ -1,4 +1,9 @@
 """Tests for form endpoints."""
+import base64
+import hashlib
+
+import cv2
+import numpy as np
 import pytest
 from httpx import AsyncClient
 
@@ -236,3 +241,69 @@ async def test_form_types(client: AsyncClient):
         )
         assert response.status_code == 201
         assert response.json()["formType"] == form_type
+
+
+@pytest.mark.asyncio
+async def test_form_template_page_renditions(client: AsyncClient):
+    """Test that template page images are hashed into the blob store and get preview renditions."""
+    template_id = (await client.post("/api/templates", json={"name": "Test Template"})).json()["id"]
+    image = cv2.imencode(".png", np.full((1131, 800, 3), 255, np.uint8))[1].tobytes()
+    response = await client.post(
+        f"/api/templates/{template_id}/forms",
+        json={
+            "name": "Test Form",
+            "formType": "customs_export",
+            "template": {"data": [{"page": 1, "binary": base64.b64encode(image).decode(), "type": "image/png"}]},
+        },
+    )
+    assert response.status_code == 201
+    form = response.json()
+    page = form["template"]["data"][0]
+    assert page["hash"] == hashlib.sha256(image).hexdigest()
+    assert "binary" not in page
+
+    url = f"/api/templates/{template_id}/forms/{form['id']}/pages/1/image"
+    response = await client.get(url, params={"hash": page["hash"]})
+    assert (response.status_code, response.content) == (200, image)
+    assert response.headers["etag"] == f'"{page["hash"]}"'
+
+    url = f"/api/templates/{template_id}/forms/{form['id']}/pages/1/renditions/small"
+    response = await client.get(url, params={"hash": page["hash"]})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/jpeg"
+    assert cv2.imdecode(np.frombuffer(response.content, np.uint8), cv2.IMREAD_COLOR).shape == (640, 453, 3)
+    assert (await client.get(url.replace("/pages/1/", "/pages/2/"))).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_form_template_pages_as_read_by_client(client: AsyncClient):
+    """Test that listed form template pages carry what the client shows them from: page, type, size and hash."""
+    template_id = (await client.post("/api/templates", json={"name": "Test Template"})).json()["id"]
+    image = cv2.imencode(".png", np.full((20, 10, 3), 255, np.uint8))[1].tobytes()
+    entry = {"page": 1, "binary": base64.b64encode(image).decode(), "size": {"width": 800, "height": 1131}}
+    form_id = (
+        await client.post(
+            f"/api/templates/{template_id}/forms",
+            json={
+                "name": "Test Form",
+                "formType": "customs_export",
+                "template": {"data": [{**entry, "type": "image/png"}]},
+            },
+        )
+    ).json()["id"]
+
+    (form,) = (await client.get(f"/api/templates/{template_id}/forms")).json()
+    (page,) = form["template"]["data"]
+    assert page == {
+        "page": 1,
+        "size": {"width": 800, "height": 1131},
+        "type": "image/png",
+        "hash": hashlib.sha256(image).hexdigest(),
+    }
+
+    # The URL the client builds from them
+    response = await client.get(
+        f"/api/templates/{form['template_id']}/forms/{form_id}/pages/{page['page']}/image",
+        params={"hash": page["hash"]},
+    )
+    assert (response.status_code, response.headers["content-type"], response.content) == (200, "image/png", image)
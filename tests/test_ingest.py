@@ -0,0 +1,93 @@
+"""Tests for ingest-time page normalisation."""
+import io
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.services.image_processing.service import ImageProcessingService
+from app.services.storage.blob_store import LocalBlobStore
+from app.services.storage.ingest import PageIngest
+from app.services.storage.pages import page_ref
+
+
+def _photo(width: int, height: int, orientation: int = 1) -> bytes:
+    """A noisy JPEG, as from a phone camera, with an EXIF orientation."""
+    pixels = np.random.default_rng(0).integers(0, 255, (height, width, 3), np.uint8)
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, "JPEG", quality=98, exif=exif.tobytes())
+    return buffer.getvalue()
+
+
+async def _stage(staging: LocalBlobStore, data: bytes, content_type: str):
+    return page_ref(await staging.put(data), content_type)
+
+
+@pytest.fixture
+def staging(tmp_path):
+    return LocalBlobStore(str(tmp_path / "staging"))
+
+
+@pytest.mark.asyncio
+async def test_ingest_downscales_and_applies_orientation(blob_store, staging):
+    """Test that large photos are capped, rotated per EXIF once and re-encoded smaller."""
+    photo = _photo(2400, 1800, orientation=6)
+    ingest = PageIngest(blob_store, normalize=True, max_dpi=100, encoding="jpeg", jpeg_quality=85)
+
+    ref = await ingest.ingest(staging, await _stage(staging, photo, "image/jpeg"))
+    assert ref["content_type"] == "image/jpeg"
+    assert ref["original_size"] == len(photo) > ref["size"]
+    page = ImageProcessingService().decode(await blob_store.read(ref["hash"]))
+    # Rotated to portrait, long edge of A4 at 100 dpi
+    assert page.shape == (1169, 877, 3)
+    with Image.open(io.BytesIO(await blob_store.read(ref["hash"]))) as stored:
+        assert stored.getexif().get(0x0112, 1) == 1
+
+    assert ingest.report.pages == 1
+    assert ingest.report.bytes_saved == len(photo) - ref["size"]
+
+
+@pytest.mark.asyncio
+async def test_ingest_applies_orientation_when_pillow_decodes(blob_store, staging, monkeypatch):
+    """Test that the EXIF orientation is also applied to pages OpenCV cannot decode."""
+    from app.services.image_processing import service
+
+    photo = _photo(2400, 1800, orientation=6)
+    imdecode = cv2.imdecode
+    monkeypatch.setattr(service.cv2, "imdecode", lambda buffer, flags: None)
+    ingest = PageIngest(blob_store, normalize=True, max_dpi=100, encoding="jpeg", jpeg_quality=85)
+
+    ref = await ingest.ingest(staging, await _stage(staging, photo, "image/jpeg"))
+    page = imdecode(np.frombuffer(await blob_store.read(ref["hash"]), np.uint8), cv2.IMREAD_COLOR)
+    assert page.shape == (1169, 877, 3)
+
+
+@pytest.mark.asyncio
+async def test_ingest_keeps_small_pages_and_pdfs(blob_store, staging):
+    """Test that pages normalisation would not shrink, and non-images, are stored as uploaded."""
+    png = cv2.imencode(".png", np.full((100, 80), 255, np.uint8))[1].tobytes()
+    pdf = b"%PDF-1.4 not really"
+    ingest = PageIngest(blob_store, normalize=True, max_dpi=100, encoding="jpeg")
+
+    for data, content_type in ((png, "image/png"), (pdf, "application/pdf")):
+        staged = await _stage(staging, data, content_type)
+        assert await ingest.ingest(staging, staged) == staged
+        assert await blob_store.read(staged["hash"]) == data
+
+
+@pytest.mark.asyncio
+async def test_ingest_grayscale_png_and_cold_originals(blob_store, staging, tmp_path):
+    """Test lossless grayscale encoding and that originals are kept in the cold store."""
+    originals = LocalBlobStore(str(tmp_path / "originals"))
+    photo = _photo(2400, 1800)
+    ingest = PageIngest(blob_store, originals_store=originals, normalize=True, max_dpi=50, encoding="png-gray")
+
+    ref = await ingest.ingest(staging, await _stage(staging, photo, "image/jpeg"))
+    assert ref["content_type"] == "image/png"
+    page = cv2.imdecode(np.frombuffer(await blob_store.read(ref["hash"]), np.uint8), cv2.IMREAD_UNCHANGED)
+    assert page.shape == (438, 584)
+    assert ref["original"]["size"] == len(photo)
+    assert await originals.read(ref["original"]["hash"]) == photo
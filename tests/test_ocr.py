@@ -1,8 +1,27 @@
 """Tests for OCR endpoints."""
+import asyncio
 import base64
+import io
+import json
+from datetime import timedelta
 
 import pytest
 from httpx import AsyncClient
+from PIL import Image
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.api.v1.ocr import ocr_service
+from app.core.config import get_settings
+from app.models.ocr import JobStatus, OCRJob
+from app.repositories.ocr_repository import OCRRepository, utcnow
+from app.services.ocr import rasterizer
+from app.services.ocr.admission import AdmissionController
+from app.services.ocr.cache import OCRResultCache
+from app.services.ocr.events import broker as job_events
+from app.services.ocr.events import job_event
+from app.services.ocr.layout import OCRWord
+from app.services.ocr.page_cache import RenderedPageCache
+from app.services.ocr.worker import OCRJobWorker
 
 
 @pytest.mark.asyncio
@@ -74,3 +93,551 @@ async def test_ocr_scan_missing_image(client: AsyncClient):
     # Should accept empty request and potentially return error or handle gracefully
     # The actual behavior depends on the API implementation
     assert response.status_code in [200, 400, 422]
+
+
+@pytest.mark.asyncio
+async def test_ocr_scan_only_enqueues(client: AsyncClient, db_session, monkeypatch):
+    """Test that scan jobs are queued for the workers and refused once the queue is full."""
+    response = await client.post("/api/ocr/scan", json={"image_base64": _png_base64(), "language": "vie"})
+    assert response.status_code == 200
+    assert (response.json()["status"], response.json()["attempts"]) == ("pending", 0)
+
+    job = (await client.get(f"/api/ocr/jobs/{response.json()['job_id']}")).json()
+    assert job["status"] == "pending"
+
+    # Jobs have been taking the workers 30 seconds
+    now = utcnow()
+    db_session.add(
+        OCRJob(job_id="done", status=JobStatus.COMPLETED, started_at=now - timedelta(seconds=30), finished_at=now)
+    )
+    await db_session.commit()
+
+    monkeypatch.setattr(get_settings(), "OCR_JOB_MAX_PENDING", 1)
+    response = await client.post("/api/ocr/scan", json={"image_base64": _png_base64()})
+    assert response.status_code == 503
+    # The pending job and the new one, one at a time
+    assert response.headers["Retry-After"] == "60"
+
+
+@pytest.mark.asyncio
+async def test_ocr_scan_deduplicates_same_image(client: AsyncClient, db_session):
+    """Test that the same image and language are queued once, until that job fails."""
+    payload = {"image_base64": _png_base64(), "language": "eng"}
+    first = (await client.post("/api/ocr/scan", json=payload)).json()
+    assert (await client.post("/api/ocr/scan", json=payload)).json()["job_id"] == first["job_id"]
+    other = (await client.post("/api/ocr/scan", json={**payload, "language": "vie"})).json()
+    assert other["job_id"] != first["job_id"]
+
+    await OCRRepository(db_session).update_status(first["job_id"], JobStatus.FAILED, error_message="crashed")
+    retried = (await client.post("/api/ocr/scan", json=payload)).json()
+    assert (retried["job_id"] != first["job_id"], retried["status"]) == (True, "pending")
+    assert (await client.post("/api/ocr/scan", json=payload)).json()["job_id"] == retried["job_id"]
+
+
+@pytest.mark.asyncio
+async def test_ocr_scan_idempotency_key(client: AsyncClient, db_session):
+    """Test that a retried request with the same Idempotency-Key gets the original job."""
+    headers = {"Idempotency-Key": "upload-42"}
+    payload = {"image_base64": _png_base64(width=50)}
+    first = (await client.post("/api/ocr/scan", json=payload, headers=headers)).json()
+    await OCRRepository(db_session).update_status(first["job_id"], JobStatus.FAILED, error_message="crashed")
+
+    # The key replays the original outcome, even a failure
+    replay = await client.post("/api/ocr/scan", json=payload, headers=headers)
+    assert (replay.json()["job_id"], replay.json()["status"]) == (first["job_id"], "failed")
+
+    # Still so once a submission without the key has queued the image again
+    assert (await client.post("/api/ocr/scan", json=payload)).json()["job_id"] != first["job_id"]
+    replay = await client.post("/api/ocr/scan", json=payload, headers=headers)
+    assert (replay.status_code, replay.json()["job_id"]) == (200, first["job_id"])
+
+    response = await client.post("/api/ocr/scan", json={"image_base64": _png_base64(width=60)}, headers=headers)
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_ocr_list_jobs(client: AsyncClient, db_session):
+    """Test that jobs are listed newest first, filtered by status and paged by cursor."""
+    job_ids = [
+        (await client.post("/api/ocr/scan", json={"image_base64": _png_base64(width=10 + i)})).json()["job_id"]
+        for i in range(5)
+    ]
+    await OCRRepository(db_session).update_status(job_ids[1], JobStatus.COMPLETED, result_text="done")
+
+    page = (await client.get("/api/ocr/jobs", params={"limit": 2})).json()
+    assert [job["job_id"] for job in page["jobs"]] == job_ids[:-3:-1]
+    assert "result_text" not in page["jobs"][0]
+
+    seen = [job["job_id"] for job in page["jobs"]]
+    while page["next_cursor"]:
+        page = (await client.get("/api/ocr/jobs", params={"limit": 2, "cursor": page["next_cursor"]})).json()
+        seen += [job["job_id"] for job in page["jobs"]]
+    assert seen == job_ids[::-1]
+
+    page = (await client.get("/api/ocr/jobs", params={"status": "completed"})).json()
+    assert ([job["job_id"] for job in page["jobs"]], page["next_cursor"]) == ([job_ids[1]], None)
+    assert (await client.get("/api/ocr/jobs", params={"cursor": "nonsense"})).status_code == 400
+    assert (await client.get("/api/ocr/jobs", params={"limit": 1000})).status_code == 422
+
+
+def _sse_events(body: str) -> list:
+    """Data of the events in a Server-Sent Events body."""
+    return [json.loads(line[len("data: ") :]) for line in body.splitlines() if line.startswith("data: ")]
+
+
+@pytest.mark.asyncio
+async def test_ocr_job_events_stream(client: AsyncClient, db_engine):
+    """Test that the stream sends the current state, pushed changes and the final result."""
+    job_id = (await client.post("/api/ocr/scan", json={"image_base64": _png_base64()})).json()["job_id"]
+    stream = asyncio.ensure_future(client.get(f"/api/ocr/jobs/{job_id}/events"))
+    while job_id not in job_events.watched():
+        await asyncio.sleep(0.01)
+    # Let the stream send the current state before the job changes
+    await asyncio.sleep(0.1)
+
+    # A worker's session, separate from the request's
+    async with async_sessionmaker(db_engine, expire_on_commit=False)() as session:
+        repo = OCRRepository(session)
+        job = await repo.update_status(job_id, JobStatus.PROCESSING, attempts=1)
+        job_events.publish(job_event(job))
+        job = await repo.update_status(job_id, JobStatus.COMPLETED, result_text="hello")
+        job_events.publish(job_event(job))
+    response = await asyncio.wait_for(stream, timeout=5)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _sse_events(response.text)
+    assert [event["status"] for event in events] == ["pending", "processing", "completed"]
+    assert events[-1]["result_text"] == "hello"
+    assert job_events.watched() == []
+
+    # A finished job is sent once and the stream ends
+    response = await client.get(f"/api/ocr/jobs/{job_id}/events")
+    assert [event["status"] for event in _sse_events(response.text)] == ["completed"]
+    assert (await client.get("/api/ocr/jobs/missing/events")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_ocr_batch_progress_and_results(client: AsyncClient, db_session):
+    """Test that a batch queues one job per image and aggregates their progress and text."""
+    response = await client.post("/api/ocr/batches", json={"images": [_png_base64()] * 3, "language": "eng"})
+    assert response.status_code == 201
+    batch = response.json()
+    assert (batch["status"], batch["total"], batch["counts"], batch["progress"]) == ("pending", 3, {"pending": 3}, 0)
+
+    # Workers finish the second and third image
+    repo = OCRRepository(db_session)
+    jobs = sorted((await repo.get_all()), key=lambda job: job.position)
+    assert [job.payload["language"] for job in jobs] == ["eng"] * 3
+    await repo.update_status(jobs[1].job_id, JobStatus.COMPLETED, result_text="second\n")
+    await repo.update_status(jobs[2].job_id, JobStatus.COMPLETED, result_text="third")
+
+    batch = (await client.get(f"/api/ocr/batches/{batch['batch_id']}")).json()
+    assert (batch["status"], batch["counts"], batch["progress"], batch["jobs"]) == (
+        "processing",
+        {"pending": 1, "completed": 2},
+        0.6667,
+        None,
+    )
+
+    await repo.update_status(jobs[0].job_id, JobStatus.FAILED, error_message="unreadable")
+    batch = (await client.get(f"/api/ocr/batches/{batch['batch_id']}?include_results=true")).json()
+    assert (batch["status"], batch["progress"]) == ("failed", 1.0)
+    assert [job["position"] for job in batch["jobs"]] == [0, 1, 2]
+    assert batch["combined_text"] == "--- Image 2 ---\nsecond\n\n--- Image 3 ---\nthird"
+    assert (await client.get("/api/ocr/batches/missing")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_ocr_batch_upload_and_limits(client: AsyncClient, monkeypatch):
+    """Test multipart batch submission and the batch size and queue limits."""
+    image = base64.b64decode(_png_base64())
+    files = [("files", (f"page{i}.png", image, "image/png")) for i in range(2)]
+    response = await client.post("/api/ocr/batches/upload", files=files, data={"language": "vie"})
+    assert response.status_code == 201
+    assert response.json()["total"] == 2
+
+    monkeypatch.setattr(get_settings(), "OCR_BATCH_MAX_IMAGE_BYTES", len(image) - 1)
+    assert (await client.post("/api/ocr/batches/upload", files=files)).status_code == 413
+    monkeypatch.setattr(get_settings(), "OCR_BATCH_MAX_IMAGE_BYTES", len(image))
+    monkeypatch.setattr(get_settings(), "OCR_BATCH_MAX_UPLOAD_BYTES", 2 * len(image) - 1)
+    assert (await client.post("/api/ocr/batches/upload", files=files)).status_code == 413
+
+    assert (await client.post("/api/ocr/batches", json={"images": []})).status_code == 400
+    monkeypatch.setattr(get_settings(), "OCR_BATCH_MAX_IMAGES", 2)
+    assert (await client.post("/api/ocr/batches", json={"images": [_png_base64()] * 3})).status_code == 400
+
+    # The whole batch must fit in the queue
+    monkeypatch.setattr(get_settings(), "OCR_JOB_MAX_PENDING", 3)
+    response = await client.post("/api/ocr/batches", json={"images": [_png_base64()] * 2})
+    assert response.status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_ocr_batch_cancel(client: AsyncClient, db_session):
+    """Test that cancelling a batch stops its unfinished jobs and keeps finished results."""
+    batch_id = (await client.post("/api/ocr/batches", json={"images": [_png_base64()] * 3})).json()["batch_id"]
+    repo = OCRRepository(db_session)
+    jobs = sorted((await repo.get_all()), key=lambda job: job.position)
+    await repo.update_status(jobs[0].job_id, JobStatus.COMPLETED, result_text="done")
+    await repo.update_status(jobs[1].job_id, JobStatus.PROCESSING, locked_by="w1")
+
+    with job_events.subscribe(jobs[1].job_id) as queue:
+        response = await client.post(f"/api/ocr/batches/{batch_id}/cancel")
+        assert queue.get_nowait()["status"] == "cancelled"
+
+    assert response.status_code == 200
+    batch = response.json()
+    assert (batch["status"], batch["counts"], batch["progress"]) == (
+        "cancelled",
+        {"completed": 1, "cancelled": 2},
+        1.0,
+    )
+    assert batch["cancelled_at"] is not None
+    # Cancelled jobs are never handed to a worker
+    assert await repo.claim_next("w2", lease_seconds=60) is None
+    assert not await repo.heartbeat(jobs[1].job_id, "w1", 60)
+
+
+def _png_base64(width: int = 400, height: int = 200) -> str:
+    """Create a blank PNG image encoded as base64."""
+    buffer = io.BytesIO()
+    Image.new("L", (width, height), 255).save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode("utf-8")
+
+
+class FakeEngine:
+    """OCR engine returning fixed words, counting how often it runs."""
+
+    name = "fake"
+
+    def __init__(self):
+        self.calls = {"string": 0, "words": 0}
+        self.shapes = []
+        self.profiles = []
+
+    def image_to_string(self, image, lang, profile=None):
+        self.calls["string"] += 1
+        self.shapes.append(image.shape)
+        self.profiles.append(profile)
+        return "region text"
+
+    def image_to_words(self, image, lang):
+        self.calls["words"] += 1
+        return [
+            OCRWord("INV-001", 20, 20, 120, 40),
+            OCRWord("Line", 20, 110, 80, 130),
+            OCRWord("two", 90, 110, 140, 130),
+            OCRWord("Line", 20, 80, 80, 100),
+            OCRWord("one", 90, 80, 140, 100),
+        ]
+
+
+@pytest.fixture
+def fake_engine(monkeypatch):
+    """Swap the OCR engine of the shared service for a fake, with an empty result cache."""
+    engine = FakeEngine()
+    monkeypatch.setattr(ocr_service, "engine", engine)
+    monkeypatch.setattr(ocr_service, "cache", OCRResultCache(max_entries=100))
+    return engine
+
+
+@pytest.mark.asyncio
+async def test_extract_fields_uses_result_cache(client: AsyncClient, fake_engine):
+    """Test that a repeated request is answered from the cache without OCR."""
+    payload = {
+        "image_base64": _png_base64(),
+        "page_params": [
+            {"id": "SOTK", "x1": 0, "y1": 0, "x2": 200, "y2": 50},
+            {"id": "MA_HQ", "x1": 0, "y1": 70, "x2": 200, "y2": 150},
+        ],
+    }
+
+    first = await client.post("/api/ocr/extract-fields", json=payload)
+    second = await client.post("/api/ocr/extract-fields", json=payload)
+
+    assert first.json()["fields"] == second.json()["fields"] == {"SOTK": "region text", "MA_HQ": "region text"}
+    assert fake_engine.calls["string"] == 2
+
+    # Moving one box only re-runs OCR for that field
+    payload["page_params"][1]["y2"] = 160
+    await client.post("/api/ocr/extract-fields", json=payload)
+    assert fake_engine.calls["string"] == 3
+
+    stats = (await client.get("/api/ocr/stats")).json()["cache"]
+    assert stats["hits"] == 3
+    assert stats["misses"] == 3
+
+
+@pytest.mark.asyncio
+async def test_extract_fields_page_mode(client: AsyncClient, fake_engine):
+    """Test single-pass page extraction assigns words to field rectangles."""
+    response = await client.post(
+        "/api/ocr/extract-fields",
+        json={
+            "image_base64": _png_base64(),
+            "mode": "page",
+            "page_params": [
+                {"id": "SOTK", "x1": 0, "y1": 0, "x2": 200, "y2": 50},
+                {"id": "ADDRESS", "x1": 0, "y1": 70, "x2": 200, "y2": 150, "isMultiline": True},
+                {"id": "EMPTY", "x1": 300, "y1": 0, "x2": 400, "y2": 50},
+            ],
+        },
+    )
+    assert response.status_code == 200
+    fields = response.json()["fields"]
+    assert fields == {"SOTK": "INV-001", "ADDRESS": "Line one\nLine two", "EMPTY": ""}
+    assert fake_engine.calls == {"string": 0, "words": 1}
+
+
+@pytest.mark.asyncio
+async def test_extract_fields_mode_from_form(client: AsyncClient, fake_engine):
+    """Test the extraction mode is taken from the form's ocr_config."""
+    template_response = await client.post("/api/templates", json={"name": "Test Template"})
+    template_id = template_response.json()["id"]
+    form_response = await client.post(
+        f"/api/templates/{template_id}/forms",
+        json={
+            "name": "Test Form",
+            "formType": "customs_export",
+            "allPageParams": {"1": [{"id": "SOTK", "x1": 0, "y1": 0, "x2": 200, "y2": 50}]},
+            "ocrConfig": {"mode": "page"},
+        },
+    )
+    form_id = form_response.json()["id"]
+
+    response = await client.post(
+        "/api/ocr/extract-fields",
+        json={"image_base64": _png_base64(), "form_id": form_id},
+    )
+    assert response.status_code == 200
+    assert response.json()["fields"] == {"SOTK": "INV-001"}
+    assert fake_engine.calls["words"] == 1
+
+    # An explicit request mode wins over the form setting
+    response = await client.post(
+        "/api/ocr/extract-fields",
+        json={"image_base64": _png_base64(), "form_id": form_id, "mode": "region"},
+    )
+    assert response.json()["fields"] == {"SOTK": "region text"}
+
+
+@pytest.fixture
+def fake_pdf(monkeypatch, tmp_path):
+    """Replace poppler with a fake 5-page document, recording which pages get rendered."""
+    rendered = []
+    monkeypatch.setattr(ocr_service, "page_cache", RenderedPageCache(str(tmp_path), max_bytes=10 * 1024**2))
+
+    def convert_from_path(path, dpi, first_page, last_page, grayscale):
+        assert first_page == last_page
+        if first_page > 5:
+            return []
+        rendered.append(first_page)
+        return [Image.new("L" if grayscale else "RGB", (400, 200), 255)]
+
+    def render_region(path, page, dpi, x, y, width, height, grayscale):
+        if page > 5:
+            return None
+        rendered.append((page, dpi, x, y, width, height))
+        return Image.new("L" if grayscale else "RGB", (width, height), 255)
+
+    monkeypatch.setattr(rasterizer, "convert_from_path", convert_from_path)
+    monkeypatch.setattr(rasterizer, "render_region", render_region)
+    monkeypatch.setattr(rasterizer, "pdfinfo_from_path", lambda path: {"Pages": 5})
+    monkeypatch.setattr(rasterizer, "read_text_layer", lambda path, page, dpi: [])
+    return rendered
+
+
+@pytest.mark.asyncio
+async def test_extract_fields_pdf_renders_referenced_pages_only(client: AsyncClient, fake_engine, fake_pdf):
+    """Test that only pages with fields are rasterized, in page order."""
+    pdf_base64 = base64.b64encode(b"%PDF-1.4 test").decode("utf-8")
+    field = {"x1": 0, "y1": 0, "x2": 100, "y2": 50}
+
+    response = await client.post(
+        "/api/ocr/extract-fields",
+        json={
+            "image_base64": pdf_base64,
+            "all_page_params": {
+                "4": [{"id": "B", **field}],
+                "2": [{"id": "A", **field}],
+                "3": [],
+                "9": [{"id": "C", **field}],
+            },
+        },
+    )
+    assert response.status_code == 200
+    assert response.json()["fields"] == {"A": "region text", "B": "region text"}
+    assert sorted(fake_pdf) == [2, 4]
+
+
+@pytest.mark.asyncio
+async def test_extract_fields_job(client: AsyncClient, fake_engine, fake_pdf, db_engine):
+    """Test that the async variant queues the extraction and a worker stores its fields page by page."""
+    pdf_base64 = base64.b64encode(b"%PDF-1.4 async").decode("utf-8")
+    field = {"x1": 0, "y1": 0, "x2": 100, "y2": 50}
+    payload = {
+        "image_base64": pdf_base64,
+        "all_page_params": {"2": [{"id": "A", **field}], "4": [{"id": "B", **field}]},
+    }
+
+    response = await client.post("/api/ocr/extract-fields/jobs", json=payload)
+    assert response.status_code == 202
+    job = response.json()
+    assert (job["kind"], job["status"], job["pages_total"], job["pages_done"]) == ("extract_fields", "pending", 2, 0)
+    assert fake_pdf == []
+
+    worker = OCRJobWorker(ocr_service, async_sessionmaker(db_engine, expire_on_commit=False), worker_id="w1")
+    assert await worker.run_once()
+
+    job = (await client.get(f"/api/ocr/jobs/{job['job_id']}")).json()
+    assert (job["status"], job["pages_done"]) == ("completed", 2)
+    assert job["result_fields"] == {"A": "region text", "B": "region text"}
+    assert job["field_sources"] == {"A": "ocr", "B": "ocr"}
+
+    response = await client.post("/api/ocr/extract-fields/jobs", json={**payload, "document_id": 999})
+    assert response.status_code == 404
+    response = await client.post("/api/ocr/extract-fields/jobs", json={"image_base64": pdf_base64})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_extract_fields_pdf_reuses_rendered_pages(client: AsyncClient, fake_engine, fake_pdf, monkeypatch):
+    """Test that a PDF seen before is cropped from the page cache without rendering."""
+    pdf_base64 = base64.b64encode(b"%PDF-1.4 cached").decode("utf-8")
+    all_page_params = {"1": [{"id": "A", "x1": 0, "y1": 0, "x2": 100, "y2": 50}]}
+
+    await client.post("/api/ocr/extract-fields", json={"image_base64": pdf_base64, "all_page_params": all_page_params})
+    assert fake_pdf == [1]
+
+    # Different field box, so the result cache cannot answer it
+    all_page_params["1"][0]["y2"] = 60
+    response = await client.post(
+        "/api/ocr/extract-fields", json={"image_base64": pdf_base64, "all_page_params": all_page_params}
+    )
+    assert response.json()["fields"] == {"A": "region text"}
+    assert fake_pdf == [1]
+
+
+@pytest.mark.asyncio
+async def test_extract_fields_pdf_region_rendering(client: AsyncClient, fake_engine, fake_pdf, monkeypatch):
+    """Test that region mode renders only the field areas, at a DPI matched to each box height."""
+    monkeypatch.setattr(get_settings(), "OCR_PDF_RENDER_MODE", "region")
+    pdf_base64 = base64.b64encode(b"%PDF-1.4 regions").decode("utf-8")
+
+    response = await client.post(
+        "/api/ocr/extract-fields",
+        json={
+            "image_base64": pdf_base64,
+            "all_page_params": {
+                "1": [
+                    {"id": "SMALL", "x1": 100, "y1": 100, "x2": 400, "y2": 130},
+                    {"id": "LARGE", "x1": 100, "y1": 1000, "x2": 700, "y2": 1090},
+                ],
+                "7": [{"id": "MISSING", "x1": 0, "y1": 0, "x2": 10, "y2": 10}],
+            },
+        },
+    )
+
+    assert response.json()["fields"] == {"SMALL": "region text", "LARGE": "region text"}
+    # 30 px box -> 600 dpi, 90 px box -> 200 dpi; each rendered with 8 px padding
+    assert fake_pdf == [(1, 200, 61, 661, 411, 71), (1, 600, 184, 184, 632, 92)]
+    assert sorted(fake_engine.shapes) == [(60, 400), (60, 600)]
+
+
+@pytest.mark.asyncio
+async def test_extract_fields_pdf_text_layer(client: AsyncClient, fake_engine, fake_pdf, monkeypatch):
+    """Test that fields covered by embedded PDF text skip rendering and OCR."""
+    text_layers = {1: [OCRWord("INV-001", 20, 20, 120, 40)], 2: []}
+    monkeypatch.setattr(rasterizer, "read_text_layer", lambda path, page, dpi: text_layers[page])
+    pdf_base64 = base64.b64encode(b"%PDF-1.4 digital").decode("utf-8")
+
+    response = await client.post(
+        "/api/ocr/extract-fields",
+        json={
+            "image_base64": pdf_base64,
+            "all_page_params": {
+                "1": [
+                    {"id": "SOTK", "x1": 0, "y1": 0, "x2": 200, "y2": 50},
+                    {"id": "STAMP", "x1": 0, "y1": 100, "x2": 200, "y2": 150},
+                ],
+                "2": [{"id": "MA_HQ", "x1": 0, "y1": 0, "x2": 200, "y2": 50}],
+            },
+        },
+    )
+
+    data = response.json()
+    assert data["fields"] == {"SOTK": "INV-001", "STAMP": "region text", "MA_HQ": "region text"}
+    assert data["sources"] == {"SOTK": "text_layer", "STAMP": "ocr", "MA_HQ": "ocr"}
+    assert fake_engine.calls["string"] == 2
+
+
+@pytest.mark.asyncio
+async def test_extract_fields_recognition_profiles_from_form(client: AsyncClient, fake_engine):
+    """Test that fields are recognised with type profiles, overridable in the form's ocr_config."""
+    template_response = await client.post("/api/templates", json={"name": "Test Template"})
+    template_id = template_response.json()["id"]
+    form_response = await client.post(
+        f"/api/templates/{template_id}/forms",
+        json={
+            "name": "Test Form",
+            "formType": "customs_export",
+            "allPageParams": {
+                "1": [
+                    {"id": "SOTK", "x1": 0, "y1": 0, "x2": 200, "y2": 50},
+                    {"id": "MA_HQ", "x1": 0, "y1": 60, "x2": 200, "y2": 100},
+                ]
+            },
+            "ocrConfig": {"profiles": {"fields": {"MA_HQ": {"whitelist": "0123456789ABCDEF"}}}},
+        },
+    )
+    form_id = form_response.json()["id"]
+
+    response = await client.post(
+        "/api/ocr/extract-fields", json={"image_base64": _png_base64(), "form_id": form_id, "mode": "region"}
+    )
+
+    assert response.status_code == 200
+    whitelists = sorted(profile.whitelist for profile in fake_engine.profiles)
+    assert whitelists == ["0123456789.,-", "0123456789ABCDEF"]
+    assert {profile.psm for profile in fake_engine.profiles} == {7}
+
+
+@pytest.mark.asyncio
+async def test_extract_fields_rejects_invalid_profiles(client: AsyncClient, fake_engine):
+    """Test that malformed profile overrides in a form are reported as a bad request."""
+    template_response = await client.post("/api/templates", json={"name": "Test Template"})
+    template_id = template_response.json()["id"]
+    form_response = await client.post(
+        f"/api/templates/{template_id}/forms",
+        json={
+            "name": "Test Form",
+            "formType": "customs_export",
+            "allPageParams": {"1": [{"id": "SOTK", "x1": 0, "y1": 0, "x2": 200, "y2": 50}]},
+            "ocrConfig": {"profiles": {"types": {"number": {"psm": "seven"}}}},
+        },
+    )
+
+    response = await client.post(
+        "/api/ocr/extract-fields", json={"image_base64": _png_base64(), "form_id": form_response.json()["id"]}
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_extract_fields_rejected_when_queue_full(client: AsyncClient, fake_engine, monkeypatch):
+    """Test that requests beyond the queue capacity get 503 with a Retry-After hint."""
+    admission = AdmissionController(max_running=1, max_queued=0, queue_timeout=1)
+    monkeypatch.setattr(ocr_service, "admission", admission)
+    payload = {"image_base64": _png_base64(), "page_params": [{"id": "SOTK", "x1": 0, "y1": 0, "x2": 200, "y2": 50}]}
+
+    async with admission.reserve():
+        response = await client.post("/api/ocr/extract-fields", json=payload)
+        assert response.status_code == 503
+        assert int(response.headers["Retry-After"]) >= 1
+
+    response = await client.post("/api/ocr/extract-fields", json=payload)
+    assert response.status_code == 200
+
+    queue = (await client.get("/api/ocr/stats")).json()["queue"]
+    assert (queue["rejected"], queue["admitted"], queue["running"], queue["queued"]) == (1, 2, 0, 0)
@@ -0,0 +1,59 @@
+"""Tests for OCR admission control."""
+import asyncio
+
+import pytest
+
+from app.services.ocr.admission import AdmissionController, QueueFullError
+
+
+@pytest.mark.asyncio
+async def test_admission_bounds_running_and_queued():
+    """Test that requests wait for a slot up to the queue depth and are rejected beyond it."""
+    admission = AdmissionController(max_running=1, max_queued=1, queue_timeout=5)
+    order = []
+
+    async def work(name, ticket):
+        async with ticket:
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    first = asyncio.ensure_future(work("first", admission.reserve()))
+    second = asyncio.ensure_future(work("second", admission.reserve()))
+    with pytest.raises(QueueFullError):
+        admission.reserve()
+
+    await asyncio.gather(first, second)
+    assert order == ["first", "second"]
+    assert admission.stats()["avg_service_seconds"] > 0
+    assert (admission.running, admission.queued) == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_admission_drops_requests_that_wait_too_long():
+    """Test that a queued request gives up after the queue timeout and frees its place."""
+    admission = AdmissionController(max_running=1, max_queued=1, queue_timeout=0.05)
+
+    async with admission.reserve():
+        with pytest.raises(QueueFullError):
+            async with admission.reserve():
+                pass
+        assert admission.queued == 0
+
+    assert admission.timed_out == 1
+    ticket = admission.reserve()
+    ticket.cancel()
+    assert admission.queued == 0
+
+
+def test_admission_of_jobs_shares_accounting():
+    """Test that rejected jobs count as rejections and get a retry hint from the workers' service time."""
+    admission = AdmissionController(max_running=1, max_queued=1, queue_timeout=5)
+    admission.admit_jobs(1, pending=9, running=2, service_seconds=4.0, max_pending=10)
+
+    with pytest.raises(QueueFullError) as exc_info:
+        admission.admit_jobs(2, pending=9, running=2, service_seconds=4.0, max_pending=10)
+    assert exc_info.value.retry_after == 20
+    with pytest.raises(QueueFullError) as exc_info:
+        admission.admit_jobs(1, pending=10, running=0, service_seconds=None, max_pending=10)
+    assert exc_info.value.retry_after == 11
+    assert admission.stats()["rejected"] == 2
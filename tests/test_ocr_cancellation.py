@@ -0,0 +1,77 @@
+"""Tests for cancelling OCR work."""
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services.ocr.cancellation import ClientDisconnectedError, cancel_on_disconnect, run_cancellable
+from app.services.ocr.scheduler import WorkScheduler
+
+SLEEPER = [sys.executable, "-c", "import time; time.sleep(30)"]
+
+
+@pytest.mark.asyncio
+async def test_cancelling_a_running_unit_kills_its_subprocess():
+    """Test that a cancelled unit's subprocess is killed instead of running to the end."""
+    executor = ThreadPoolExecutor(max_workers=1)
+    scheduler = WorkScheduler(executor, max_in_flight=1)
+
+    task = asyncio.ensure_future(scheduler.run(run_cancellable, SLEEPER))
+    await asyncio.sleep(0.5)
+    started = time.monotonic()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    # The worker thread is freed as soon as the process dies
+    await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+    assert time.monotonic() - started < 10
+    assert scheduler.stats()["interactive"]["cancelled"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_queued_units_never_run():
+    """Test that units still waiting for a slot are dropped when their caller is cancelled."""
+    executor = ThreadPoolExecutor(max_workers=1)
+    scheduler = WorkScheduler(executor, max_in_flight=1)
+    ran = []
+
+    running = asyncio.ensure_future(scheduler.run(run_cancellable, SLEEPER))
+    queued = [asyncio.ensure_future(scheduler.run(ran.append, i)) for i in range(3)]
+    await asyncio.sleep(0.2)
+    for task in [running, *queued]:
+        task.cancel()
+    await asyncio.gather(running, *queued, return_exceptions=True)
+    await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+
+    assert ran == []
+    assert scheduler.stats()["interactive"]["cancelled"] == 4
+
+
+@pytest.mark.asyncio
+async def test_cancel_on_disconnect():
+    """Test that work is cancelled once the client is reported gone, and returned otherwise."""
+    checks = []
+    cancelled = asyncio.Event()
+
+    async def is_disconnected():
+        checks.append(True)
+        return len(checks) >= 2
+
+    async def slow():
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(ClientDisconnectedError):
+        await cancel_on_disconnect(slow(), is_disconnected, poll_interval=0.01)
+    assert cancelled.is_set()
+
+    async def fast():
+        return {"SOTK": "123"}
+
+    assert await cancel_on_disconnect(fast(), is_disconnected, poll_interval=0.01) == {"SOTK": "123"}
@@ -0,0 +1,180 @@
+"""Tests for the OCR engine backends."""
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from app.services.ocr import engine as engine_module
+from app.services.ocr.engine import PytesseractEngine, TesserocrEnginePool, build_engine
+from app.services.ocr.layout import parse_tsv
+from app.services.ocr.profiles import RecognitionProfile
+
+
+class FakeTessBaseAPI:
+    """Stand-in for tesserocr.PyTessBaseAPI that records its lifecycle."""
+
+    instances: list = []
+
+    def __init__(self, lang="eng", path=None, oem=3):
+        self.lang = lang
+        self.oem = oem
+        self.size = None
+        self.ended = False
+        self.psm = 3
+        self.variables = {}
+        FakeTessBaseAPI.instances.append(self)
+
+    def SetPageSegMode(self, psm):
+        self.psm = psm
+
+    def SetVariable(self, name, value):
+        self.variables[name] = value
+        return True
+
+    def SetImageBytes(self, data, width, height, bytes_per_pixel, bytes_per_line):
+        assert len(data) == bytes_per_line * height
+        self.size = (width, height)
+
+    def GetUTF8Text(self):
+        return f"{self.lang}:{self.size[0]}x{self.size[1]}\n"
+
+    def Clear(self):
+        self.size = None
+
+    def End(self):
+        self.ended = True
+
+
+class FakeTesserocr:
+    PyTessBaseAPI = FakeTessBaseAPI
+
+
+@pytest.fixture
+def fake_tesserocr(monkeypatch):
+    """Replace tesserocr with the fake API."""
+    FakeTessBaseAPI.instances = []
+    monkeypatch.setattr(engine_module, "tesserocr", FakeTesserocr)
+    return FakeTessBaseAPI
+
+
+def test_pool_reuses_engines(fake_tesserocr):
+    """Test that sequential calls share one initialised engine."""
+    pool = TesserocrEnginePool(size=4)
+    image = np.full((10, 20), 255, np.uint8)
+
+    for _ in range(5):
+        assert pool.image_to_string(image, "eng") == "eng:20x10\n"
+
+    assert len(fake_tesserocr.instances) == 1
+
+
+def test_pool_accepts_array_views(fake_tesserocr):
+    """Test that strided crops and colour arrays are passed as raw pixels."""
+    pool = TesserocrEnginePool(size=1)
+    page = np.zeros((100, 200, 3), np.uint8)
+
+    assert pool.image_to_string(page[10:40, 50:150], "eng") == "eng:100x30\n"
+
+
+def test_pool_keeps_engines_per_language(fake_tesserocr):
+    """Test that each language gets its own engine."""
+    pool = TesserocrEnginePool(size=2)
+    image = np.full((5, 5), 255, np.uint8)
+
+    assert pool.image_to_string(image, "eng").startswith("eng")
+    assert pool.image_to_string(image, "vie").startswith("vie")
+    assert sorted(api.lang for api in fake_tesserocr.instances) == ["eng", "vie"]
+
+
+def test_pool_applies_profiles(fake_tesserocr):
+    """Test that engine modes get their own engines and call settings do not leak between calls."""
+    pool = TesserocrEnginePool(size=1)
+    image = np.full((5, 5), 255, np.uint8)
+    digits = RecognitionProfile(psm=7, oem=1, whitelist="0123456789")
+
+    pool.image_to_string(image, "eng", digits)
+    lstm_api = fake_tesserocr.instances[0]
+    assert (lstm_api.oem, lstm_api.psm, lstm_api.variables["tessedit_char_whitelist"]) == (1, 7, "0123456789")
+
+    pool.image_to_string(image, "eng", RecognitionProfile(psm=7, oem=1))
+    assert len(fake_tesserocr.instances) == 1
+    assert lstm_api.variables["tessedit_char_whitelist"] == ""
+
+    pool.image_to_string(image, "eng")
+    assert len(fake_tesserocr.instances) == 2
+    assert fake_tesserocr.instances[1].psm == 3
+
+
+def test_pool_is_bounded_under_concurrency(fake_tesserocr):
+    """Test that concurrent callers never create more engines than the pool size."""
+    pool = TesserocrEnginePool(size=2)
+    image = np.full((5, 5), 255, np.uint8)
+    barrier = threading.Barrier(8)
+
+    def call(_):
+        barrier.wait()
+        return pool.image_to_string(image, "eng")
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(call, range(8)))
+
+    assert len(results) == 8
+    assert len(fake_tesserocr.instances) <= 2
+
+
+def test_pool_close_ends_engines(fake_tesserocr):
+    """Test that closing the pool shuts every engine down."""
+    pool = TesserocrEnginePool(size=1)
+    pool.image_to_string(np.full((5, 5), 255, np.uint8), "eng")
+    pool.close()
+
+    assert all(api.ended for api in fake_tesserocr.instances)
+
+
+def test_build_engine_fallback(monkeypatch):
+    """Test that auto falls back to pytesseract without tesserocr."""
+    monkeypatch.setattr(engine_module, "tesserocr", None)
+
+    assert isinstance(build_engine("auto"), PytesseractEngine)
+    with pytest.raises(RuntimeError):
+        build_engine("tesserocr")
+    with pytest.raises(ValueError):
+        build_engine("unknown")
+
+
+def test_pytesseract_pipes_image_to_tesseract(monkeypatch, tmp_path):
+    """Test the tesseract command line and stdin image of the subprocess backend."""
+    script = tmp_path / "tesseract"
+    script.write_text(
+        f"#!{sys.executable}\n"
+        "import sys\n"
+        "header = sys.stdin.buffer.read().split(b'\\n')[:2]\n"
+        "print(' '.join(sys.argv[1:]), header[0].decode(), header[1].decode())\n"
+    )
+    script.chmod(0o755)
+    monkeypatch.setattr(engine_module.pytesseract.pytesseract, "tesseract_cmd", str(script))
+    engine = PytesseractEngine()
+
+    text = engine.image_to_string(np.zeros((20, 30), np.uint8), "vie", RecognitionProfile(psm=7, whitelist="0123"))
+
+    assert text.strip() == "stdin stdout -l vie --psm 7 --oem 3 -c tessedit_char_whitelist=0123 P5 30 20"
+
+
+def test_parse_tsv_keeps_words_only():
+    """Test parsing Tesseract TSV output into word boxes."""
+    tsv = "\n".join(
+        [
+            "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext",
+            "1\t1\t0\t0\t0\t0\t0\t0\t400\t200\t-1\t",
+            "4\t1\t1\t1\t1\t0\t10\t20\t200\t30\t-1\t",
+            "5\t1\t1\t1\t1\t1\t10\t20\t90\t30\t95.5\tHELLO",
+            "5\t1\t1\t1\t1\t2\t110\t20\t5\t30\t10\t ",
+        ]
+    )
+
+    words = parse_tsv(tsv)
+
+    assert len(words) == 1
+    assert (words[0].text, words[0].left, words[0].right, words[0].bottom) == ("HELLO", 10, 100, 50)
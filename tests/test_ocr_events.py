@@ -0,0 +1,68 @@
+"""Tests for OCR job status events."""
+import asyncio
+import json
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.database import Base
+from app.models.ocr import JobStatus, OCRJob
+from app.repositories.ocr_repository import OCRRepository
+from app.services.ocr.events import JobEventBroker, JobStatusPoller, PostgresNotifyBridge
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'events.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+def test_broker_delivers_to_subscribers_of_the_job():
+    """Test fan-out per job id and unsubscribing."""
+    broker = JobEventBroker()
+    with broker.subscribe("a") as first, broker.subscribe("a") as second, broker.subscribe("b") as other:
+        broker.publish({"job_id": "a", "status": "processing"})
+        assert first.get_nowait() == second.get_nowait() == {"job_id": "a", "status": "processing"}
+        assert other.empty()
+        assert sorted(broker.watched()) == ["a", "b"]
+    assert broker.watched() == []
+    broker.publish({"job_id": "a", "status": "completed"})
+
+
+@pytest.mark.asyncio
+async def test_poller_publishes_changes_of_watched_jobs(session_factory):
+    """Test that the poller reads only watched jobs and publishes each state once."""
+    async with session_factory() as session:
+        repo = OCRRepository(session)
+        await repo.create(OCRJob(job_id="watched", status=JobStatus.PENDING))
+        await repo.create(OCRJob(job_id="other", status=JobStatus.PENDING))
+    broker = JobEventBroker()
+    poller = JobStatusPoller(broker, session_factory, interval=0.01)
+
+    assert await poller.poll_once() == 0
+    with broker.subscribe("watched") as queue:
+        assert await poller.poll_once() == 1
+        assert queue.get_nowait()["status"] == "pending"
+        assert await poller.poll_once() == 0
+
+        async with session_factory() as session:
+            await OCRRepository(session).update_status("watched", JobStatus.PROCESSING, attempts=1)
+        assert await poller.poll_once() == 1
+        event = queue.get_nowait()
+        assert (event["job_id"], event["status"], event["attempts"]) == ("watched", "processing", 1)
+
+
+def test_notify_bridge_republishes_payloads():
+    """Test that NOTIFY payloads reach local subscribers and malformed ones are dropped."""
+    broker = JobEventBroker()
+    bridge = PostgresNotifyBridge(broker, engine=None)
+    with broker.subscribe("job-1") as queue:
+        bridge._on_notify(None, 1, "ocr_job_events", json.dumps({"job_id": "job-1", "status": "failed"}))
+        bridge._on_notify(None, 1, "ocr_job_events", "not json")
+        bridge._on_notify(None, 1, "ocr_job_events", "{}")
+        assert queue.get_nowait()["status"] == "failed"
+        assert queue.empty()
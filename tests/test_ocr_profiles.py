@@ -0,0 +1,42 @@
+"""Tests for field recognition profiles."""
+import pytest
+
+from app.services.ocr.profiles import (
+    PSM_SINGLE_BLOCK,
+    PSM_SINGLE_LINE,
+    RecognitionProfile,
+    resolve_profile,
+    validate_profile_overrides,
+)
+
+
+def test_resolve_profile_by_type_and_field_id():
+    """Test the built-in profiles for declared types and well-known field ids."""
+    assert resolve_profile({"id": "NAME"}) == RecognitionProfile(psm=PSM_SINGLE_LINE)
+    assert resolve_profile({"id": "NOTES", "isMultiline": True}).psm == PSM_SINGLE_BLOCK
+    assert resolve_profile({"id": "AMOUNT", "type": "decimal"}).whitelist == "0123456789.,-"
+    assert resolve_profile({"id": "SOTK", "type": "string"}).whitelist == "0123456789.,-"
+    assert resolve_profile({"id": "NGAY_DK"}).whitelist == "0123456789/.-"
+    assert resolve_profile({"id": "MA_HQ"}).oem == 1
+
+
+def test_resolve_profile_overrides():
+    """Test that field overrides win over type overrides, which win over the defaults."""
+    overrides = {
+        "types": {"number": {"psm": 8, "whitelist": "0123456789"}},
+        "fields": {"SOTK": {"psm": 13}},
+    }
+
+    assert resolve_profile({"id": "SOTK"}, overrides) == RecognitionProfile(psm=13, oem=1, whitelist="0123456789")
+    assert resolve_profile({"id": "TYGIA_USD"}, overrides).psm == 8
+
+
+def test_validate_profile_overrides():
+    """Test that malformed overrides are rejected."""
+    validate_profile_overrides({"fields": {"SOTK": {"psm": 7, "oem": 1, "whitelist": "0123"}}})
+    with pytest.raises(ValueError):
+        validate_profile_overrides({"fields": {"SOTK": {"lang": "vie"}}})
+    with pytest.raises(ValueError):
+        validate_profile_overrides({"types": {"number": {"psm": "7"}}})
+    with pytest.raises(ValueError):
+        validate_profile_overrides(["SOTK"])
@@ -0,0 +1,56 @@
+"""Tests for region-only render planning."""
+from app.services.ocr.regions import a4_page_area, field_dpi, plan_region_renders
+
+
+def test_field_dpi_scales_with_box_height():
+    """Test that small boxes get more resolution and large boxes less, within bounds."""
+    assert field_dpi(60, base_dpi=300, target_height=60, min_dpi=150, max_dpi=600) == 300
+    assert field_dpi(40, base_dpi=300, target_height=60, min_dpi=150, max_dpi=600) == 450
+    assert field_dpi(10, base_dpi=300, target_height=60, min_dpi=150, max_dpi=600) == 600
+    assert field_dpi(400, base_dpi=300, target_height=60, min_dpi=150, max_dpi=600) == 150
+
+
+def test_plan_groups_fields_by_dpi():
+    """Test that nearby fields sharing a DPI are rendered as one union rectangle."""
+    params = [
+        {"id": "A", "x1": 100, "y1": 100, "x2": 300, "y2": 160},
+        {"id": "B", "x1": 100, "y1": 170, "x2": 300, "y2": 230},
+        {"id": "NOTES", "x1": 0, "y1": 0, "x2": 900, "y2": 400, "isMultiline": True},
+        {"id": "BAD", "x1": 10, "y1": 10, "x2": 5, "y2": 50},
+    ]
+
+    renders = plan_region_renders(params, base_dpi=300, target_height=30, min_dpi=100, max_dpi=600, padding=0)
+
+    assert [(r.dpi, [p["id"] for p in r.params]) for r in renders] == [(150, ["A", "B"]), (300, ["NOTES"])]
+    assert (renders[0].left, renders[0].top, renders[0].right, renders[0].bottom) == (100, 100, 300, 230)
+    scaled = renders[0].scaled_params(300)
+    assert (scaled[1]["x1"], scaled[1]["y1"], scaled[1]["x2"], scaled[1]["y2"]) == (0, 35, 100, 65)
+
+
+def test_plan_renders_distant_fields_separately():
+    """Test that two fields far apart do not pull the page between them into a render."""
+    params = [
+        {"id": "A", "x1": 100, "y1": 100, "x2": 300, "y2": 160},
+        {"id": "B", "x1": 2000, "y1": 3000, "x2": 2300, "y2": 3060},
+    ]
+
+    renders = plan_region_renders(
+        params, base_dpi=300, target_height=60, min_dpi=150, max_dpi=600, page_area=a4_page_area(300), padding=0
+    )
+
+    assert [[p["id"] for p in r.params] for r in renders] == [["A"], ["B"]]
+    assert sum(r.rendered_pixels(300) for r in renders) == 200 * 60 + 300 * 60
+
+
+def test_plan_falls_back_to_page_render():
+    """Test that regions covering most of the page are replaced by a whole-page render."""
+    params = [
+        {"id": "TOP", "x1": 0, "y1": 0, "x2": 2400, "y2": 1500, "isMultiline": True},
+        {"id": "BOTTOM", "x1": 0, "y1": 1700, "x2": 2400, "y2": 3400, "isMultiline": True},
+    ]
+
+    renders = plan_region_renders(
+        params, base_dpi=300, target_height=60, min_dpi=150, max_dpi=600, page_area=a4_page_area(300), padding=0
+    )
+
+    assert renders is None
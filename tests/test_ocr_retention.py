@@ -0,0 +1,112 @@
+"""Tests for OCR job retention."""
+import gzip
+import json
+from datetime import timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.database import Base
+from app.models.ocr import JobStatus, OCRBatch, OCRJob
+from app.models.ocr_cache import OCRCacheEntry
+from app.repositories.ocr_cache_repository import OCRCacheRepository
+from app.repositories.ocr_repository import OCRRepository, utcnow
+from app.services.ocr.retention import JobRetention
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    """Sessions on their own connections, as in the workers that run retention."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'retention.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def _add_job(session_factory, job_id, status, age, batch=None):
+    """A job last updated ``age`` ago."""
+    updated_at = utcnow() - age
+    async with session_factory() as session:
+        session.add(
+            OCRJob(
+                job_id=job_id,
+                status=status,
+                payload={"image_base64": "aGk="},
+                result_text=f"text of {job_id}",
+                batch_id=batch,
+                created_at=updated_at,
+                updated_at=updated_at,
+            )
+        )
+        await session.commit()
+
+
+async def _jobs(session_factory):
+    async with session_factory() as session:
+        return {job.job_id: job for job in await OCRRepository(session).get_all(limit=1000)}
+
+
+@pytest.mark.asyncio
+async def test_compaction_drops_input_of_old_finished_jobs(session_factory):
+    """Test that only finished jobs past the compaction age lose their input, keeping results and updated_at."""
+    await _add_job(session_factory, "old-done", JobStatus.COMPLETED, timedelta(hours=30))
+    await _add_job(session_factory, "old-pending", JobStatus.PENDING, timedelta(hours=30))
+    await _add_job(session_factory, "new-done", JobStatus.COMPLETED, timedelta(hours=1))
+    before = (await _jobs(session_factory))["old-done"].updated_at
+
+    retention = JobRetention(session_factory, retention_days=0, compact_after_hours=24, batch_size=1, cache_ttl_days=0)
+    assert await retention.run_once() == {"compacted": 1, "purged": 0, "cache_purged": 0}
+    assert await retention.compact() == 0
+
+    jobs = await _jobs(session_factory)
+    assert (jobs["old-done"].payload, jobs["old-done"].result_text) == (None, "text of old-done")
+    assert jobs["old-done"].updated_at == before
+    assert jobs["old-pending"].payload is not None
+    assert jobs["new-done"].payload is not None
+
+
+@pytest.mark.asyncio
+async def test_purge_archives_and_deletes_in_batches(session_factory, tmp_path):
+    """Test that finished jobs past retention are archived, deleted batch by batch, and empty batches go too."""
+    async with session_factory() as session:
+        batch = OCRBatch(batch_id="batch-1", total=1, created_at=utcnow() - timedelta(days=40))
+        session.add(batch)
+        await session.commit()
+    for i in range(5):
+        await _add_job(session_factory, f"old-{i}", JobStatus.COMPLETED, timedelta(days=40), batch=batch.id)
+    await _add_job(session_factory, "old-running", JobStatus.PROCESSING, timedelta(days=40))
+    await _add_job(session_factory, "recent", JobStatus.FAILED, timedelta(days=1))
+
+    archive_dir = tmp_path / "archive"
+    retention = JobRetention(session_factory, retention_days=30, archive_dir=str(archive_dir), batch_size=2)
+    assert await retention.purge() == 5
+
+    assert sorted(await _jobs(session_factory)) == ["old-running", "recent"]
+    async with session_factory() as session:
+        assert await session.get(OCRBatch, batch.id) is None
+
+    (archive,) = archive_dir.iterdir()
+    with gzip.open(archive, "rt") as f:
+        records = [json.loads(line) for line in f]
+    assert sorted(record["job_id"] for record in records) == [f"old-{i}" for i in range(5)]
+    assert (records[0]["status"], records[0]["result_text"]) == ("completed", f"text of {records[0]['job_id']}")
+    assert "payload" not in records[0]
+
+
+@pytest.mark.asyncio
+async def test_cache_entries_expire_after_ttl(session_factory):
+    """Test that persistent OCR cache entries older than the TTL are deleted in batches and newer ones kept."""
+    async with session_factory() as session:
+        for i in range(3):
+            session.add(OCRCacheEntry(key=f"old-{i}", text="old", created_at=utcnow() - timedelta(days=100)))
+        session.add(OCRCacheEntry(key="new", text="new", created_at=utcnow() - timedelta(days=1)))
+        await session.commit()
+
+    retention = JobRetention(session_factory, retention_days=0, compact_after_hours=0, batch_size=2, cache_ttl_days=90)
+    assert await retention.run_once() == {"compacted": 0, "purged": 0, "cache_purged": 3}
+    assert await retention.purge_cache() == 0
+
+    async with session_factory() as session:
+        assert await OCRCacheRepository(session).get_many([f"old-{i}" for i in range(3)] + ["new"]) == {"new": "new"}
@@ -0,0 +1,83 @@
+"""Tests for the OCR work scheduler."""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services.ocr.scheduler import Lane, WorkScheduler, work_context
+
+
+async def _submit(scheduler, lane, owner, name, order):
+    with work_context(lane, owner):
+        return await scheduler.run(order.append, name)
+
+
+@pytest.mark.asyncio
+async def test_scheduler_shares_fairly():
+    """Test round-robin between owners once the pool frees up, with stats per lane."""
+    executor = ThreadPoolExecutor(max_workers=1)
+    scheduler = WorkScheduler(executor, max_in_flight=1)
+    gate = threading.Event()
+    order = []
+
+    blocker = asyncio.ensure_future(scheduler.run(gate.wait))
+    await asyncio.sleep(0)
+    tasks = [asyncio.ensure_future(_submit(scheduler, Lane.BATCH, "big", f"big{i}", order)) for i in range(3)]
+    tasks.append(asyncio.ensure_future(_submit(scheduler, Lane.BATCH, "small", "small0", order)))
+    tasks.append(asyncio.ensure_future(_submit(scheduler, Lane.INTERACTIVE, "form:1", "interactive0", order)))
+    await asyncio.sleep(0.01)
+
+    assert (scheduler.stats()["batch"]["queued"], scheduler.stats()["interactive"]["queued"]) == (4, 1)
+    gate.set()
+    await asyncio.gather(blocker, *tasks)
+    executor.shutdown()
+
+    assert order == ["big0", "small0", "interactive0", "big1", "big2"]
+    stats = scheduler.stats()
+    assert (stats["batch"]["completed"], stats["interactive"]["completed"]) == (4, 2)
+
+
+@pytest.mark.asyncio
+async def test_scheduler_holds_slot_until_thread_finishes():
+    """Test that a running unit whose caller is cancelled keeps its slot, and its caller, until its thread returns."""
+    executor = ThreadPoolExecutor(max_workers=2)
+    scheduler = WorkScheduler(executor, max_in_flight=1)
+    gate = threading.Event()
+    order = []
+
+    running = asyncio.ensure_future(scheduler.run(gate.wait))
+    await asyncio.sleep(0.01)
+    running.cancel()
+    waiting = asyncio.ensure_future(_submit(scheduler, Lane.INTERACTIVE, "user", "next", order))
+    await asyncio.sleep(0.05)
+    assert not running.done() and order == []
+    assert scheduler.stats()["interactive"]["running"] == 1
+
+    gate.set()
+    await waiting
+    executor.shutdown()
+    assert running.cancelled() and order == ["next"]
+
+
+@pytest.mark.asyncio
+async def test_scheduler_drops_cancelled_work():
+    """Test that cancelled queued units never run and free their place."""
+    executor = ThreadPoolExecutor(max_workers=1)
+    scheduler = WorkScheduler(executor, max_in_flight=1)
+    gate = threading.Event()
+    order = []
+
+    blocker = asyncio.ensure_future(scheduler.run(gate.wait))
+    await asyncio.sleep(0)
+    cancelled = asyncio.ensure_future(_submit(scheduler, Lane.INTERACTIVE, "user", "cancelled", order))
+    kept = asyncio.ensure_future(_submit(scheduler, Lane.INTERACTIVE, "user", "kept", order))
+    await asyncio.sleep(0.01)
+    cancelled.cancel()
+    await asyncio.sleep(0)
+    assert scheduler.stats()["interactive"]["queued"] == 1
+
+    gate.set()
+    await asyncio.gather(blocker, kept)
+    executor.shutdown()
+    assert order == ["kept"]
@@ -0,0 +1,290 @@
+"""Tests for the OCR job queue and worker."""
+import asyncio
+import base64
+from datetime import timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.database import Base
+from app.models.document import Document
+from app.models.ocr import JobKind, JobStatus, OCRBatch, OCRJob
+from app.repositories.ocr_batch_repository import OCRBatchRepository
+from app.repositories.ocr_repository import OCRRepository, utcnow
+from app.services.ocr.events import broker as job_events
+from app.services.ocr.worker import OCRJobWorker, retry_delay
+
+
+class FakeOCRService:
+    """Returns the job's language as its text, failing the first ``failures`` calls with ``error``.
+
+    Field extraction reads every field as "page <n>" and fails once on ``fail_page``.
+    """
+
+    def __init__(self, failures: int = 0, delay: float = 0, fail_page: int = None, error: Exception = None):
+        self.failures = failures
+        self.error = error or RuntimeError("tesseract crashed")
+        self.delay = delay
+        self.fail_page = fail_page
+        self.calls = 0
+        self.pages_run = []
+
+    async def extract_text_from_base64(self, image_base64, language=None):
+        self.calls += 1
+        base64.b64decode(image_base64)
+        await asyncio.sleep(self.delay)
+        if self.calls <= self.failures:
+            raise self.error
+        return f"text:{language}"
+
+    async def extract_fields_from_pdf_base64(
+        self, pdf_base64, all_page_params, language=None, mode=None, sources=None, profiles=None, on_page=None
+    ):
+        for page in sorted(all_page_params, key=int):
+            self.pages_run.append(int(page))
+            if int(page) == self.fail_page:
+                self.fail_page = None
+                raise RuntimeError("tesseract crashed")
+            params = all_page_params[page]
+            await on_page(int(page), {p["id"]: f"page {page}" for p in params}, {p["id"]: "ocr" for p in params})
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    """Sessions on their own connections, like separate worker processes (the shared test engine has one)."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'queue.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def _enqueue(session_factory, job_id, payload=None, max_attempts=3):
+    async with session_factory() as session:
+        job = OCRJob(
+            job_id=job_id,
+            status=JobStatus.PENDING,
+            payload=payload if payload is not None else {"image_base64": "aGk=", "language": "eng"},
+            max_attempts=max_attempts,
+            available_at=utcnow(),
+        )
+        await OCRRepository(session).create(job)
+
+
+async def _get(session_factory, job_id):
+    async with session_factory() as session:
+        return await OCRRepository(session).get_by_job_id(job_id)
+
+
+@pytest.mark.asyncio
+async def test_worker_runs_queued_job(session_factory):
+    """Test that a worker claims a job, stores its result and releases the lease."""
+    await _enqueue(session_factory, "job-1")
+    worker = OCRJobWorker(FakeOCRService(), session_factory, worker_id="w1")
+
+    assert await worker.run_once()
+    assert not await worker.run_once()
+
+    job = await _get(session_factory, "job-1")
+    assert (job.status, job.result_text, job.attempts, job.locked_by) == (JobStatus.COMPLETED, "text:eng", 1, None)
+    assert job.started_at <= job.finished_at <= utcnow()
+
+
+@pytest.mark.asyncio
+async def test_worker_announces_state_changes(session_factory):
+    """Test that claiming and completing a job are pushed to its status streams."""
+    await _enqueue(session_factory, "job-1")
+    worker = OCRJobWorker(FakeOCRService(), session_factory, worker_id="w1")
+
+    with job_events.subscribe("job-1") as queue:
+        await worker.run_once()
+        events = [queue.get_nowait() for _ in range(queue.qsize())]
+
+    assert [(event["status"], event["attempts"]) for event in events] == [("processing", 1), ("completed", 1)]
+
+
+@pytest.mark.asyncio
+async def test_claims_are_exclusive_and_expired_leases_are_reclaimed(session_factory):
+    """Test that a leased job is not handed out twice until its lease runs out."""
+    await _enqueue(session_factory, "job-1")
+    async with session_factory() as session:
+        repo = OCRRepository(session)
+        first = await repo.claim_next("w1", lease_seconds=60)
+        assert first.job_id == "job-1"
+        assert await repo.claim_next("w2", lease_seconds=60) is None
+
+        # w1 stops heartbeating; once the lease is over w2 takes the job and w1 can no longer write
+        await repo.update(first.id, locked_until=utcnow() - timedelta(seconds=1))
+        second = await repo.claim_next("w2", lease_seconds=60)
+        assert (second.job_id, second.attempts, second.locked_by) == ("job-1", 2, "w2")
+        assert not await repo.complete("job-1", "w1", "stale")
+        assert not await repo.heartbeat("job-1", "w1", 60)
+        assert await repo.complete("job-1", "w2", "fresh")
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_retried_with_backoff(session_factory):
+    """Test that a failed attempt puts the job back with a delay, then it succeeds."""
+    await _enqueue(session_factory, "job-1")
+    service = FakeOCRService(failures=1)
+    worker = OCRJobWorker(service, session_factory, worker_id="w1")
+
+    assert await worker.run_once()
+    job = await _get(session_factory, "job-1")
+    assert (job.status, job.error_message, job.attempts) == (JobStatus.PENDING, "tesseract crashed", 1)
+    assert job.available_at > utcnow()
+    assert not await worker.run_once()
+
+    async with session_factory() as session:
+        await OCRRepository(session).update(job.id, available_at=utcnow())
+    assert await worker.run_once()
+    job = await _get(session_factory, "job-1")
+    assert (job.status, job.result_text, job.attempts) == (JobStatus.COMPLETED, "text:eng", 2)
+
+
+@pytest.mark.asyncio
+async def test_job_fails_for_good(session_factory):
+    """Test that jobs fail without retry on invalid input or once their attempts are used up."""
+    await _enqueue(session_factory, "no-image", payload={})
+    await _enqueue(session_factory, "crashing", max_attempts=1)
+    worker = OCRJobWorker(FakeOCRService(failures=5), session_factory, worker_id="w1")
+
+    while await worker.run_once():
+        pass
+
+    no_image = await _get(session_factory, "no-image")
+    assert (no_image.status, no_image.error_message) == (JobStatus.FAILED, "Either image_base64 or image_url required")
+    crashing = await _get(session_factory, "crashing")
+    assert (crashing.status, crashing.attempts) == (JobStatus.FAILED, 1)
+
+
+@pytest.mark.asyncio
+async def test_only_undecodable_base64_is_reported_as_such(session_factory):
+    """Test that invalid base64 fails a job at once, while other ValueErrors keep their message and are retried."""
+    await _enqueue(session_factory, "bad-base64", payload={"image_base64": "a"})
+    await _enqueue(session_factory, "corrupt-image")
+    worker = OCRJobWorker(
+        FakeOCRService(failures=5, error=ValueError("Corrupt image")), session_factory, worker_id="w1"
+    )
+
+    while await worker.run_once():
+        pass
+
+    bad = await _get(session_factory, "bad-base64")
+    assert (bad.status, bad.attempts) == (JobStatus.FAILED, 1)
+    assert bad.error_message.startswith("Invalid base64 data")
+    corrupt = await _get(session_factory, "corrupt-image")
+    assert (corrupt.status, corrupt.error_message) == (JobStatus.PENDING, "Corrupt image")
+
+
+@pytest.mark.asyncio
+async def test_worker_abandons_job_when_lease_is_lost(session_factory):
+    """Test that a worker stops a job whose lease another worker has taken over."""
+    await _enqueue(session_factory, "job-1")
+    worker = OCRJobWorker(FakeOCRService(delay=5), session_factory, worker_id="w1", heartbeat_seconds=0.05)
+    job = await worker.claim()
+
+    async with session_factory() as session:
+        await OCRRepository(session).update(job.id, locked_by="w2")
+    await asyncio.wait_for(worker.process(job), timeout=2)
+
+    job = await _get(session_factory, "job-1")
+    assert (job.status, job.locked_by, job.result_text) == (JobStatus.PROCESSING, "w2", None)
+
+
+@pytest.mark.asyncio
+async def test_worker_stops_cancelled_batch_job(session_factory):
+    """Test that cancelling a batch stops the jobs of it that are running."""
+    async with session_factory() as session:
+        batch = OCRBatch(batch_id="batch-1", total=1)
+        job = OCRJob(job_id="job-1", status=JobStatus.PENDING, payload={"image_base64": "aGk="}, available_at=utcnow())
+        await OCRBatchRepository(session).create_with_jobs(batch, [job])
+    worker = OCRJobWorker(FakeOCRService(delay=5), session_factory, worker_id="w1", heartbeat_seconds=0.05)
+    job = await worker.claim()
+
+    async with session_factory() as session:
+        repo = OCRBatchRepository(session)
+        await repo.cancel(await repo.get_by_batch_id("batch-1"))
+    await asyncio.wait_for(worker.process(job), timeout=2)
+
+    job = await _get(session_factory, "job-1")
+    assert (job.status, job.locked_by, job.result_text) == (JobStatus.CANCELLED, None, None)
+
+
+@pytest.mark.asyncio
+async def test_field_extraction_job_stores_pages_and_resumes(session_factory):
+    """Test that page results are stored as they finish, a retry skips them, and the document gets the fields."""
+    async with session_factory() as session:
+        document = Document(file_id=1, form_id=1, params={"KEEP": "x", "A": "old"})
+        session.add(document)
+        await session.commit()
+        job = OCRJob(
+            job_id="job-1",
+            status=JobStatus.PENDING,
+            kind=JobKind.EXTRACT_FIELDS,
+            payload={
+                "image_base64": "JVBERg==",
+                "mode": "region",
+                "all_page_params": {"1": [{"id": "A"}], "2": [{"id": "B"}], "3": [{"id": "C"}, {"id": "A"}]},
+                "document_id": document.id,
+            },
+            available_at=utcnow(),
+            pages_total=3,
+            pages_done=0,
+        )
+        await OCRRepository(session).create(job)
+    service = FakeOCRService(fail_page=3)
+    worker = OCRJobWorker(service, session_factory, worker_id="w1")
+
+    with job_events.subscribe("job-1") as queue:
+        assert await worker.run_once()
+        events = [queue.get_nowait() for _ in range(queue.qsize())]
+    assert [(event["status"], event["pages_done"]) for event in events] == [
+        ("processing", 0),
+        ("processing", 1),
+        ("processing", 2),
+        ("pending", 2),
+    ]
+    job = await _get(session_factory, "job-1")
+    assert (job.pages_done, job.result_fields) == (2, {"A": "page 1", "B": "page 2"})
+
+    async with session_factory() as session:
+        await OCRRepository(session).update(job.id, available_at=utcnow())
+    assert await worker.run_once()
+
+    assert service.pages_run == [1, 2, 3, 3]
+    job = await _get(session_factory, "job-1")
+    assert (job.status, job.pages_done) == (JobStatus.COMPLETED, 3)
+    # Later pages win, as in a synchronous extraction
+    assert job.result_fields == {"A": "page 3", "B": "page 2", "C": "page 3"}
+    async with session_factory() as session:
+        document = await session.get(Document, document.id)
+    assert document.params == {"KEEP": "x", "A": "page 3", "B": "page 2", "C": "page 3"}
+
+
+@pytest.mark.asyncio
+async def test_worker_run_loop_stops_after_running_jobs(session_factory):
+    """Test the polling loop drains the queue and exits on stop."""
+    for i in range(3):
+        await _enqueue(session_factory, f"job-{i}")
+    worker = OCRJobWorker(FakeOCRService(), session_factory, worker_id="w1", concurrency=2, poll_seconds=0.01)
+    stop = asyncio.Event()
+    runner = asyncio.create_task(worker.run(stop))
+
+    for _ in range(200):
+        jobs = [await _get(session_factory, f"job-{i}") for i in range(3)]
+        if all(job.status == JobStatus.COMPLETED for job in jobs):
+            break
+        await asyncio.sleep(0.01)
+    stop.set()
+    await asyncio.wait_for(runner, timeout=2)
+
+    assert [job.status for job in jobs] == [JobStatus.COMPLETED] * 3
+
+
+def test_retry_delay_grows_and_is_capped():
+    """Test exponential backoff with jitter."""
+    assert 5 <= retry_delay(1, 10, 600) <= 10
+    assert 20 <= retry_delay(3, 10, 600) <= 40
+    assert 300 <= retry_delay(20, 10, 600) <= 600
@@ -0,0 +1,36 @@
+"""Tests for the rendered PDF page cache."""
+import os
+
+import numpy as np
+
+from app.services.ocr.page_cache import RenderedPageCache
+
+
+def test_page_cache_round_trip(tmp_path):
+    """Test that cached pages come back memory-mapped with the same pixels."""
+    cache = RenderedPageCache(str(tmp_path), max_bytes=10 * 1024**2)
+    page = np.arange(200 * 300 * 3, dtype=np.uint8).reshape(200, 300, 3)[..., ::-1]
+    key = cache.key("digest", 1, 300, grayscale=False)
+
+    assert cache.get(key) is None
+    cache.put(key, page)
+    cached = cache.get(key)
+
+    assert isinstance(cached, np.memmap)
+    assert np.array_equal(cached, page)
+    assert cache.key("digest", 1, 300, grayscale=True) != key
+
+
+def test_page_cache_evicts_least_recently_used(tmp_path):
+    """Test that writes over the size limit remove the oldest pages first."""
+    page = np.zeros((100, 100), np.uint8)
+    cache = RenderedPageCache(str(tmp_path), max_bytes=2 * (page.nbytes + 200))
+
+    cache.put("a", page)
+    cache.put("b", page)
+    os.utime(tmp_path / "a.npy", (1, 1))
+    os.utime(tmp_path / "b.npy", (2, 2))
+    cache.get("a")  # refreshes a
+    cache.put("c", page)
+
+    assert sorted(os.listdir(tmp_path)) == ["a.npy", "c.npy"]
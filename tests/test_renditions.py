@@ -0,0 +1,47 @@
+"""Tests for preview renditions."""
+import cv2
+import numpy as np
+import pytest
+
+from app.services.image_processing.renditions import RENDITIONS, RenditionService
+from app.services.image_processing.service import ImageProcessingService
+
+
+def _photo(width: int, height: int) -> bytes:
+    """A JPEG with some structure, so it does not compress to nothing."""
+    image = np.zeros((height, width, 3), np.uint8)
+    cv2.rectangle(image, (width // 4, height // 4), (width // 2, height // 2), (40, 200, 90), -1)
+    return ImageProcessingService().encode(image, ".jpg")
+
+
+def test_decode_reduced_scales_jpeg_while_decoding():
+    """Test that JPEGs are decoded at the smallest scale that still covers the requested size."""
+    service = ImageProcessingService()
+    photo = _photo(1600, 1200)
+    assert service.decode_reduced(photo, 200).shape == (150, 200, 3)
+    assert service.decode_reduced(photo, 300).shape == (300, 400, 3)
+    assert service.decode_reduced(photo, 1000).shape == (1200, 1600, 3)
+
+
+def test_thumbnail_fits_long_edge_without_upscaling():
+    """Test that thumbnails fit the long edge and small images keep their size."""
+    service = ImageProcessingService()
+    thumbnail = service.decode(service.thumbnail(_photo(1600, 1200), 160))
+    assert thumbnail.shape == (120, 160, 3)
+    assert service.decode(service.thumbnail(_photo(100, 50), 160)).shape == (50, 100, 3)
+
+
+@pytest.mark.asyncio
+async def test_generate_renditions(blob_store):
+    """Test that every rendition is stored next to the page once."""
+    info = await blob_store.put(_photo(2000, 1500))
+    service = RenditionService(blob_store)
+
+    assert await service.generate(info.digest, "image/jpeg") == list(RENDITIONS)
+    for name, size in RENDITIONS.items():
+        rendition = ImageProcessingService().decode(await blob_store.read(info.digest, variant=name))
+        assert max(rendition.shape[:2]) == size
+    assert await service.generate(info.digest, "image/jpeg") == []
+
+    text = await blob_store.put(b"not an image")
+    assert await service.generate(text.digest, "text/plain; charset=utf-8") == []
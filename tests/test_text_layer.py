@@ -0,0 +1,32 @@
+"""Tests for reading PDF text layers."""
+import pytest
+
+from app.services.ocr.text_layer import parse_bbox_html
+
+BBOX_HTML = b"""<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN"
+"http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">
+<html xmlns="http://www.w3.org/1999/xhtml">
+<head><title></title></head>
+<body>
+<doc>
+  <page width="595.000000" height="842.000000">
+    <word xMin="72.000000" yMin="72.000000" xMax="108.000000" yMax="84.000000">S&#7888;</word>
+    <word xMin="144.000000" yMin="72.000000" xMax="180.000000" yMax="84.000000">A&amp;B</word>
+  </page>
+  <page width="595.000000" height="842.000000">
+  </page>
+</doc>
+</body>
+</html>
+"""
+
+
+def test_parse_bbox_html_converts_points_to_pixels():
+    """Test that word boxes are scaled from PDF points to the render DPI."""
+    pages = parse_bbox_html(BBOX_HTML, dpi=300)
+
+    assert [len(words) for words in pages] == [2, 0]
+    first, second = pages[0]
+    assert first.text == "SỐ"
+    assert (first.left, first.top, first.right, first.bottom) == pytest.approx((300, 300, 450, 350))
+    assert second.text == "A&B"